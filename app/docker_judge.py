@@ -1,12 +1,76 @@
 import asyncio
+import contextlib
+import hashlib
+import itertools
 import json
+import mmap
 import os
+import shutil
 import tempfile
 import subprocess
 import time
 import uuid
 import psutil
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator, Tuple
+
+
+OUTPUT_COMPARE_CHUNK = 1024 * 1024  # 严格模式下逐块比较期望输出文件的块大小
+COMPILE_TIME_LIMIT = float(os.environ.get("OJ_COMPILE_TIME_LIMIT", "30"))  # 编译阶段超时秒数
+COMPILE_MEMORY_LIMIT = int(os.environ.get("OJ_COMPILE_MEMORY_LIMIT", "512"))  # 编译容器内存上限（MB）
+
+
+def normalized_lines(lines: Iterable[str]) -> Iterator[str]:   # 逐行去除首尾空格并丢弃末尾空行，与DockerJudge._normalize_output结果一致
+    blank_lines = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            blank_lines += 1
+            continue
+        yield from [""] * blank_lines
+        blank_lines = 0
+        yield line
+
+
+def _lines_digest(lines: Iterable[str]) -> str:   # 按'\n'连接各行后的sha256，不拼接出完整字符串
+    hasher = hashlib.sha256()
+    for i, line in enumerate(lines):
+        if i:
+            hasher.update(b"\n")
+        hasher.update(line.encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def rstripped_length(data) -> int:   # 期望输出（字节串或mmap）按UTF-8解码后做str.rstrip()剩余的字节数，与选手输出的rstrip()一致；只解码末尾
+    end = len(data)
+    while end > 0:
+        start = max(0, end - OUTPUT_COMPARE_CHUNK)
+        while 0 < start < end and data[start] & 0xC0 == 0x80:   # 不从多字节字符中间开始解码
+            start += 1
+        tail = bytes(data[start:end]).decode('utf-8', errors='surrogateescape').rstrip()
+        end = start + len(tail.encode('utf-8', errors='surrogateescape'))
+        if tail:
+            break
+    return end
+
+
+def output_digest(output: str, judge_mode: str) -> str:   # 选手输出在对应评测模式下的摘要：严格模式为rstrip后的内容，标准模式为逐行规范化后的内容
+    if judge_mode == "strict":
+        return hashlib.sha256(output.rstrip().encode('utf-8')).hexdigest()
+    return _lines_digest(normalized_lines(output.split('\n')))
+
+
+def expected_output_digests(data) -> Tuple[str, str]:   # 期望输出（字节串或mmap）的(严格模式摘要, 标准模式摘要)，保存题目时计算一次
+    end = rstripped_length(data)
+    with memoryview(data) as view:
+        strict_digest = hashlib.sha256(view[:end]).hexdigest()
+    
+    if isinstance(data, mmap.mmap):
+        data.seek(0)
+        raw_lines = iter(data.readline, b"")
+    else:
+        raw_lines = iter(data.split(b"\n"))
+    normalized_digest = _lines_digest(normalized_lines(line.decode('utf-8', errors='replace') for line in raw_lines))
+    return strict_digest, normalized_digest
 
 
 class DockerJudge:   # Docker安全评测器
@@ -111,95 +175,119 @@ CMD ["./main"]
         
         return dockerfile_path
     
-    async def run_in_docker(
+    async def compile_program(self, code: str, language: str, source_name: Optional[str] = None) -> "CompiledProgram":   # 编译阶段：每次提交只执行一次，产物供所有测试点只读挂载
+        if language not in ("python", "cpp"):
+            return CompiledProgram(language, None, "", status="CE", error=f"不支持的语言: {language}")
+        
+        work_dir = tempfile.mkdtemp(prefix="oj_program_")
+        os.chmod(work_dir, 0o755)   # 运行容器已关闭所有系统能力，需要可读
+        program = CompiledProgram(language, work_dir, source_name or ("main.py" if language == "python" else "main.cpp"))
+        with open(program.source_path, 'w', encoding='utf-8') as f:   # 创建代码文件
+            f.write(code)
+        if language == "python":
+            return program  # 解释执行，源代码即产物
+        
+        container_name = None
+        if getattr(self, 'docker_available', True):
+            container_name = f"{self.container_prefix}compile_{uuid.uuid4().hex[:8]}"
+            compile_cmd = [   # 编译容器与运行容器同样限制资源和权限，模板炸弹之类的代码无法无限占用CPU和内存
+                "docker", "run",
+                "--name", container_name,
+                "--rm",
+                "--network", "none",
+                "--memory", f"{COMPILE_MEMORY_LIMIT}m",
+                "--cpus", "1",
+                "--pids-limit", "50",
+                "--ulimit", "nofile=64:64",
+                "--security-opt", "no-new-privileges",
+                "--cap-drop", "ALL",
+                "--user", f"{os.getuid()}:{os.getgid()}",   # 以产物目录属主身份写入（已关闭所有系统能力）
+                "--tmpfs", "/tmp:rw,nosuid,size=256m",   # 编译器的临时文件
+                "-v", f"{work_dir}:/app",
+                "-w", "/app",
+                self.base_images[language],
+                "g++", "-o", "main", program.source_name
+            ]
+        else:
+            compile_cmd = ["g++", "-o", os.path.join(work_dir, "main"), program.source_path]   # 模拟模式在本机编译
+        
+        compile_process = await asyncio.create_subprocess_exec(
+            *compile_cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(compile_process.communicate(), timeout=COMPILE_TIME_LIMIT)
+        except asyncio.TimeoutError:    # 只杀掉docker客户端时容器仍会继续运行，需要一并终止
+            await self._terminate(compile_process, container_name)
+            program.status, program.error = "CE", "编译超时"
+            return program
+        if compile_process.returncode != 0:
+            program.status, program.error = "CE", stderr.decode()
+        return program
+    
+    async def _terminate(self, process, container_name: Optional[str]):   # 超时后杀掉进程及其容器，等容器真正退出后再返回，避免它继续占用CPU和内存
+        process.kill()
+        if container_name:
+            kill_process = await asyncio.create_subprocess_exec(
+                "docker", "kill", container_name,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            await kill_process.wait()
+        await process.wait()
+    
+    async def run_program(
         self,
-        language: str,
-        code_file: str,
+        program: "CompiledProgram",
         input_data: str,
         time_limit: float,
         memory_limit: int,
-        container_name: str
-    ) -> Dict[str, Any]:   # 在Docker容器中运行代码
-
+        input_file: Optional[str] = None,
+        container_name: Optional[str] = None
+    ) -> Dict[str, Any]:   # 运行编译产物一次，input_file不为空时直接作为标准输入流入容器
+        if program.status != "OK":
+            return {"status": "CE", "error": program.error}
         if not getattr(self, 'docker_available', True):
-            return await self._run_simulation(language, code_file, input_data, time_limit, memory_limit)
-        image_name = f"{container_name}_image"
-        dockerfile_path = None
-        temp_dir = os.path.dirname(code_file)
+            return await self._run_simulation(program, input_data, time_limit, memory_limit, input_file)
+        
+        container_name = container_name or f"{self.container_prefix}{uuid.uuid4().hex[:8]}"
+        stdin_file = None
         try:
-            work_dir = "/app"  
-            dockerfile_path = self.create_dockerfile(language, code_file, work_dir)
-            build_cmd = [
-                "docker", "build", "-t", image_name,
-                temp_dir
+            run_cmd = [   # 运行Docker容器，产物目录只读挂载为/app
+                "docker", "run",
+                "-i",   # 标准输入由评测进程流式写入
+                "--name", container_name,
+                "--rm",
+                "--network", "none",    # 禁止网络访问
+                "--memory", f"{memory_limit}m",   # 限制内存使用
+                "--cpus", str(time_limit),   # 限制CPU使用时间
+                "--pids-limit", "50",   # 限制进程数
+                "--ulimit", "nofile=64:64",     # 限制打开文件数
+                "--security-opt", "no-new-privileges",  # 禁止容器在运行时获得提权
+                "--cap-drop", "ALL",    # 关闭所有系统能力
+                "--tmpfs", "/tmp:rw,noexec,nosuid,size=100m",   # 将临时目录挂载为RAM，防止I/O恶意行为
+                "--tmpfs", "/var/tmp:rw,noexec,nosuid,size=32m",
+                "-v", f"{program.work_dir}:/app:ro",   # 只读挂载，防止用户修改产物
+                "-w", "/app",
+                self.base_images[program.language],
+                *program.run_command
             ]
-
-            build_process = await asyncio.create_subprocess_exec(   # 异步构建Docker镜像
-                *build_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    build_process.communicate(),    
-                    timeout=30.0
-                )
-            except asyncio.TimeoutError:
-                build_process.kill()
-                return {"status": "CE", "error": "构建超时"}
-            if build_process.returncode != 0:   
-                return {"status": "CE", "error": stderr.decode()}
-            
-            if language == "python":   # 运行Docker容器，使用/app作为工作目录
-                run_cmd = [
-                    "docker", "run",
-                    "--name", container_name,
-                    "--rm",
-                    "--network", "none",    # 禁止网络访问
-                    "--memory", f"{memory_limit}m",   # 限制内存使用
-                    "--cpus", str(time_limit),   # 限制CPU使用时间
-                    "--pids-limit", "50",   # 限制进程数
-                    "--ulimit", "nofile=64:64",     # 限制打开文件数
-                    "--security-opt", "no-new-privileges",  # 禁止容器在运行时获得提权
-                    "--cap-drop", "ALL",    # 关闭所有系统能力
-                    "--tmpfs", "/tmp:rw,noexec,nosuid,size=100m",   # 将临时目录挂载为RAM，防止I/O恶意行为
-                    "--tmpfs", "/var/tmp:rw,noexec,nosuid,size=32m",
-                    "-v", f"{temp_dir}:/app/input:ro",   # 挂载输入文件，防止用户修改输入文件
-                    image_name,
-                    "sh", "-c", f"cat > /app/input.txt << 'EOF'\n{input_data}\nEOF\npython /app/{os.path.basename(code_file)} < /app/input.txt"  # 读取输入并运行
-                ]
-            else:  # cpp
-                run_cmd = [
-                    "docker", "run",
-                    "--name", container_name,
-                    "--rm",
-                    "--network", "none",
-                    "--memory", f"{memory_limit}m",
-                    "--cpus", str(time_limit),
-                    "--pids-limit", "50",
-                    "--ulimit", "nofile=64:64",
-                    "--security-opt", "no-new-privileges",
-                    "--cap-drop", "ALL",
-                    "--tmpfs", "/tmp:rw,noexec,nosuid,size=100m",
-                    "--tmpfs", "/var/tmp:rw,noexec,nosuid,size=32m",
-                    "-v", f"{temp_dir}:/app/input:ro",
-                    image_name,
-                    "sh", "-c", f"cat > /app/input.txt << 'EOF'\n{input_data}\nEOF\n/app/main < /app/input.txt"
-                ]
+            stdin_file = open(input_file, 'rb') if input_file else None   # 外部测试数据直接以文件描述符作为标准输入
             start_time = time.time()
             run_process = await asyncio.create_subprocess_exec(     # 异步创建 Docker 容器进程
                 *run_cmd,
+                stdin=stdin_file or asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,     # 捕获程序输出
                 stderr=asyncio.subprocess.PIPE
             )
             try:
                 stdout, stderr = await asyncio.wait_for(
-                    run_process.communicate(),
+                    run_process.communicate(input=None if stdin_file else input_data.encode()),
                     timeout=time_limit + 1.0
                 )
             except asyncio.TimeoutError:    # 安全响应：TLE时自动终止进程并杀掉Docker容器
-                run_process.kill()
-                await asyncio.create_subprocess_exec("docker", "kill", container_name)
+                await self._terminate(run_process, container_name)
                 return {"status": "TLE", "time_used": time_limit}
             end_time = time.time()
             time_used = end_time - start_time
@@ -246,12 +334,26 @@ CMD ["./main"]
         except Exception as e:
             return {"status": "UNK", "error": str(e)}
         finally:
-            try:
-                await asyncio.create_subprocess_exec("docker", "rmi", image_name)
-                if dockerfile_path and os.path.exists(dockerfile_path):
-                    os.remove(dockerfile_path)
-            except:
-                pass
+            if stdin_file:
+                stdin_file.close()
+    
+    async def run_in_docker(
+        self,
+        language: str,
+        code_file: str,
+        input_data: str,
+        time_limit: float,
+        memory_limit: int,
+        container_name: str,
+        input_file: Optional[str] = None
+    ) -> Dict[str, Any]:   # 编译并运行单个代码文件一次（不复用产物的场景）
+        with open(code_file, 'r', encoding='utf-8') as f:
+            code = f.read()
+        program = await self.compile_program(code, language, os.path.basename(code_file))
+        try:
+            return await self.run_program(program, input_data, time_limit, memory_limit, input_file, container_name)
+        finally:
+            program.cleanup()
     
     async def judge_test_case(
         self,
@@ -262,90 +364,48 @@ CMD ["./main"]
         time_limit: float,
         memory_limit: int,
         judge_mode: str = "standard",
-        problem_id: str = ""
-    ):
+        problem_id: str = "",
+        input_file: Optional[str] = None,
+        expected_file: Optional[str] = None,
+        expected_digest: Optional[str] = None,
+        program: Optional["CompiledProgram"] = None
+    ):   # input_file/expected_file为外部测试数据路径，不为空时代替input_data/expected_output；expected_digest为预先计算的期望输出摘要；program为已编译的产物
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                if language == "python":
-                    code_file = os.path.join(temp_dir, "main.py")
-                elif language == "cpp":
-                    code_file = os.path.join(temp_dir, "main.cpp")
-                else:
-                    return self._create_test_case_result("CE", input_data=input_data, expected_output=expected_output)
-
-                with open(code_file, 'w', encoding='utf-8') as f:   # 创建代码文件
-                    f.write(code)
-                container_name = f"{self.container_prefix}{uuid.uuid4().hex[:8]}"   
-                result = await self.run_in_docker(
-                    language, code_file, input_data, time_limit, memory_limit, container_name
+            if program is None:
+                program = await self.compile_program(code, language)
+                try:
+                    result = await self.run_program(program, input_data, time_limit, memory_limit, input_file)
+                finally:
+                    program.cleanup()
+            else:
+                result = await self.run_program(program, input_data, time_limit, memory_limit, input_file)
+            
+            # 处理结果
+            if result["status"] in ["CE", "TLE", "MLE", "RE", "UNK"]:
+                return self._create_test_case_result(
+                    status=result["status"],
+                    time_used=result.get("time_used", 0),
+                    memory_used=result.get("memory_used", 0),
+                    input_data=input_data,
+                    expected_output=expected_output,
+                    actual_output=result.get("output", "")
                 )
-                
-                # 处理结果
-                if result["status"] in ["CE", "TLE", "MLE", "RE", "UNK"]:
-                    return self._create_test_case_result(
-                        status=result["status"],
-                        time_used=result.get("time_used", 0),
-                        memory_used=result.get("memory_used", 0),
-                        input_data=input_data,
-                        expected_output=expected_output,
-                        actual_output=result.get("output", "")
-                    )
-                
-                actual_output = result["output"].rstrip()
-                expected_output = expected_output.rstrip()
-                
-                if judge_mode == "spj" and problem_id:
-                    # 使用SPJ脚本进行评测
-                    try:
-                        from .routers.spj import run_spj_script
-                        spj_result = await run_spj_script(problem_id, input_data, expected_output, actual_output)
-                        
-                        if spj_result.get("status") == "AC":
-                            return self._create_test_case_result(
-                                status="AC",
-                                time_used=result["time_used"],
-                                memory_used=result["memory_used"],
-                                input_data=input_data,
-                                expected_output=expected_output,
-                                actual_output=actual_output
-                            )
-                        else:
-                            return self._create_test_case_result(
-                                status="WA",
-                                time_used=result["time_used"],
-                                memory_used=result["memory_used"],
-                                input_data=input_data,
-                                expected_output=expected_output,
-                                actual_output=actual_output
-                            )
-                    except Exception as e:
-                        print(f"SPJ评测失败: {e}")  # SPJ失败时回退到标准评测                        
-                        pass
-                
-                # 标准评测或严格评测
-                if judge_mode == "strict":
-                    # 严格模式：完全匹配
-                    if actual_output == expected_output:
-                        return self._create_test_case_result(
-                            status="AC",
-                            time_used=result["time_used"],
-                            memory_used=result["memory_used"],
-                            input_data=input_data,
-                            expected_output=expected_output,
-                            actual_output=actual_output
-                        )
-                    else:
-                        return self._create_test_case_result(
-                            status="WA",
-                            time_used=result["time_used"],
-                            memory_used=result["memory_used"],
-                            input_data=input_data,
-                            expected_output=expected_output,
-                            actual_output=actual_output
-                        )
-                else:
-                    # 标准模式：忽略多余空格和换行
-                    if self._normalize_output(actual_output) == self._normalize_output(expected_output):
+            
+            actual_output = result["output"].rstrip()
+            expected_output = expected_output.rstrip()
+            
+            if judge_mode == "spj" and problem_id:
+                # 使用SPJ脚本进行评测
+                try:
+                    from .routers.spj import run_spj_script
+                    if expected_file:   # SPJ脚本需要完整文本
+                        with open(input_file, 'r', encoding='utf-8') as f:
+                            input_data = f.read()
+                        with open(expected_file, 'r', encoding='utf-8') as f:
+                            expected_output = f.read().rstrip()
+                    spj_result = await run_spj_script(problem_id, input_data, expected_output, actual_output)
+                    
+                    if spj_result.get("status") == "AC":
                         return self._create_test_case_result(
                             status="AC",
                             time_used=result["time_used"],
@@ -363,7 +423,24 @@ CMD ["./main"]
                             expected_output=expected_output,
                             actual_output=actual_output
                         )
-                
+                except Exception as e:
+                    print(f"SPJ评测失败: {e}")  # SPJ失败时回退到标准评测                        
+                    pass
+            
+            # 标准评测（忽略多余空格和换行）或严格评测（完全匹配）
+            if expected_digest is not None:
+                matched = output_digest(actual_output, judge_mode) == expected_digest  # 只规范化选手输出，不读取期望输出
+            else:
+                matched = self._output_matches(actual_output, expected_output, expected_file, judge_mode)
+            return self._create_test_case_result(
+                status="AC" if matched else "WA",
+                time_used=result["time_used"],
+                memory_used=result["memory_used"],
+                input_data=input_data,
+                expected_output=expected_output,
+                actual_output=actual_output
+            )
+            
         except Exception as e:
             print(f"Docker评测错误: {e}")
             return self._create_test_case_result(
@@ -393,19 +470,49 @@ CMD ["./main"]
             normalized_lines.append(line.strip())  # 去除行首和行尾空格
         return '\n'.join(normalized_lines).rstrip()
     
+    def _output_matches(self, actual_output: str, expected_output: str, expected_file: Optional[str], judge_mode: str) -> bool:   # 比较实际输出与期望输出，期望输出文件经mmap逐行/逐块比较
+        if expected_file is None:
+            if judge_mode == "strict":
+                return actual_output == expected_output
+            return self._normalize_output(actual_output) == self._normalize_output(expected_output)
+        
+        with self._map_file(expected_file) as expected:
+            if judge_mode == "strict":
+                actual = actual_output.encode('utf-8')
+                end = rstripped_length(expected)  # 等价于对期望输出rstrip
+                if end != len(actual):
+                    return False
+                return all(
+                    expected[i:min(i + OUTPUT_COMPARE_CHUNK, end)] == actual[i:i + OUTPUT_COMPARE_CHUNK]
+                    for i in range(0, end, OUTPUT_COMPARE_CHUNK)
+                )
+            
+            expected_lines = (line.decode('utf-8', errors='replace') for line in iter(expected.readline, b"")) if expected else iter(())
+            pairs = itertools.zip_longest(normalized_lines(actual_output.split('\n')), normalized_lines(expected_lines))
+            return all(actual == expected for actual, expected in pairs)
+    
+    @contextlib.contextmanager
+    def _map_file(self, path: str):   # 只读映射文件，空文件返回空字节串
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+    
     async def _run_simulation(
         self,
-        language: str,
-        code_file: str,
+        program: "CompiledProgram",
         input_data: str,
         time_limit: float,
-        memory_limit: int
+        memory_limit: int,
+        input_file: Optional[str] = None
     ) -> Dict[str, Any]:   # 模拟Docker运行（当Docker不可用时）
         try:
             start_time = time.time()
             
             # 检查代码安全性
-            with open(code_file, 'r', encoding='utf-8') as f:
+            with open(program.source_path, 'r', encoding='utf-8') as f:
                 code_content = f.read()
             
             # 检查危险操作
@@ -422,41 +529,29 @@ CMD ["./main"]
                         "error": f"检测到危险操作: {op}"
                     }
             
-            # 模拟运行代码
-            if language == "python":
-                cmd = ["python", code_file]
-            elif language == "cpp":
-                # 模拟编译
-                compile_cmd = ["g++", "-o", code_file.replace(".cpp", ""), code_file]
-                compile_process = await asyncio.create_subprocess_exec(
-                    *compile_cmd,
+            # 模拟运行代码（C++已在编译阶段生成可执行文件）
+            if program.language == "python":
+                cmd = ["python", program.source_path]
+            else:
+                cmd = [os.path.join(program.work_dir, "main")]
+            
+            # 运行代码，外部测试数据直接以文件描述符作为标准输入
+            with (open(input_file, 'rb') if input_file else contextlib.nullcontext()) as stdin_file:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=stdin_file or asyncio.subprocess.PIPE,
                     stdout=asyncio.subprocess.PIPE,
                     stderr=asyncio.subprocess.PIPE
                 )
-                stdout, stderr = await compile_process.communicate()
-                if compile_process.returncode != 0:
-                    return {"status": "CE", "error": stderr.decode()}
                 
-                cmd = [code_file.replace(".cpp", "")]
-            else:
-                return {"status": "CE", "error": f"不支持的语言: {language}"}
-            
-            # 运行代码
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(input=input_data.encode()),
-                    timeout=time_limit
-                )
-            except asyncio.TimeoutError:
-                process.kill()
-                return {"status": "TLE", "time_used": time_limit}
+                try:
+                    stdout, stderr = await asyncio.wait_for(
+                        process.communicate(input=None if stdin_file else input_data.encode()),
+                        timeout=time_limit
+                    )
+                except asyncio.TimeoutError:
+                    process.kill()
+                    return {"status": "TLE", "time_used": time_limit}
             
             end_time = time.time()
             time_used = end_time - start_time
@@ -515,5 +610,28 @@ CMD ["./main"]
         except Exception as e:
             print(f"清理容器失败: {e}")
 
+class CompiledProgram:   # 一次提交的编译产物，目录中包含源代码和（C++）可执行文件main
+    def __init__(self, language: str, work_dir: Optional[str], source_name: str, status: str = "OK", error: str = ""):
+        self.language = language
+        self.work_dir = work_dir
+        self.source_name = source_name
+        self.status = status  # OK 或 CE
+        self.error = error
+    
+    @property
+    def source_path(self) -> str:
+        return os.path.join(self.work_dir, self.source_name)
+    
+    @property
+    def run_command(self) -> list:   # 在产物目录中运行程序的命令
+        if self.language == "python":
+            return ["python", self.source_name]
+        return ["./main"]
+    
+    def cleanup(self):   # 删除产物目录
+        if self.work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
 # 全局Docker评测器实例
 docker_judge = DockerJudge() 
\ No newline at end of file
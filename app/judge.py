@@ -10,6 +10,10 @@ from .models import data_store
 from .docker_judge import docker_judge
 
 
+OUTPUT_PREVIEW_LIMIT = int(os.environ.get("OJ_OUTPUT_PREVIEW_LIMIT", "1024"))  # 评测日志中保留的实际输出字符数上限
+LOG_CASE_RESULT_FIELDS = ("test_case_id", "status", "time_used", "memory_used", "actual_output", "actual_output_size", "actual_output_truncated")  # 隐藏测试数据时日志测试点可返回的字段
+
+
 class JudgeResult:
     def __init__(self, status: str, score: int = 0, counts: int = 0):
         self.status = status  # pending, success, error
@@ -43,8 +47,6 @@ class Judge:
                 data_store.update_submission(submission_id, status="error")
                 return JudgeResult("error")
             
-            # 获取评测模式
-            judge_mode = getattr(problem, 'judge_mode', 'standard')
             problem_id = submission["problem_id"]
             
             # 获取语言配置
@@ -54,37 +56,16 @@ class Judge:
                 return JudgeResult("error")
             
             # 评测所有测试点
-            test_cases = problem.testcases
-            total_score = 0
-            total_counts = len(test_cases) * 10  # 每个测试点10分
+            total_counts = len(problem.testcases) * 10  # 每个测试点10分
             
-            test_case_results = []
-            for i, test_case in enumerate(test_cases):
-                result = await self._judge_test_case(
-                    submission["code"],
-                    submission["language"],
-                    language,
-                    test_case.input,
-                    test_case.output,
-                    problem.time_limit or language.get("time_limit", 3.0),
-                    problem.memory_limit or language.get("memory_limit", 128),
-                    i,
-                    judge_mode,
-                    problem_id
+            # 每次提交只编译一次，编译错误时各测试点直接记为CE而不再运行
+            program = await docker_judge.compile_program(submission["code"], submission["language"])
+            try:
+                test_case_results, test_case_hashes, total_score = await self._judge_test_cases(
+                    submission, language, problem, program
                 )
-                
-                test_case_results.append({
-                    "test_case_id": i,
-                    "status": result.status,
-                    "time_used": result.time_used,
-                    "memory_used": result.memory_used,
-                    "input_data": result.input_data,
-                    "expected_output": result.expected_output,
-                    "actual_output": result.actual_output
-                })
-                
-                if result.status == "AC":
-                    total_score += 10
+            finally:
+                program.cleanup()
             
             # 保存评测日志
             log_data = {
@@ -95,18 +76,26 @@ class Judge:
                 "code": submission["code"],
                 "score": total_score,
                 "counts": total_counts,
+                "test_data": {
+                    "problem_id": problem_id,
+                    "version": problem.test_data_version or 0,
+                    "digest": problem.test_data_digest or self._test_data_digest(test_case_hashes)
+                },
                 "test_cases": test_case_results,
                 "submit_time": submission["submit_time"]
             }
-            data_store.save_submission_log(submission_id, log_data)
-            
-            # 更新提交结果
-            data_store.update_submission(
-                submission_id,
-                status="success",
-                score=total_score,
-                counts=total_counts
-            )
+            if program.status == "CE":
+                log_data["compile_error"] = program.error
+            with data_store.transaction():   # 评测日志与评测结果一次提交
+                data_store.save_submission_log(submission_id, log_data)
+                
+                # 更新提交结果
+                data_store.update_submission(
+                    submission_id,
+                    status="success",
+                    score=total_score,
+                    counts=total_counts
+                )
             
             return JudgeResult("success", total_score, total_counts)
             
@@ -115,6 +104,119 @@ class Judge:
             data_store.update_submission(submission_id, status="error")
             return JudgeResult("error")
     
+    async def _judge_test_cases(self, submission: dict, language: dict, problem, program) -> Tuple[List[dict], List[Tuple[str, str]], int]:   # 用同一份编译产物评测全部测试点，返回(测试点结果, 测试点摘要, 总分)
+        problem_id = problem.id
+        judge_mode = getattr(problem, 'judge_mode', 'standard')
+        test_case_results = []
+        test_case_hashes = []
+        total_score = 0
+        for i, test_case in enumerate(problem.testcases):
+            input_hash, expected_output_hash = self._testcase_hashes(problem_id, test_case)  # 保存题目时已计算，旧题目在此计算
+            test_case_hashes.append((input_hash, expected_output_hash))
+            input_file, expected_file = self._testcase_files(problem_id, test_case)
+            result = await self._judge_test_case(
+                submission["code"],
+                submission["language"],
+                language,
+                test_case.input or "",
+                test_case.output or "",
+                problem.time_limit or language.get("time_limit", 3.0),
+                problem.memory_limit or language.get("memory_limit", 128),
+                i,
+                judge_mode,
+                problem_id,
+                input_file=input_file,
+                expected_file=expected_file,
+                expected_digest=self._expected_digest(test_case, judge_mode),
+                program=program
+            )
+            
+            # 日志只引用测试数据（题目、版本、测试点序号 + 摘要），不再复制输入和期望输出
+            actual_output = result.actual_output or ""
+            test_case_results.append({
+                "test_case_id": i,
+                "status": result.status,
+                "time_used": result.time_used,
+                "memory_used": result.memory_used,
+                "input_hash": input_hash,
+                "expected_output_hash": expected_output_hash,
+                "actual_output": actual_output[:OUTPUT_PREVIEW_LIMIT],
+                "actual_output_size": len(actual_output),
+                "actual_output_truncated": len(actual_output) > OUTPUT_PREVIEW_LIMIT
+            })
+            
+            if result.status == "AC":
+                total_score += 10
+        
+        return test_case_results, test_case_hashes, total_score
+    
+    def _test_data_digest(self, test_case_hashes) -> str:   # 测试数据摘要：全部测试点摘要的摘要
+        from .routers.problems import compute_test_data_digest
+        
+        return compute_test_data_digest(test_case_hashes)
+    
+    def _testcase_hashes(self, problem_id: str, test_case) -> Tuple[str, str]:   # 测试点输入和期望输出的摘要
+        from .routers.problems import get_testcase_hashes
+        
+        return get_testcase_hashes(problem_id, test_case)
+    
+    def _expected_digest(self, test_case, judge_mode: str) -> Optional[str]:   # 保存题目时预先计算的期望输出摘要，SPJ或旧题目返回None
+        if judge_mode == "spj":
+            return None
+        if judge_mode == "strict":
+            return test_case.output_strict_hash
+        return test_case.output_normalized_hash
+    
+    def _testcase_files(self, problem_id: str, test_case) -> Tuple[Optional[str], Optional[str]]:   # 外部测试数据文件路径，内联测试点返回(None, None)
+        from .routers.problems import get_testcase_path
+        
+        if test_case.input_file is None:
+            return None, None
+        return get_testcase_path(problem_id, test_case.input_file), get_testcase_path(problem_id, test_case.output_file)
+    
+    def resolve_test_data(self, log_data: dict, include_test_data: bool = True) -> List[dict]:   # 查看日志时按引用取回测试点的输入和期望输出（外部测试数据只取前OUTPUT_PREVIEW_LIMIT字节）
+        from .routers.problems import read_testcase_text
+        
+        if not include_test_data:   # 隐藏测试点：只返回评测结果和实际输出预览（旧日志内嵌的测试数据也一并去掉）
+            results = []
+            for case in log_data.get("test_cases", []):
+                result = {key: case[key] for key in LOG_CASE_RESULT_FIELDS if key in case}
+                actual_output = result.get("actual_output") or ""
+                if len(actual_output) > OUTPUT_PREVIEW_LIMIT:   # 旧日志保存的是完整输出
+                    result["actual_output"] = actual_output[:OUTPUT_PREVIEW_LIMIT]
+                    result["actual_output_size"] = len(actual_output)
+                    result["actual_output_truncated"] = True
+                results.append(result)
+            return results
+        
+        problem = None
+        test_data = log_data.get("test_data")
+        if test_data:
+            problem = self._load_problem(test_data["problem_id"])
+        
+        resolved = []
+        for case in log_data.get("test_cases", []):
+            case = dict(case)
+            if "input_hash" in case:
+                index = case["test_case_id"]
+                source = problem.testcases[index] if problem and index < len(problem.testcases) else None
+                try:
+                    matched = source is not None and self._testcase_hashes(problem.id, source) == (case["input_hash"], case["expected_output_hash"])
+                except OSError:
+                    matched = False  # 外部测试数据文件已丢失
+                if matched:
+                    limit = None
+                    if source.input_file is not None:   # 外部测试数据可能很大，只返回预览
+                        limit = OUTPUT_PREVIEW_LIMIT
+                        case["test_data_truncated"] = any(os.path.getsize(path) > limit for path in self._testcase_files(problem.id, source))
+                    case["input_data"] = read_testcase_text(problem.id, source, "input", limit)
+                    case["expected_output"] = read_testcase_text(problem.id, source, "output", limit)
+                else:
+                    case["input_data"] = None  # 测试数据已修改或删除，原始数据不可用
+                    case["expected_output"] = None
+            resolved.append(case)
+        return resolved
+    
     def _load_problem(self, problem_id: str):   # 加载题目信息
         import json
         from .routers.problems import load_problem
@@ -135,8 +237,12 @@ class Judge:
         memory_limit: int,
         test_case_id: int,
         judge_mode: str = "standard",
-        problem_id: str = ""
-    ):   # 评测单个测试点（使用Docker安全评测）
+        problem_id: str = "",
+        input_file: Optional[str] = None,
+        expected_file: Optional[str] = None,
+        expected_digest: Optional[str] = None,
+        program=None
+    ):   # 评测单个测试点（使用Docker安全评测），外部测试数据以文件路径传入，program为本次提交的编译产物
         try:
             # 使用Docker评测器
             return await docker_judge.judge_test_case(
@@ -147,7 +253,11 @@ class Judge:
                 time_limit=time_limit,
                 memory_limit=memory_limit,
                 judge_mode=judge_mode,
-                problem_id=problem_id
+                problem_id=problem_id,
+                input_file=input_file,
+                expected_file=expected_file,
+                expected_digest=expected_digest,
+                program=program
             )
         except Exception as e:
             print(f"Test case error: {e}")
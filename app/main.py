@@ -4,6 +4,7 @@ from fastapi.exceptions import RequestValidationError
 import uvicorn
 
 from .auth import SessionMiddleware
+from .models import data_store, PRELOAD_COLD_COLLECTIONS, SHUTDOWN_FLUSH_TIMEOUT
 from .routers import auth, users, problems, admin, languages, submissions, logs, import_export, spj
 
 app = FastAPI(title="Online Judge System", version="1.0.0")
@@ -16,6 +17,19 @@ async def welcome():
     return "Welcome!"
 
 
+@app.on_event("startup")
+async def preload_data_store():   # 按配置在后台预加载冷集合
+    if PRELOAD_COLD_COLLECTIONS:
+        data_store.preload_cold_collections()
+
+
+@app.on_event("shutdown")
+async def flush_data_store():   # 退出前等待后台落盘完成（有超时，落盘失败时不会卡住退出）
+    if not data_store.wait_for_flush(timeout=SHUTDOWN_FLUSH_TIMEOUT):
+        print(f"退出前数据落盘未完成: {data_store.last_flush_error or '等待超时'}")
+    data_store.flush_access_logs()
+
+
 # 注册路由
 app.include_router(auth.router)
 app.include_router(users.router)
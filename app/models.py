@@ -1,20 +1,58 @@
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import hashlib
 import json
 import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from typing import List, Optional
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from datetime import datetime, timedelta
 import bcrypt
 import uuid
 
+try:
+    import fcntl
+except ImportError:   # Windows 没有 fcntl，跳过多进程检查
+    fcntl = None
+
+from .storage_utils import encode_cursor, decode_cursor, SUBMISSION_LOG_DIR, ACCESS_LOG_DIR
+
 
 class Sample(BaseModel):
     input: str
     output: str
 
 
+TESTDATA_FILE_PATTERN = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")  # 外部测试数据文件名，只允许位于题目数据目录下
+
+
 class TestCase(BaseModel):
-    input: str
-    output: str
+    input: Optional[str] = Field(None, description="输入数据，数据保存在外部文件时为空")
+    output: Optional[str] = Field(None, description="期望输出，数据保存在外部文件时为空")
+    input_file: Optional[str] = Field(None, description="题目数据目录下的输入文件名（.in）")
+    output_file: Optional[str] = Field(None, description="题目数据目录下的期望输出文件名（.out）")
+    input_hash: Optional[str] = Field(None, description="输入数据sha256，保存题目时计算")
+    output_hash: Optional[str] = Field(None, description="期望输出sha256，保存题目时计算")
+    output_strict_hash: Optional[str] = Field(None, description="严格模式下期望输出（rstrip后）的sha256")
+    output_normalized_hash: Optional[str] = Field(None, description="标准模式下期望输出（逐行去除首尾空格后）的sha256")
+    
+    @model_validator(mode="after")
+    def check_data_source(self):   # 每个测试点要么内联数据，要么引用外部文件
+        if self.input_file is not None or self.output_file is not None:
+            for name in (self.input_file, self.output_file):
+                if not name or not TESTDATA_FILE_PATTERN.match(name):
+                    raise ValueError(f"无效的测试数据文件名: {name}")
+        elif self.input is None or self.output is None:
+            raise ValueError("测试点缺少输入或输出")
+        return self
 
 
 class Problem(BaseModel):
@@ -35,6 +73,8 @@ class Problem(BaseModel):
     difficulty: Optional[str] = Field("", description="难度等级")
     judge_mode: Optional[str] = Field("standard", description="评测模式：standard(标准), strict(严格), spj(特判)")
     spj_script: Optional[str] = Field("", description="特判脚本内容")
+    test_data_digest: Optional[str] = Field("", description="全部测试数据的摘要，保存或导入题目时计算")
+    test_data_version: Optional[int] = Field(0, description="测试数据版本号，摘要变化时递增")
 
 
 class ProblemSummary(BaseModel):
@@ -107,6 +147,12 @@ class SubmissionCreate(BaseModel):
     code: str = Field(..., description="代码")
 
 
+class ReferenceSolution(BaseModel):
+    language: str = Field(..., description="编程语言")
+    code: str = Field(..., description="标程代码")
+    mode: str = Field("fill", description="fill(用标程输出填充测试点) 或 verify(只校验现有输出)")
+
+
 class TestCaseResult(BaseModel):
     test_case_id: int = Field(..., description="测试用例ID")
     status: str = Field(..., description="评测状态")
@@ -144,106 +190,631 @@ class AccessLog(BaseModel):
     ip_address: str = Field("", description="IP地址")
 
 
-class DataStore:    # 核心数据管理模块
+def write_json_atomic(file_path: str, data) -> int:   # 先写临时文件再原子替换，避免写到一半的文件；返回写入字节数
+    content = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    dir_name = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=dir_name)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(content)
+
+
+STORAGE_BACKEND = os.environ.get("OJ_STORAGE_BACKEND", "json")  # json: JSON文件存储; sqlite: SQLite数据库存储
+PERSISTENCE_MODE = os.environ.get("OJ_PERSISTENCE_MODE", "snapshot")  # snapshot: 每次变更重写数据文件; journal: 变更追加写入日志
+JOURNAL_FILE = "datastore.journal"  # 变更日志文件
+JOURNAL_COMPACT_THRESHOLD = int(os.environ.get("OJ_JOURNAL_COMPACT_THRESHOLD", "1000"))  # 日志记录数达到阈值后压缩为快照
+SUBMISSION_INDEX_FIELDS = ("user_id", "problem_id", "status")  # 提交列表可过滤的字段
+FLUSH_INTERVAL_MS = int(os.environ.get("OJ_FLUSH_INTERVAL_MS", "0"))  # 0: 同步落盘; >0: 后台线程按该窗口合并写入
+SHUTDOWN_FLUSH_TIMEOUT = float(os.environ.get("OJ_SHUTDOWN_FLUSH_TIMEOUT", "10"))  # 退出时等待后台落盘的最长秒数
+COLD_COLLECTIONS = ("submission_logs", "access_logs")  # 体量大且启动时用不到的集合，首次访问时再加载
+PRELOAD_COLD_COLLECTIONS = os.environ.get("OJ_PRELOAD_COLD_COLLECTIONS", "0") == "1"  # 启动后在后台线程预加载冷集合
+SUBMISSION_LOG_CACHE_SIZE = int(os.environ.get("OJ_SUBMISSION_LOG_CACHE_SIZE", "256"))  # 提交日志LRU缓存的条数上限
+ACCESS_LOG_RETENTION_DAYS = int(os.environ.get("OJ_ACCESS_LOG_RETENTION_DAYS", "0"))  # 访问日志保留天数，0 表示永久保留
+DATA_LOCK_FILE = "datastore.lock"  # JSON存储的进程锁文件
+
+_process_locks = {}  # 锁文件绝对路径 -> 本进程持有的文件对象，保持打开直到进程退出
+
+
+class ReadWriteLock:   # 读写锁：读者之间并发，写者独占；写者可重入，持有写锁时也可获取读锁（持有读锁时不能再获取写锁）
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None  # 持有写锁的线程
+        self._writer_depth = 0
+        self._waiting_writers = 0  # 有写者等待时新读者让行，避免写者饿死
+        self._local = threading.local()  # 当前线程持有的读锁层数
+    
+    def acquire_read(self):
+        depth = getattr(self._local, "depth", 0)
+        with self._cond:
+            if depth == 0 and self._writer != threading.get_ident():
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.depth = depth + 1
+    
+    def release_read(self):
+        self._local.depth -= 1
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+    
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+    
+    def release_write(self):
+        with self._cond:
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+    
+    @contextlib.contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @contextlib.contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class Transaction:   # 工作单元：暂存事务内的变更记录与撤销信息
     def __init__(self):
+        self.records = []  # 提交时一次性登记的变更记录
+        self.undo = []  # (集合, 键, 变更前的值, 变更后的值)，回滚时倒序恢复
+        self.after_commit = []  # 提交成功后才执行的动作（如写提交日志文件）
+
+
+class DataStore:    # 核心数据管理模块
+    def __init__(self, persistence_mode: str = PERSISTENCE_MODE, flush_interval: int = FLUSH_INTERVAL_MS):
         self.users_file = "users.json"
         self.sessions_file = "sessions.json"
         self.languages_file = "languages.json"
         self.submissions_file = "submissions.json"
-        self.submission_logs_file = "submission_logs.json"
+        self.submission_logs_file = "submission_logs.json"  # 旧版单文件提交日志，只读回退
         self.problem_visibility_file = "problem_visibility.json"
-        self.access_logs_file = "access_logs.json"
+        self.test_data_versions_file = "test_data_versions.json"  # 各题已分配过的最大测试数据版本号
+        self.access_logs_file = "access_logs.json"  # 旧版单文件访问日志，只读回退
+        self.access_log_dir = ACCESS_LOG_DIR
+        self.access_log_retention_days = ACCESS_LOG_RETENTION_DAYS
+        self.submission_log_dir = SUBMISSION_LOG_DIR
+        self.journal_file = JOURNAL_FILE
+        self.lock_file = DATA_LOCK_FILE
+        self.persistence_mode = persistence_mode
+        self.journal_compact_threshold = JOURNAL_COMPACT_THRESHOLD
+        self._cold_data = {}  # 冷集合数据，None 表示尚未加载
+        self._deferred_records = {}  # 冷集合加载前读到的日志记录，加载时再应用
+        self.load_stats = {}  # 集合名 -> 加载耗时与记录数
+        self._log_cache = OrderedDict()  # submission_id -> 提交日志，按最近访问排序
+        self._log_cache_lock = threading.Lock()  # 缓存命中也要调整顺序，单独加锁以免查询占用写锁
+        self.log_cache_size = SUBMISSION_LOG_CACHE_SIZE
+        self._access_log_segments = []  # 已有的访问日志分段日期（升序），即分段的时间范围索引
+        self._access_log_queue = queue.Queue()  # 待写入分段文件的访问日志
+        self._access_log_writer = None
+        self._acquire_process_lock()
         self.users = {}
         self.sessions = {}
         self.languages = {}
         self.submissions = {}
         self.submission_logs = {}
         self.problem_visibility = {}
+        self.test_data_versions = {}
         self.access_logs = {}
+        self._pending = []  # 尚未持久化的提交，每项为一次提交的变更记录列表
+        self._open_transactions = set()  # 尚未提交的事务，落盘时从快照中排除它们的变更
+        self._journal_records = 0  # 日志中自上次快照以来的记录数
+        self._dirty = set()  # 自上次落盘以来发生变更的集合
+        self.last_flush_bytes = 0  # 最近一次落盘写入的字节数
+        self.total_flush_bytes = 0  # 累计写入的字节数
+        self.flush_count = 0
+        self.flush_interval = flush_interval  # 大于0时启用后台合并写入（毫秒）
+        self._lock = ReadWriteLock()  # 保护内存数据与变更登记：查询持读锁，变更持写锁
+        self._io_lock = threading.RLock()  # 保证落盘按顺序进行
+        self._commit_seq = 0  # 已提交的变更序号
+        self._flushed_seq = 0  # 已落盘的变更序号
+        self._failed_seq = 0  # 最近一次落盘失败时尝试写入的变更序号
+        self.last_flush_error = None  # 最近一次落盘失败的原因，成功落盘后清空
+        self._flushed = threading.Condition()
+        self._flush_requested = threading.Event()
+        self._flusher = None
+        self._transaction = contextvars.ContextVar(f"datastore_transaction_{id(self)}", default=None)  # 按线程/协程区分的当前事务
+        self._username_index = {}  # username -> user_id
+        self._submission_index = {field: {} for field in SUBMISSION_INDEX_FIELDS}  # 字段 -> 取值 -> 按提交时间排序的(submit_time, submission_id)
+        self._submission_timeline = []  # 全部提交，按提交时间排序
+        self._user_timeline = []  # (join_time, user_id)，用户列表分页顺序
+        self._access_log_timeline = []  # (access_time, log_id)
         self.load_data()
         self.ensure_admin_exists()
         self.ensure_default_languages()
     
-    def load_data(self):    # 从文件加载数据
-        if os.path.exists(self.users_file):
-            try:
-                with open(self.users_file, 'r', encoding='utf-8') as f:
-                    self.users = json.load(f)
-            except:
-                self.users = {}
-        
-        if os.path.exists(self.sessions_file):
-            try:
-                with open(self.sessions_file, 'r', encoding='utf-8') as f:
-                    self.sessions = json.load(f)
-            except:
-                self.sessions = {}
+    def _acquire_process_lock(self):   # JSON存储的数据都在进程内存中，只允许一个进程使用同一数据目录
+        if fcntl is None:
+            return
+        lock_path = os.path.abspath(self.lock_file)
+        if lock_path in _process_locks:
+            return  # 同一进程内的多个实例共享这把锁
         
-        if os.path.exists(self.languages_file):
-            try:
-                with open(self.languages_file, 'r', encoding='utf-8') as f:
-                    self.languages = json.load(f)
-            except:
-                self.languages = {}
-        
-        if os.path.exists(self.submissions_file):
-            try:
-                with open(self.submissions_file, 'r', encoding='utf-8') as f:
-                    self.submissions = json.load(f)
-            except:
-                self.submissions = {}
-        
-        if os.path.exists(self.submission_logs_file):
-            try:
-                with open(self.submission_logs_file, 'r', encoding='utf-8') as f:
-                    self.submission_logs = json.load(f)
-            except:
-                self.submission_logs = {}
-        
-        if os.path.exists(self.problem_visibility_file):
-            try:
-                with open(self.problem_visibility_file, 'r', encoding='utf-8') as f:
-                    self.problem_visibility = json.load(f)
-            except:
-                self.problem_visibility = {}
+        lock = open(lock_path, 'a')
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            raise RuntimeError("数据目录已被其他进程使用，多进程部署（uvicorn --workers）请设置 OJ_STORAGE_BACKEND=sqlite")
+        _process_locks[lock_path] = lock
+    
+    def _collection_files(self) -> dict:    # 集合名 -> 数据文件
+        return {
+            "users": self.users_file,
+            "sessions": self.sessions_file,
+            "languages": self.languages_file,
+            "submissions": self.submissions_file,
+            "submission_logs": self.submission_logs_file,
+            "problem_visibility": self.problem_visibility_file,
+            "test_data_versions": self.test_data_versions_file,
+            "access_logs": self.access_logs_file
+        }
+    
+    @property
+    def submission_logs(self) -> dict:
+        return self._cold_collection("submission_logs")
+    
+    @submission_logs.setter
+    def submission_logs(self, value: dict):
+        self._cold_data["submission_logs"] = value
+    
+    @property
+    def access_logs(self) -> dict:
+        return self._cold_collection("access_logs")
+    
+    @access_logs.setter
+    def access_logs(self, value: dict):
+        self._cold_data["access_logs"] = value
+    
+    def load_data(self):    # 从文件加载数据（快照 + 日志尾部），冷集合推迟到首次访问
+        started = time.perf_counter()
+        self._dirty.clear()
+        self.load_stats = {}
+        self._deferred_records = {name: [] for name in COLD_COLLECTIONS}
+        for name, file_path in self._collection_files().items():
+            if name in COLD_COLLECTIONS:
+                self._cold_data[name] = None
+                continue
+            setattr(self, name, self._load_collection_file(name, file_path, lazy=False))
         
-        if os.path.exists(self.access_logs_file):
+        # 无论当前模式如何都重放日志，避免切换模式后丢失尚未压缩的变更
+        self._replay_journal()
+        self._rebuild_indexes()
+        self._load_access_log_segments()
+        self.startup_seconds = time.perf_counter() - started
+    
+    def _load_collection_file(self, name: str, file_path: str, lazy: bool) -> dict:   # 读取一个集合文件并记录耗时
+        started = time.perf_counter()
+        data = {}
+        if os.path.exists(file_path):
             try:
-                with open(self.access_logs_file, 'r', encoding='utf-8') as f:
-                    self.access_logs = json.load(f)
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
             except:
-                self.access_logs = {}
+                data = {}
+        self.load_stats[name] = {
+            "seconds": time.perf_counter() - started,
+            "records": len(data),
+            "lazy": lazy
+        }
+        return data
+    
+    def _cold_collection(self, name: str) -> dict:   # 返回冷集合，未加载时先从文件加载
+        data = self._cold_data.get(name)
+        if data is None:
+            with self._lock.write():
+                data = self._cold_data.get(name)
+                if data is None:
+                    data = self._load_cold_collection(name)
+        return data
     
-    def save_data(self):    # 保存数据到文件
-        with open(self.users_file, 'w', encoding='utf-8') as f:
-            json.dump(self.users, f, ensure_ascii=False, indent=2)
+    def _load_cold_collection(self, name: str) -> dict:   # 加载冷集合，补上启动时暂存的日志记录并建立索引（需持有锁）
+        data = self._load_collection_file(name, self._collection_files()[name], lazy=True)
+        self._cold_data[name] = data
+        for record in self._deferred_records.pop(name, []):
+            self._apply_record(record)
+        if name == "access_logs":
+            self._rebuild_access_log_index()
+        return data
+    
+    def preload_cold_collections(self, background: bool = True):   # 预加载全部冷集合，默认在后台线程中进行
+        def load_all():
+            for name in COLD_COLLECTIONS:
+                self._cold_collection(name)
         
-        with open(self.sessions_file, 'w', encoding='utf-8') as f:
-            json.dump(self.sessions, f, ensure_ascii=False, indent=2)
+        if not background:
+            load_all()
+            return
+        threading.Thread(target=load_all, name="datastore-preload", daemon=True).start()
+    
+    def get_load_stats(self) -> dict:   # 获取启动及各集合加载耗时
+        return {
+            "startup_seconds": self.startup_seconds,
+            "collections": {
+                name: {**self.load_stats.get(name, {}), "loaded": name not in COLD_COLLECTIONS or self._cold_data.get(name) is not None}
+                for name in self._collection_files()
+            }
+        }
+    
+    def _rebuild_indexes(self):   # 根据内存数据重建全部索引（未加载的冷集合在加载时建立索引）
+        self._username_index = {user["username"]: user_id for user_id, user in self.users.items()}
+        self._user_timeline = sorted((user.get("join_time", ""), user_id) for user_id, user in self.users.items())
+        if self._cold_data.get("access_logs") is not None:
+            self._rebuild_access_log_index()
         
-        with open(self.languages_file, 'w', encoding='utf-8') as f:
-            json.dump(self.languages, f, ensure_ascii=False, indent=2)
+        self._submission_index = {field: {} for field in SUBMISSION_INDEX_FIELDS}
+        self._submission_timeline = []
+        for submission_id, submission in self.submissions.items():
+            entry = (submission.get("submit_time", ""), submission_id)
+            self._submission_timeline.append(entry)
+            for field in SUBMISSION_INDEX_FIELDS:
+                self._submission_index[field].setdefault(submission.get(field), []).append(entry)
+        self._submission_timeline.sort()
+        for postings in self._submission_index.values():
+            for entries in postings.values():
+                entries.sort()
+    
+    def _rebuild_access_log_index(self):   # 重建访问日志的时间索引
+        self._access_log_timeline = sorted((log.get("access_time", ""), log_id) for log_id, log in self.access_logs.items())
+    
+    def _update_indexes(self, collection: str, key: str, old: Optional[dict], new: Optional[dict]):   # 单条记录变更时增量维护索引
+        if collection == "users":
+            if old and self._username_index.get(old["username"]) == key:
+                del self._username_index[old["username"]]
+            if new:
+                self._username_index[new["username"]] = key
+            self._replace_sorted(
+                self._user_timeline,
+                (old.get("join_time", ""), key) if old else None,
+                (new.get("join_time", ""), key) if new else None
+            )
+        elif collection == "access_logs":
+            self._replace_sorted(
+                self._access_log_timeline,
+                (old.get("access_time", ""), key) if old else None,
+                (new.get("access_time", ""), key) if new else None
+            )
+        elif collection == "submissions":
+            old_entry = (old.get("submit_time", ""), key) if old else None
+            new_entry = (new.get("submit_time", ""), key) if new else None
+            self._replace_sorted(self._submission_timeline, old_entry, new_entry)
+            for field in SUBMISSION_INDEX_FIELDS:
+                if old and new and old_entry == new_entry and old.get(field) == new.get(field):
+                    continue  # 该字段未变化（例如只更新了得分）
+                if old:
+                    entries = self._submission_index[field].get(old.get(field))
+                    if entries is not None:
+                        self._remove_sorted(entries, old_entry)
+                        if not entries:
+                            del self._submission_index[field][old.get(field)]
+                if new:
+                    bisect.insort(self._submission_index[field].setdefault(new.get(field), []), new_entry)
+    
+    def _remove_sorted(self, entries: list, entry: tuple):   # 从有序列表中删除一项
+        i = bisect.bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+    
+    def _replace_sorted(self, entries: list, old_entry: Optional[tuple], new_entry: Optional[tuple]):   # 更新有序列表中的一项
+        if old_entry == new_entry:
+            return
+        if old_entry:
+            self._remove_sorted(entries, old_entry)
+        if new_entry:
+            bisect.insort(entries, new_entry)
+    
+    def _paginate(self, entries: list, page: int, page_size: int, cursor: Optional[str] = None, match=None) -> dict:   # 按页码或游标分页，entries为有序的(排序键, id)
+        if cursor is not None:
+            # 游标模式：从游标位置向后取一页，只访问本页需要的记录，不统计总数
+            start = bisect.bisect_right(entries, decode_cursor(cursor))
+            ids = []
+            last = None
+            for i in range(start, len(entries)):
+                entry = entries[i]
+                if match is None or match(entry[1]):
+                    ids.append(entry[1])
+                    last = entry
+                    if len(ids) >= page_size:
+                        break
+            return {"ids": ids, "next_cursor": encode_cursor(last) if len(ids) >= page_size else None}
         
-        with open(self.submissions_file, 'w', encoding='utf-8') as f:
-            json.dump(self.submissions, f, ensure_ascii=False, indent=2)
+        if match is not None:
+            entries = [entry for entry in entries if match(entry[1])]
+        start = (page - 1) * page_size
+        end = start + page_size
+        page_entries = entries[start:end]
+        return {
+            "total": len(entries),
+            "ids": [entry[1] for entry in page_entries],
+            "next_cursor": encode_cursor(page_entries[-1]) if end < len(entries) and page_entries else None
+        }
+    
+    def _replay_journal(self):   # 在快照基础上按顺序重放日志记录
+        self._journal_records = 0
+        if not os.path.exists(self.journal_file):
+            return
         
-        with open(self.submission_logs_file, 'w', encoding='utf-8') as f:
-            json.dump(self.submission_logs, f, ensure_ascii=False, indent=2)
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # 末尾记录写入不完整（进程中途退出），整次提交丢弃
+                self._apply_record(record)
+                self._journal_records += len(record["records"]) if record["op"] == "batch" else 1
+    
+    def _apply_record(self, record: dict):   # 将一条日志记录应用到内存，batch记录为一次提交的全部变更
+        if record["op"] == "batch":
+            for item in record["records"]:
+                self._apply_record(item)
+            return
+        if record["c"] in COLD_COLLECTIONS and self._cold_data.get(record["c"]) is None:
+            self._deferred_records[record["c"]].append(record)  # 冷集合尚未加载，等加载时再应用
+            return
+        collection = getattr(self, record["c"])
+        self._dirty.add(record["c"])
+        if record["op"] == "set":
+            collection[record["k"]] = record["v"]
+        elif record["op"] == "del":
+            collection.pop(record["k"], None)
+    
+    def _put(self, collection: str, key: str, value: dict):   # 写入一条记录并登记变更（记录写入后不再原地修改）
+        with self._lock.write():
+            records = getattr(self, collection)
+            old = records.get(key)
+            records[key] = value
+            self._update_indexes(collection, key, old, value)
+            self._dirty.add(collection)
+            self._register({"op": "set", "c": collection, "k": key, "v": value}, old)
+    
+    def _remove(self, collection: str, key: str):   # 删除一条记录并登记变更
+        with self._lock.write():
+            old = getattr(self, collection).pop(key, None)
+            self._update_indexes(collection, key, old, None)
+            self._dirty.add(collection)
+            self._register({"op": "del", "c": collection, "k": key}, old)
+    
+    def _register(self, record: dict, old: Optional[dict]):   # 登记变更记录，事务内先暂存在事务中（需持有写锁）
+        transaction = self._transaction.get()
+        if transaction is None:
+            self._pending.append([record])
+            return
+        self._open_transactions.add(transaction)
+        transaction.records.append(record)
+        transaction.undo.append((record["c"], record["k"], old, record.get("v")))
+    
+    @contextlib.contextmanager
+    def transaction(self):   # 工作单元：块内的全部变更合并为一次提交，抛出异常时回滚；嵌套时并入外层事务
+        if self._transaction.get() is not None:
+            yield self._transaction.get()
+            return
         
-        with open(self.problem_visibility_file, 'w', encoding='utf-8') as f:
-            json.dump(self.problem_visibility, f, ensure_ascii=False, indent=2)
+        transaction = Transaction()
+        token = self._transaction.set(transaction)
+        try:
+            yield transaction
+        except BaseException:
+            self._transaction.reset(token)
+            self._rollback(transaction)
+            raise
+        self._transaction.reset(token)
         
-        with open(self.access_logs_file, 'w', encoding='utf-8') as f:
-            json.dump(self.access_logs, f, ensure_ascii=False, indent=2)
+        if transaction.records:
+            with self._lock.write():
+                self._open_transactions.discard(transaction)
+                self._dirty.update(record["c"] for record in transaction.records)  # 事务期间的落盘排除了这些变更，提交后需要重写
+                self._pending.append(transaction.records)  # 整批登记，日志中写为一条记录，不会只重放一部分
+            self._commit()
+        for action in transaction.after_commit:
+            action()
+    
+    def _rollback(self, transaction: Transaction):   # 倒序恢复事务修改过的记录（已被其他请求再次修改的记录保持不变）
+        with self._lock.write():
+            for collection, key, old, new in reversed(transaction.undo):
+                records = getattr(self, collection)
+                current = records.get(key)
+                if current is not new:
+                    continue
+                if old is None:
+                    records.pop(key, None)
+                else:
+                    records[key] = old
+                self._update_indexes(collection, key, current, old)
+            self._open_transactions.discard(transaction)  # 落盘快照从未包含该事务的变更，无需重写
+    
+    def _committed_snapshot(self, name: str) -> dict:   # 集合的已提交视图：撤销未提交事务的变更（需持有写锁）
+        snapshot = dict(getattr(self, name))
+        for transaction in self._open_transactions:
+            for collection, key, old, new in reversed(transaction.undo):
+                if collection != name or snapshot.get(key) is not new:
+                    continue
+                if old is None:
+                    snapshot.pop(key, None)
+                else:
+                    snapshot[key] = old
+        return snapshot
+    
+    def _commit(self):   # 持久化已登记的变更（事务内推迟到事务结束时）
+        if self._transaction.get() is not None:
+            return
+        with self._lock.write():
+            self._commit_seq += 1
+        if self.flush_interval > 0:
+            self._ensure_flusher()
+            self._flush_requested.set()  # 交给后台线程合并写入
+        else:
+            self._durable_write()
+    
+    def _durable_write(self):   # 一次持久化：journal模式追加日志，snapshot模式重写脏集合
+        with self._io_lock:
+            with self._lock.read():
+                seq = self._commit_seq
+            try:
+                if self.persistence_mode == "journal":
+                    self._append_journal()
+                else:
+                    self.flush()
+            except Exception as e:
+                with self._flushed:   # 唤醒等待者，由它们报告失败而不是一直等下去
+                    self._failed_seq = max(self._failed_seq, seq)
+                    self.last_flush_error = str(e)
+                    self._flushed.notify_all()
+                raise
+        with self._flushed:
+            self._flushed_seq = max(self._flushed_seq, seq)
+            self.last_flush_error = None
+            self._flushed.notify_all()
+    
+    def _ensure_flusher(self):   # 按需启动后台落盘线程
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flusher_loop, name="datastore-flusher", daemon=True)
+            self._flusher.start()
+    
+    def _flusher_loop(self):   # 等待变更，窗口期内的变更合并为一次写入
+        while True:
+            self._flush_requested.wait()
+            time.sleep(self.flush_interval / 1000)
+            self._flush_requested.clear()
+            try:
+                self._durable_write()
+            except Exception as e:
+                print(f"数据落盘失败: {e}")  # 变更仍保留在待写入状态，下次提交时重试
+    
+    def wait_for_flush(self, timeout: Optional[float] = None) -> bool:   # 等待此前的变更全部落盘，落盘失败或超时返回False
+        with self._lock.read():
+            target = self._commit_seq
+        with self._flushed:
+            self._flushed.wait_for(lambda: self._flushed_seq >= target or self._failed_seq >= target, timeout)
+            return self._flushed_seq >= target
+    
+    async def flush_barrier(self, timeout: Optional[float] = None) -> bool:   # 异步版本，供需要持久化保证的请求使用
+        if self._flushed_seq >= self._commit_seq:
+            return True
+        return await asyncio.get_running_loop().run_in_executor(None, self.wait_for_flush, timeout)
+    
+    def _append_journal(self):   # 追加写日志，单次变更的写入量与数据总量无关
+        with self._io_lock:
+            with self._lock.write():
+                commits, self._pending = self._pending, []
+            if not commits:
+                return
+            
+            # 每次提交写为一行，多条变更合并为batch记录；写入不完整的行在重放时整体丢弃
+            lines = "".join(
+                json.dumps(records[0] if len(records) == 1 else {"op": "batch", "records": records}, ensure_ascii=False) + "\n"
+                for records in commits
+            ).encode('utf-8')
+            with open(self.journal_file, 'ab') as f:
+                position = f.tell()
+                try:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                except Exception:
+                    f.truncate(position)  # 去掉写了一半的行，以免之后追加的记录在重放时被跳过
+                    with self._lock.write():
+                        self._pending[:0] = commits  # 放回待写入队列，下次落盘时重试
+                    raise
+            self._record_flush(len(lines))
+            
+            self._journal_records += sum(len(records) for records in commits)
+            if self._journal_records >= self.journal_compact_threshold:
+                self.compact_journal()
+    
+    def compact_journal(self):   # 将当前状态写成快照并清空日志
+        self.flush()
+    
+    def save_data(self):    # 保存全量快照到文件（未加载的冷集合文件本身就是最新的，无需重写）
+        with self._lock.write():
+            self._dirty.update(name for name in self._collection_files() if name not in COLD_COLLECTIONS or self._cold_data.get(name) is not None)
+        self.flush()
+    
+    def flush(self):    # 只重写发生变更的集合文件
+        with self._io_lock:
+            files = self._collection_files()
+            with self._lock.write():
+                for name in COLD_COLLECTIONS:
+                    if self._deferred_records.get(name):
+                        self._cold_collection(name)  # 日志即将删除，暂存的记录必须先写入快照
+                # 记录只会被整体替换，浅拷贝即为一致的快照，序列化可以在锁外进行；未提交事务的变更不落盘
+                dirty = sorted(self._dirty)
+                snapshot = {files[name]: self._committed_snapshot(name) for name in dirty}
+                self._dirty.clear()
+                pending, self._pending = self._pending, []  # 快照已包含全部变更，日志可以丢弃
+            
+            written = 0
+            try:
+                for file_path, data in snapshot.items():
+                    written += self._write_json_atomic(file_path, data)
+            except Exception:
+                with self._lock.write():   # 恢复待写入状态，下次落盘时重试
+                    self._dirty.update(dirty)
+                    self._pending[:0] = pending
+                raise
+            self._record_flush(written)
+            
+            self._journal_records = 0
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+    
+    def _write_json_atomic(self, file_path: str, data) -> int:
+        return write_json_atomic(file_path, data)
+    
+    def _record_flush(self, written: int):   # 统计落盘写入量
+        self.last_flush_bytes = written
+        self.total_flush_bytes += written
+        self.flush_count += 1
+    
+    def get_flush_stats(self) -> dict:   # 获取落盘统计
+        return {
+            "flush_count": self.flush_count,
+            "last_flush_bytes": self.last_flush_bytes,
+            "total_flush_bytes": self.total_flush_bytes,
+            "last_flush_error": self.last_flush_error,
+            "dirty_collections": sorted(self._dirty)
+        }
     
     def ensure_admin_exists(self):   # 确保管理员账户存在
-        admin_exists = any(user.get("username") == "admin" for user in self.users.values())
-        if not admin_exists:
+        if "admin" not in self._username_index:
             admin_id = str(uuid.uuid4())    # 随机且唯一
             password_hash = bcrypt.hashpw("admintestpassword".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
             now = datetime.now().strftime("%Y-%m-%d")
             
-            self.users[admin_id] = {
+            self._put("users", admin_id, {
                 "user_id": admin_id,
                 "username": "admin",
                 "password_hash": password_hash,
@@ -251,23 +822,23 @@ class DataStore:    # 核心数据管理模块
                 "join_time": now,
                 "submit_count": 0,
                 "resolve_count": 0
-            }
-            self.save_data()
+            })
+            self._commit()
     
     def ensure_default_languages(self):    # 确保默认语言存在
         if "python" not in self.languages:
-            self.languages["python"] = {
+            self._put("languages", "python", {
                 "name": "python",
                 "file_ext": ".py",
                 "compile_cmd": "",
                 "run_cmd": "python main.py",
                 "time_limit": 3.0,
                 "memory_limit": 128
-            }
-            self.save_data()
+            })
+            self._commit()
     
     def create_user(self, username: str, password: str, role: str = "user") -> str:    # 创建新用户
-        if any(user.get("username") == username for user in self.users.values()):
+        if username in self._username_index:
             raise ValueError("用户名已存在")
         
         if len(username) < 3 or len(username) > 40:
@@ -280,36 +851,35 @@ class DataStore:    # 核心数据管理模块
         password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
         now = datetime.now().strftime("%Y-%m-%d")
         
-        self.users[user_id] = {
-            "user_id": user_id,
-            "username": username,
-            "password_hash": password_hash,
-            "role": role,
-            "join_time": now,
-            "submit_count": 0,
-            "resolve_count": 0
-        }
-        self.save_data()
+        with self._lock.write():
+            if username in self._username_index:   # 哈希计算期间可能有同名用户注册
+                raise ValueError("用户名已存在")
+            self._put("users", user_id, {
+                "user_id": user_id,
+                "username": username,
+                "password_hash": password_hash,
+                "role": role,
+                "join_time": now,
+                "submit_count": 0,
+                "resolve_count": 0
+            })
+        self._commit()
         return user_id
     
     def authenticate_user(self, username: str, password: str) -> Optional[dict]:    # 验证用户登录
-        for user in self.users.values():
-            if user["username"] == username:
-                if bcrypt.checkpw(password.encode('utf-8'), user["password_hash"].encode('utf-8')):
-                    if user["role"] == "banned":
-                        return None  # 被禁用的用户无法登录
-                    return user
-                break
+        user = self.get_user_by_username(username)
+        if user and bcrypt.checkpw(password.encode('utf-8'), user["password_hash"].encode('utf-8')):
+            if user["role"] == "banned":
+                return None  # 被禁用的用户无法登录
+            return user
         return None
     
     def get_user_by_id(self, user_id: str) -> Optional[dict]:    # 根据ID获取用户
         return self.users.get(user_id)
     
     def get_user_by_username(self, username: str) -> Optional[dict]:    # 根据用户名获取用户
-        for user in self.users.values():
-            if user["username"] == username:
-                return user
-        return None
+        user_id = self._username_index.get(username)
+        return self.users.get(user_id) if user_id else None
     
     def update_user_role(self, user_id: str, new_role: str):    # 更新用户角色
         if user_id not in self.users:
@@ -319,29 +889,50 @@ class DataStore:    # 核心数据管理模块
         if new_role not in valid_roles:
             raise ValueError("role无效")
         
-        self.users[user_id]["role"] = new_role
-        self.save_data()
+        with self._lock.write():
+            self._put("users", user_id, {**self.users[user_id], "role": new_role})
+        self._commit()
     
-    def get_all_users(self, page: int = 1, page_size: int = 10) -> dict:    # 获取用户列表
-        all_users = list(self.users.values())
-        total = len(all_users)
-        
-        start = (page - 1) * page_size
-        end = start + page_size
-        users_page = all_users[start:end]
-        
-        return {
-            "total": total,
-            "users": users_page
-        }
+    def get_all_users(self, page: int = 1, page_size: int = 10, cursor: Optional[str] = None) -> dict:    # 获取用户列表
+        with self._lock.read():
+            result = self._paginate(self._user_timeline, page, page_size, cursor)
+            result["users"] = [self.users[user_id] for user_id in result.pop("ids")]
+        return result
+    
+    def list_users(self) -> List[dict]:    # 获取全部用户（导出用）
+        return list(self.users.values())
+    
+    def import_users(self, users: List[dict]):    # 批量导入用户，同名用户合并角色和计数
+        for user_data in users:
+            existing_user = self.get_user_by_username(user_data["username"])
+            if not existing_user:
+                user_id = str(uuid.uuid4())
+                now = datetime.now().isoformat()
+                self._put("users", user_id, {
+                    "user_id": user_id,
+                    "username": user_data["username"],
+                    "password_hash": user_data["password"],
+                    "role": user_data.get("role", "user"),
+                    "join_time": user_data.get("join_time", now),
+                    "submit_count": user_data.get("submit_count", 0),
+                    "resolve_count": user_data.get("resolve_count", 0)
+                })
+            else:
+                self._put("users", existing_user["user_id"], {
+                    **existing_user,
+                    "role": user_data.get("role", "user"),
+                    "submit_count": user_data.get("submit_count", 0),
+                    "resolve_count": user_data.get("resolve_count", 0)
+                })
+        self._commit()
     
     def create_session(self, user_id: str) -> str:  # 创建会话
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
+        self._put("sessions", session_id, {
             "user_id": user_id,
             "created_at": datetime.now().isoformat()
-        }
-        self.save_data()
+        })
+        self._commit()
         return session_id
     
     def get_session(self, session_id: str) -> Optional[dict]:   # 获取会话信息
@@ -349,16 +940,16 @@ class DataStore:    # 核心数据管理模块
     
     def delete_session(self, session_id: str):  # 删除会话
         if session_id in self.sessions:
-            del self.sessions[session_id]
-            self.save_data()
+            self._remove("sessions", session_id)
+            self._commit()
     
     def register_language(self, language_data: dict):   # 注册新语言
         name = language_data["name"]
         if name in self.languages:
             raise ValueError("语言已存在")
         
-        self.languages[name] = language_data
-        self.save_data()
+        self._put("languages", name, language_data)
+        self._commit()
     
     def get_languages(self) -> dict:   # 获取所有语言
         return {"name": list(self.languages.keys())}
@@ -370,7 +961,7 @@ class DataStore:    # 核心数据管理模块
         submission_id = str(uuid.uuid4())
         now = datetime.now().isoformat()
         
-        self.submissions[submission_id] = {
+        self._put("submissions", submission_id, {
             "submission_id": submission_id,
             "user_id": user_id,
             "problem_id": problem_id,
@@ -380,105 +971,338 @@ class DataStore:    # 核心数据管理模块
             "score": 0,
             "counts": 0,
             "submit_time": now
-        }
-        
+        })
         
-        if user_id in self.users:
-            self.users[user_id]["submit_count"] += 1
+        with self._lock.write():
+            user = self.users.get(user_id)
+            if user:
+                self._put("users", user_id, {**user, "submit_count": user["submit_count"] + 1})
         
-        self.save_data()
+        self._commit()
         return submission_id
     
     def get_submission(self, submission_id: str) -> Optional[dict]:   # 获取提交信息
         return self.submissions.get(submission_id)
     
     def update_submission(self, submission_id: str, **kwargs):   # 更新提交信息
-        if submission_id in self.submissions:
-            self.submissions[submission_id].update(kwargs)
-            self.save_data()
+        with self._lock.write():
+            submission = self.submissions.get(submission_id)
+            if not submission:
+                return
+            self._put("submissions", submission_id, {**submission, **kwargs})
+        self._commit()
     
-    def get_submissions(self, user_id: Optional[str] = None, problem_id: Optional[str] = None, judge_status: Optional[str] = None, page: int = 1, page_size: int = 10) -> dict:   # 获取提交列表
-        all_submissions = list(self.submissions.values())
-        
-        # 过滤
-        if user_id:
-            all_submissions = [s for s in all_submissions if s["user_id"] == user_id]
-        if problem_id:
-            all_submissions = [s for s in all_submissions if s["problem_id"] == problem_id]
-        if judge_status:
-            all_submissions = [s for s in all_submissions if s["status"] == judge_status]
-        
-        total = len(all_submissions)
-        start = (page - 1) * page_size
-        end = start + page_size
-        submissions_page = all_submissions[start:end]
+    def _submission_postings(self, user_id: Optional[str], problem_id: Optional[str], judge_status: Optional[str]) -> tuple:   # 选出最短的倒排列表，其余条件逐条核对（求交集）
+        filters = {field: value for field, value in (("user_id", user_id), ("problem_id", problem_id), ("status", judge_status)) if value}
+        if not filters:
+            return self._submission_timeline, []
         
-        return {
-            "total": total,
-            "submissions": submissions_page
-        }
+        postings = {field: self._submission_index[field].get(value, []) for field, value in filters.items()}
+        driver = min(postings, key=lambda field: len(postings[field]))
+        others = [(field, value) for field, value in filters.items() if field != driver]
+        return postings[driver], others
     
-    def save_submission_log(self, submission_id: str, log_data: dict):   # 保存提交日志
-        self.submission_logs[submission_id] = log_data
-        self.save_data()
+    def _submission_matches(self, submission_id: str, others: list) -> bool:
+        submission = self.submissions[submission_id]
+        return all(submission.get(field) == value for field, value in others)
+    
+    def get_submissions(self, user_id: Optional[str] = None, problem_id: Optional[str] = None, judge_status: Optional[str] = None, page: int = 1, page_size: int = 10, cursor: Optional[str] = None) -> dict:   # 获取提交列表（按提交时间排序）
+        with self._lock.read():
+            entries, others = self._submission_postings(user_id, problem_id, judge_status)
+            match = (lambda submission_id: self._submission_matches(submission_id, others)) if others else None
+            result = self._paginate(entries, page, page_size, cursor, match)
+            result["submissions"] = [self.submissions[submission_id] for submission_id in result.pop("ids")]
+        return result
+    
+    def get_latest_submissions(self, user_id: Optional[str] = None, problem_id: Optional[str] = None, judge_status: Optional[str] = None, limit: int = 10) -> List[dict]:   # 获取最近的提交，从索引尾部倒序查找，找满即停
+        latest = []
+        with self._lock.read():
+            entries, others = self._submission_postings(user_id, problem_id, judge_status)
+            for _, submission_id in reversed(entries):
+                if self._submission_matches(submission_id, others):
+                    latest.append(self.submissions[submission_id])
+                    if len(latest) >= limit:
+                        break
+        return latest
+    
+    def list_submissions(self) -> List[dict]:   # 获取全部提交（导出用）
+        return list(self.submissions.values())
+    
+    def import_submissions(self, submissions: List[dict]):   # 批量导入提交及评测详情
+        for submission_data in submissions:
+            submission_id = submission_data["submission_id"]
+            submit_time = submission_data.get("submit_time", "2024-01-01T00:00:00")
+            self._put("submissions", submission_id, {
+                "submission_id": submission_id,
+                "user_id": submission_data["user_id"],
+                "problem_id": submission_data["problem_id"],
+                "language": submission_data["language"],
+                "code": submission_data["code"],
+                "status": "completed",
+                "score": submission_data.get("score", 0),
+                "counts": submission_data.get("counts", 0),
+                "submit_time": submit_time
+            })
+            if "details" in submission_data and isinstance(submission_data["details"], list):
+                test_cases = []
+                for detail in submission_data["details"]:
+                    test_cases.append({
+                        "test_case_id": detail.get("id", 1),
+                        "status": detail.get("result", "UNKNOWN"),
+                        "time_used": detail.get("time", 0),
+                        "memory_used": detail.get("memory", 0),
+                        "input_data": "",
+                        "expected_output": "",
+                        "actual_output": ""
+                    })
+                self.save_submission_log(submission_id, {
+                    "submission_id": submission_id,
+                    "user_id": submission_data["user_id"],
+                    "problem_id": submission_data["problem_id"],
+                    "language": submission_data["language"],
+                    "code": submission_data["code"],
+                    "score": submission_data.get("score", 0),
+                    "counts": submission_data.get("counts", 0),
+                    "test_cases": test_cases,
+                    "submit_time": submit_time
+                })
+        self._commit()
+    
+    def _submission_log_path(self, submission_id: str) -> str:   # 提交日志文件路径，按文件名前两位分目录
+        name = submission_id if re.fullmatch(r"[A-Za-z0-9_-]+", submission_id) else hashlib.sha1(submission_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.submission_log_dir, name[:2], f"{name}.json")
+    
+    def _cache_submission_log(self, submission_id: str, log_data: dict):   # 放入LRU缓存，超出上限时淘汰最久未访问的日志
+        with self._log_cache_lock:
+            self._log_cache[submission_id] = log_data
+            self._log_cache.move_to_end(submission_id)
+            while len(self._log_cache) > self.log_cache_size:
+                self._log_cache.popitem(last=False)
+    
+    def save_submission_log(self, submission_id: str, log_data: dict):   # 保存提交日志（单独写一个文件，写入量与历史日志总量无关）
+        transaction = self._transaction.get()
+        if transaction is not None:
+            transaction.after_commit.append(lambda: self.save_submission_log(submission_id, log_data))  # 事务提交后再写入
+            return
+        
+        file_path = self._submission_log_path(submission_id)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self._write_json_atomic(file_path, log_data)
+        self._cache_submission_log(submission_id, log_data)
     
-    def get_submission_log(self, submission_id: str) -> Optional[dict]:   # 获取提交日志
-        return self.submission_logs.get(submission_id)
+    def get_submission_log(self, submission_id: str) -> Optional[dict]:   # 获取提交日志，依次查找缓存、日志文件、旧版 submission_logs.json
+        with self._log_cache_lock:
+            if submission_id in self._log_cache:
+                self._log_cache.move_to_end(submission_id)
+                return self._log_cache[submission_id]
+        
+        file_path = self._submission_log_path(submission_id)
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                log_data = json.load(f)
+        else:
+            log_data = self.submission_logs.get(submission_id)
+            if log_data is None:
+                return None
+        self._cache_submission_log(submission_id, log_data)
+        return log_data
     
     def set_problem_visibility(self, problem_id: str, public_cases: bool):   # 设置题目日志可见性
-        self.problem_visibility[problem_id] = {"public_cases": public_cases}
-        self.save_data()
+        self._put("problem_visibility", problem_id, {"public_cases": public_cases})
+        self._commit()
     
     def get_problem_visibility(self, problem_id: str) -> dict:   # 获取题目日志可见性
         return self.problem_visibility.get(problem_id, {"public_cases": False})
     
-    def log_access(self, user_id: str, username: str, action: str, resource_id: str, resource_type: str, ip_address: str = ""):   # 记录访问日志
-        log_id = str(uuid.uuid4())
-        now = datetime.now().isoformat()
-        
-        self.access_logs[log_id] = {
-            "log_id": log_id,
+    def next_test_data_version(self, problem_id: str, current_version: int, changed: bool) -> int:   # 分配测试数据版本号：数据变化时取当前版本与已分配版本的较大者加一；删除题目和重置系统后计数器仍保留
+        with self._lock.write():
+            issued = self.test_data_versions.get(problem_id, {}).get("version", 0)
+            version = max(current_version, issued) + 1 if changed else current_version
+            if version <= issued:
+                return version
+            self._put("test_data_versions", problem_id, {"version": version})
+        self._commit()
+        return version
+    
+    def _load_access_log_segments(self):   # 扫描访问日志分段并按保留策略清理过期分段
+        segments = []
+        if os.path.isdir(self.access_log_dir):
+            segments = sorted(name[:-len(".ndjson")] for name in os.listdir(self.access_log_dir) if name.endswith(".ndjson"))
+        self._access_log_segments = segments
+        self.apply_access_log_retention()
+    
+    def _access_log_segment_path(self, day: str) -> str:
+        return os.path.join(self.access_log_dir, f"{day}.ndjson")
+    
+    def apply_access_log_retention(self):   # 删除超出保留天数的访问日志分段
+        if self.access_log_retention_days <= 0:
+            return
+        oldest = (datetime.now() - timedelta(days=self.access_log_retention_days)).strftime("%Y-%m-%d")
+        with self._lock.write():
+            expired = [day for day in self._access_log_segments if day < oldest]
+            self._access_log_segments = [day for day in self._access_log_segments if day >= oldest]
+        for day in expired:
+            try:
+                os.remove(self._access_log_segment_path(day))
+            except FileNotFoundError:
+                pass
+    
+    def log_access(self, user_id: str, username: str, action: str, resource_id: str, resource_type: str, ip_address: str = ""):   # 记录访问日志（只入队，由后台线程追加写入，不阻塞请求）
+        self._access_log_queue.put({
+            "log_id": str(uuid.uuid4()),
             "user_id": user_id,
             "username": username,
             "action": action,
             "resource_id": resource_id,
             "resource_type": resource_type,
-            "access_time": now,
+            "access_time": datetime.now().isoformat(),
             "ip_address": ip_address
-        }
-        self.save_data()
+        })
+        self._ensure_access_log_writer()
     
-    def get_access_logs(self, user_id: Optional[str] = None, problem_id: Optional[str] = None, page: int = 1, page_size: int = 10) -> dict:   # 获取访问日志
-        all_logs = list(self.access_logs.values())
+    def _ensure_access_log_writer(self):   # 按需启动访问日志写入线程
+        if self._access_log_writer is None or not self._access_log_writer.is_alive():
+            self._access_log_writer = threading.Thread(target=self._access_log_writer_loop, name="access-log-writer", daemon=True)
+            self._access_log_writer.start()
+    
+    def _access_log_writer_loop(self):   # 取出队列中积压的全部日志，批量追加到当天的分段
+        while True:
+            batch = [self._access_log_queue.get()]
+            while True:
+                try:
+                    batch.append(self._access_log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._append_access_logs(batch)
+            except Exception as e:
+                print(f"访问日志写入失败: {e}")
+            finally:
+                for _ in batch:
+                    self._access_log_queue.task_done()
+    
+    def _append_access_logs(self, logs: List[dict]):   # 按日期分组追加写入NDJSON分段
+        days = {}
+        for log in logs:
+            days.setdefault(log["access_time"][:10], []).append(log)
         
-        # 过滤
-        if user_id:
-            all_logs = [log for log in all_logs if log["user_id"] == user_id]
-        if problem_id:
-            all_logs = [log for log in all_logs if log["resource_type"] == "problem" and log["resource_id"] == problem_id]
+        os.makedirs(self.access_log_dir, exist_ok=True)
+        for day, day_logs in days.items():
+            lines = "".join(json.dumps(log, ensure_ascii=False) + "\n" for log in day_logs).encode('utf-8')
+            with open(self._access_log_segment_path(day), 'ab') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock.write():
+                if day not in self._access_log_segments:
+                    bisect.insort(self._access_log_segments, day)
+                    new_segment = True
+                else:
+                    new_segment = False
+            if new_segment:
+                self.apply_access_log_retention()
+    
+    def flush_access_logs(self):   # 等待队列中的访问日志全部写入分段
+        self._access_log_queue.join()
+    
+    def _read_access_log_segment(self, day: str) -> List[dict]:   # 读取一个分段，跳过写入不完整的行
+        logs = []
+        try:
+            with open(self._access_log_segment_path(day), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        logs.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return logs
+    
+    def get_access_logs(self, user_id: Optional[str] = None, problem_id: Optional[str] = None, page: int = 1, page_size: int = 10, cursor: Optional[str] = None,
+                        start_time: Optional[str] = None, end_time: Optional[str] = None) -> dict:   # 获取访问日志，只读取时间范围内的分段
+        def match(log: dict) -> bool:
+            if user_id and log["user_id"] != user_id:
+                return False
+            if problem_id and not (log["resource_type"] == "problem" and log["resource_id"] == problem_id):
+                return False
+            if start_time and log["access_time"] < start_time:
+                return False
+            if end_time and log["access_time"] > end_time:
+                return False
+            return True
         
-        total = len(all_logs)
-        start = (page - 1) * page_size
-        end = start + page_size
-        logs_page = all_logs[start:end]
+        first_day = start_time[:10] if start_time else ""
+        after = decode_cursor(cursor) if cursor else None
+        if after:
+            first_day = max(first_day, after[0][:10])  # 游标之前的分段不必读取
+        last_day = end_time[:10] if end_time else None
         
-        return {
-            "total": total,
-            "logs": logs_page
-        }
+        self.flush_access_logs()
+        self._cold_collection("access_logs")  # 加载需要写锁，须在获取读锁之前完成
+        with self._lock.read():
+            legacy = self.access_logs
+            timeline = self._access_log_timeline
+            if not legacy:
+                legacy_logs = {}  # 旧版单文件日志为空（或已迁移）时不再扫描
+            elif after:
+                # 游标模式最多只需要游标之后的page_size条旧版日志
+                legacy_logs = {}
+                for i in range(bisect.bisect_right(timeline, after), len(timeline)):
+                    log_id = timeline[i][1]
+                    if match(legacy[log_id]):
+                        legacy_logs[log_id] = legacy[log_id]
+                        if len(legacy_logs) >= page_size:
+                            break
+            else:
+                legacy_logs = {log_id: legacy[log_id] for _, log_id in timeline if match(legacy[log_id])}
+            days = [day for day in self._access_log_segments if day >= first_day and (last_day is None or day <= last_day)]
+        
+        logs = dict(legacy_logs)
+        found = 0
+        for day in days:
+            if after and found >= page_size:
+                break  # 分段按日期有序，后面分段中的日志都在已取到的日志之后
+            for log in self._read_access_log_segment(day):
+                if match(log) and (not after or (log["access_time"], log["log_id"]) > after):
+                    logs[log["log_id"]] = log
+                    found += 1
+        
+        entries = sorted((log["access_time"], log_id) for log_id, log in logs.items())
+        result = self._paginate(entries, page, page_size, cursor)
+        result["logs"] = [logs[log_id] for log_id in result.pop("ids")]
+        return result
     
     def reset_system(self):   # 重置系统
-        self.users = {}
-        self.sessions = {}
-        self.languages = {}
-        self.submissions = {}
-        self.submission_logs = {}
-        self.problem_visibility = {}
-        self.access_logs = {}
+        with self._lock.write():
+            self.users = {}
+            self.sessions = {}
+            self.languages = {}
+            self.submissions = {}
+            self.submission_logs = {}
+            self.problem_visibility = {}
+            self.access_logs = {}
+            self._deferred_records = {name: [] for name in COLD_COLLECTIONS}
+            self._rebuild_indexes()
+            with self._log_cache_lock:
+                self._log_cache.clear()
+            if os.path.exists(self.submission_log_dir):
+                shutil.rmtree(self.submission_log_dir)
+        self.flush_access_logs()
+        with self._lock.write():
+            self._access_log_segments = []
+            if os.path.exists(self.access_log_dir):
+                shutil.rmtree(self.access_log_dir)
         self.save_data()
         self.ensure_admin_exists()
         self.ensure_default_languages()
 
 
+def create_data_store():   # 根据配置选择存储后端
+    if STORAGE_BACKEND == "sqlite":
+        from .sqlite_store import SQLiteDataStore
+        return SQLiteDataStore()
+    return DataStore()
+
+
 # 全局数据存储实例
-data_store = DataStore() 
\ No newline at end of file
+data_store = create_data_store() 
\ No newline at end of file
@@ -1,7 +1,23 @@
 from fastapi import APIRouter, Request
 from ..models import data_store
 from ..auth import require_admin
+from .problems import get_problem_cache_stats
 
 router = APIRouter(prefix="/api", tags=["admin"])
 
-# 重置功能已移至 import_export 路由 
\ No newline at end of file
+# 重置功能已移至 import_export 路由 
+
+
+@router.get("/admin/storage/stats", summary="获取存储统计")
+async def get_storage_stats(request: Request):   # 启动加载耗时与落盘统计，供监控使用
+    require_admin(request)
+    
+    return {
+        "code": 200,
+        "msg": "success",
+        "data": {
+            "load": data_store.get_load_stats(),
+            "flush": data_store.get_flush_stats(),
+            "problem_cache": get_problem_cache_stats()
+        }
+    }
@@ -1,16 +1,29 @@
+import asyncio
 import json
 import os
+import posixpath
+import re
 import shutil
-import uuid
-from datetime import datetime
+import tempfile
+import zipfile
 from typing import Dict, Any, List
-from fastapi import APIRouter, HTTPException, UploadFile, File, Request
-from ..models import data_store, Problem
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Query
+from ..models import data_store, Problem, TestCase
 from ..auth import require_admin, require_auth
+from .problems import (
+    invalidate_problem_cache, remove_problem_summary, read_testcase_text,
+    get_problem_file_path, get_testdata_dir, remove_testdata, save_problem, problem_manifest_batch,
+    check_problem_id, is_valid_problem_id
+)
 
 router = APIRouter(prefix="/api", tags=["import_export"])
 
 PROBLEMS_DIR = "problems"
+PACKAGE_CHUNK_SIZE = 1024 * 1024  # 数据包上传和解压时每次读写的字节数
+PACKAGE_MAX_SIZE = int(os.environ.get("OJ_PACKAGE_MAX_SIZE", str(1024 * 1024 * 1024)))  # 数据包及解压后测试数据的大小上限
+PACKAGE_STATEMENT_FILE = "problem.json"  # 数据包中的题目描述文件
+PACKAGE_STATEMENT_MAX_SIZE = 1024 * 1024
+PACKAGE_TESTDATA_PATTERN = re.compile(r"^(\d+)\.(in|out)$")  # 数据包中的测试数据文件，从1开始编号
 
 
 @router.post("/reset/", summary="重置系统")
@@ -24,6 +37,8 @@ async def reset_system(request: Request):   # 重置系统（仅管理员）
     if os.path.exists(PROBLEMS_DIR):
         shutil.rmtree(PROBLEMS_DIR)
     os.makedirs(PROBLEMS_DIR, exist_ok=True)
+    invalidate_problem_cache()
+    remove_problem_summary()
     
     return {"code": 200, "msg": "system reset successfully", "data": None}
 
@@ -35,7 +50,7 @@ async def export_data(request: Request):   # 导出系统数据（仅管理员
     try:
         # 导出用户数据
         users_data = []
-        for user in data_store.users.values():
+        for user in data_store.list_users():
             users_data.append({
                 "user_id": user["user_id"],
                 "username": user["username"],
@@ -57,13 +72,20 @@ async def export_data(request: Request):   # 导出系统数据（仅管理员
                             problem_data = json.load(f)
                             if "test_cases" in problem_data:  # 兼容旧格式
                                 problem_data["testcases"] = problem_data.pop("test_cases")
+                            testcases = []
+                            for case in problem_data.get("testcases", []):
+                                testcase = TestCase(**case)
+                                if testcase.input_file is not None:  # 外部测试数据导出时内联，保证导出文件可以直接导入
+                                    case = {"input": read_testcase_text(problem_id, testcase, "input"), "output": read_testcase_text(problem_id, testcase, "output")}
+                                testcases.append(case)
+                            problem_data["testcases"] = testcases
                             problems_data.append(problem_data)
                     except Exception:
                         continue  # 跳过有问题的文件
         
         # 导出提交数据
         submissions_data = []
-        for submission in data_store.submissions.values():
+        for submission in data_store.list_submissions():
             submission_export = {
                 "submission_id": submission["submission_id"],
                 "user_id": submission["user_id"],
@@ -75,8 +97,8 @@ async def export_data(request: Request):   # 导出系统数据（仅管理员
             }
             
             # 添加评测详情
-            if submission["submission_id"] in data_store.submission_logs:
-                log = data_store.submission_logs[submission["submission_id"]]
+            log = data_store.get_submission_log(submission["submission_id"])
+            if log:
                 details = []
                 for i, test_case in enumerate(log.get("test_cases", [])):
                     details.append({
@@ -129,7 +151,8 @@ async def import_data(request: Request, file: UploadFile = File(...)):  # 导入
                 status_code=400,
                 detail={"code": 400, "msg": "Invalid data format"}
             )
-        # 导入用户数据
+        # 先校验并构造全部用户、题目和提交，任一项无效都在写入任何文件之前返回400
+        users = []
         if "users" in data and isinstance(data["users"], list):
             for user_data in data["users"]:
                 if not isinstance(user_data, dict):
@@ -144,27 +167,8 @@ async def import_data(request: Request, file: UploadFile = File(...)):  # 导入
                             status_code=400,
                             detail={"code": 400, "msg": f"Missing required field: {field}"}
                         )
-                existing_user = data_store.get_user_by_username(user_data["username"])
-                if not existing_user:
-                    user_id = str(uuid.uuid4())
-                    now = datetime.now().isoformat()
-                    data_store.users[user_id] = {
-                        "user_id": user_id,
-                        "username": user_data["username"],
-                        "password_hash": user_data["password"],
-                        "role": user_data.get("role", "user"),
-                        "join_time": user_data.get("join_time", now),
-                        "submit_count": user_data.get("submit_count", 0),
-                        "resolve_count": user_data.get("resolve_count", 0)
-                    }
-                else:
-                    user_id = existing_user["user_id"]
-                    data_store.users[user_id].update({
-                        "role": user_data.get("role", "user"),
-                        "submit_count": user_data.get("submit_count", 0),
-                        "resolve_count": user_data.get("resolve_count", 0)
-                    })
-        # 导入问题数据
+            users = data["users"]
+        problems = []
         if "problems" in data and isinstance(data["problems"], list):
             for problem_data in data["problems"]:
                 if not (isinstance(problem_data, dict) and "id" in problem_data):
@@ -183,52 +187,42 @@ async def import_data(request: Request, file: UploadFile = File(...)):  # 导入
                             status_code=400,
                             detail={"code": 400, "msg": f"Missing required field: {field}"}
                         )
-                os.makedirs(PROBLEMS_DIR, exist_ok=True)
+                check_problem_id(str(problem_data["id"]))
                 if "test_cases" in problem_data and "testcases" not in problem_data:
                     problem_data["testcases"] = problem_data.pop("test_cases")
-                file_path = os.path.join(PROBLEMS_DIR, f"{problem_data['id']}.json")
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(problem_data, f, ensure_ascii=False, indent=2)
-        # 导入提交数据
+                try:
+                    problems.append(Problem(**problem_data))
+                except ValueError as e:
+                    raise HTTPException(
+                        status_code=400,
+                        detail={"code": 400, "msg": f"Invalid problem data: {e}"}
+                    )
+        submissions = []
         if "submissions" in data and isinstance(data["submissions"], list):
             for submission_data in data["submissions"]:
-                if isinstance(submission_data, dict) and "submission_id" in submission_data:
-                    submission_id = submission_data["submission_id"]
-                    data_store.submissions[submission_id] = {
-                        "submission_id": submission_id,
-                        "user_id": submission_data["user_id"],
-                        "problem_id": submission_data["problem_id"],
-                        "language": submission_data["language"],
-                        "code": submission_data["code"],
-                        "status": "completed",
-                        "score": submission_data.get("score", 0),
-                        "counts": submission_data.get("counts", 0),
-                        "submit_time": submission_data.get("submit_time", "2024-01-01T00:00:00")
-                    }
-                    if "details" in submission_data and isinstance(submission_data["details"], list):
-                        test_cases = []
-                        for detail in submission_data["details"]:
-                            test_cases.append({
-                                "test_case_id": detail.get("id", 1),
-                                "status": detail.get("result", "UNKNOWN"),
-                                "time_used": detail.get("time", 0),
-                                "memory_used": detail.get("memory", 0),
-                                "input_data": "",
-                                "expected_output": "",
-                                "actual_output": ""
-                            })
-                        data_store.submission_logs[submission_id] = {
-                            "submission_id": submission_id,
-                            "user_id": submission_data["user_id"],
-                            "problem_id": submission_data["problem_id"],
-                            "language": submission_data["language"],
-                            "code": submission_data["code"],
-                            "score": submission_data.get("score", 0),
-                            "counts": submission_data.get("counts", 0),
-                            "test_cases": test_cases,
-                            "submit_time": submission_data.get("submit_time", "2024-01-01T00:00:00")
-                        }
-        data_store.save_data()
+                if not (isinstance(submission_data, dict) and "submission_id" in submission_data):
+                    continue
+                for field in ["user_id", "problem_id", "language", "code"]:
+                    if field not in submission_data:
+                        raise HTTPException(
+                            status_code=400,
+                            detail={"code": 400, "msg": f"Missing required field: {field}"}
+                        )
+                submissions.append(submission_data)
+        with data_store.transaction(), problem_manifest_batch():   # 全部校验通过后再写入，一次提交；题目清单和索引也只写一次
+            if users:
+                data_store.import_users(users)
+            if problems:
+                os.makedirs(PROBLEMS_DIR, exist_ok=True)
+            for problem in problems:
+                save_problem(problem)  # 计算测试数据摘要和版本号，大测试数据写入外部文件
+            if submissions:
+                data_store.import_submissions(submissions)
+        if not await data_store.flush_barrier():  # 导入结果落盘后再返回
+            raise HTTPException(
+                status_code=500,
+                detail={"code": 500, "msg": f"导入失败: 数据落盘失败 {data_store.last_flush_error or ''}".strip()}
+            )
         return {"code": 200, "msg": "import success", "data": None}
     except json.JSONDecodeError:
         raise HTTPException(
@@ -241,4 +235,116 @@ async def import_data(request: Request, file: UploadFile = File(...)):  # 导入
         raise HTTPException(
             status_code=500,
             detail={"code": 500, "msg": f"导入失败: {str(e)}"}
-        ) 
\ No newline at end of file
+        )
+
+
+def _extract_problem_package(archive, overwrite: bool) -> Problem:   # 逐项校验数据包并把测试数据直接解压到题目数据目录，返回引用这些文件的题目
+    try:
+        package = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise ValueError("Invalid ZIP file")
+    
+    with package:
+        statement = None
+        testdata = {}  # 测试点编号 -> {"in": ZipInfo, "out": ZipInfo}
+        total_size = 0
+        for info in package.infolist():
+            if info.is_dir():
+                continue
+            parts = info.filename.split('/')
+            if info.filename.startswith('/') or '..' in parts:
+                raise ValueError(f"Invalid entry: {info.filename}")
+            name = posixpath.basename(info.filename)
+            match = PACKAGE_TESTDATA_PATTERN.match(name)
+            if name == PACKAGE_STATEMENT_FILE and statement is None:
+                statement = info
+            elif match and match.group(2) not in testdata.get(int(match.group(1)), {}):
+                testdata.setdefault(int(match.group(1)), {})[match.group(2)] = info
+            else:
+                raise ValueError(f"Unexpected or duplicate entry: {info.filename}")
+            total_size += info.file_size
+            if total_size > PACKAGE_MAX_SIZE:
+                raise ValueError("Package too large")
+        
+        if statement is None:
+            raise ValueError(f"Missing {PACKAGE_STATEMENT_FILE}")
+        if statement.file_size > PACKAGE_STATEMENT_MAX_SIZE:
+            raise ValueError(f"{PACKAGE_STATEMENT_FILE} too large")
+        indexes = sorted(testdata)
+        if not indexes or indexes != list(range(1, len(indexes) + 1)):
+            raise ValueError("Test data must be numbered from 1 without gaps")
+        for index in indexes:
+            for kind in ("in", "out"):
+                if kind not in testdata[index]:
+                    raise ValueError(f"Missing {index}.{kind}")
+        
+        problem_data = json.loads(package.read(statement).decode('utf-8'))
+        if not isinstance(problem_data, dict):
+            raise ValueError("Invalid problem data format")
+        problem_data["testcases"] = [{"input_file": f"{index}.in", "output_file": f"{index}.out"} for index in indexes]
+        problem = Problem(**problem_data)
+        if not is_valid_problem_id(problem.id):
+            raise ValueError(f"Invalid problem id: {problem.id}")
+        if not overwrite and os.path.exists(get_problem_file_path(problem.id)):
+            raise FileExistsError(f"题目 {problem.id} 已存在")
+        
+        staging_dir = tempfile.mkdtemp(prefix=f".{problem.id}.", dir=PROBLEMS_DIR)  # 先解压到临时目录，全部成功后再替换
+        try:
+            for index in indexes:
+                for kind, info in testdata[index].items():
+                    with package.open(info) as src, open(os.path.join(staging_dir, f"{index}.{kind}"), 'wb') as dst:
+                        shutil.copyfileobj(src, dst, PACKAGE_CHUNK_SIZE)
+            remove_testdata(problem.id)
+            os.replace(staging_dir, get_testdata_dir(problem.id))
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        return problem
+
+
+@router.post("/import/package/", summary="上传题目数据包")
+async def import_problem_package(request: Request, file: UploadFile = File(...), overwrite: bool = Query(False)):   # 上传zip题目数据包（仅管理员），测试数据分块落盘，不整体读入内存
+    require_admin(request)  # 检查管理员权限
+    if not file.filename.endswith('.zip'):
+        raise HTTPException(
+            status_code=400,
+            detail={"code": 400, "msg": "Only ZIP files supported"}
+        )
+    
+    os.makedirs(PROBLEMS_DIR, exist_ok=True)
+    with tempfile.TemporaryFile(dir=PROBLEMS_DIR) as archive:
+        size = 0
+        while True:
+            chunk = await file.read(PACKAGE_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > PACKAGE_MAX_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail={"code": 413, "msg": "Package too large"}
+                )
+            archive.write(chunk)
+        archive.seek(0)
+        
+        try:
+            problem = await asyncio.get_running_loop().run_in_executor(None, _extract_problem_package, archive, overwrite)
+        except FileExistsError as e:
+            raise HTTPException(
+                status_code=409,
+                detail={"code": 409, "msg": str(e)}
+            )
+        except (ValueError, zipfile.BadZipFile) as e:
+            raise HTTPException(
+                status_code=400,
+                detail={"code": 400, "msg": str(e)}
+            )
+    
+    # 写入只含文件引用的题目配置；计算摘要需要读取全部测试数据，同样放到线程池中执行
+    problem = await asyncio.get_running_loop().run_in_executor(None, save_problem, problem)
+    return {"code": 200, "msg": "import success", "data": {
+        "id": problem.id,
+        "testcase_count": len(problem.testcases),
+        "test_data_digest": problem.test_data_digest,
+        "test_data_version": problem.test_data_version
+    }}
@@ -1,13 +1,16 @@
+import asyncio
+import functools
 from fastapi import APIRouter, Request, HTTPException, status, Query
 from typing import Optional
 from ..models import LogVisibilityConfig, data_store
 from ..auth import require_auth, require_admin, get_current_user
+from ..judge import judge
 
 router = APIRouter(prefix="/api", tags=["logs"])
 
 
 @router.get("/submissions/{submission_id}/log", summary="获取提交日志")
-async def get_submission_log(submission_id: str, request: Request):   # 获取提交日志（需要登录）
+async def get_submission_log(submission_id: str, request: Request, detail: bool = Query(False)):   # 获取提交日志（需要登录）
     current_user = require_auth(request)  # 需要登录
     
     try:
@@ -29,18 +32,19 @@ async def get_submission_log(submission_id: str, request: Request):   # 获取
         
         # 检查权限
         can_view = False
+        is_admin = current_user["role"] == "admin"
+        visibility = data_store.get_problem_visibility(submission["problem_id"])
+        public_cases = visibility.get("public_cases", False)
         
         # 管理员可以查看所有日志
-        if current_user["role"] == "admin":
+        if is_admin:
             can_view = True
         # 用户只能查看自己的日志
         elif submission["user_id"] == current_user["user_id"]:
             can_view = True
         # 如果题目允许公开日志，所有登录用户都可以查看
-        else:
-            visibility = data_store.get_problem_visibility(submission["problem_id"])
-            if visibility.get("public_cases", False):
-                can_view = True
+        elif public_cases:
+            can_view = True
         
         if not can_view:
             raise HTTPException(
@@ -58,13 +62,18 @@ async def get_submission_log(submission_id: str, request: Request):   # 获取
         )
         
         # 返回日志数据
+        data = {
+            "score": log_data["score"],
+            "counts": log_data["counts"]
+        }
+        if detail:
+            # 测试数据（输入和期望输出）只对管理员或公开测试点的题目返回
+            data["test_cases"] = judge.resolve_test_data(log_data, include_test_data=is_admin or public_cases)
+        
         return {
             "code": 200,
             "msg": "success",
-            "data": {
-                "score": log_data["score"],
-                "counts": log_data["counts"]
-            }
+            "data": data
         }
         
     except HTTPException:
@@ -127,13 +136,20 @@ async def get_access_logs(
     user_id: Optional[str] = Query(None),
     problem_id: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1)
+    page_size: int = Query(10, ge=1),
+    cursor: Optional[str] = Query(None),
+    start_time: Optional[str] = Query(None),
+    end_time: Optional[str] = Query(None)
 ):
     # 获取访问审计日志（仅管理员）
     require_admin(request) 
     
     try:
-        result = data_store.get_access_logs(user_id, problem_id, page, page_size)
+        # 读取分段文件和等待日志队列都是阻塞操作，放到线程池中执行
+        result = await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(data_store.get_access_logs, user_id, problem_id, page, page_size, cursor=cursor, start_time=start_time, end_time=end_time)
+        )
         
         # 转换日志格式
         logs = []
@@ -149,15 +165,24 @@ async def get_access_logs(
                 "ip_address": log["ip_address"]
             })
         
+        data = {
+            "logs": logs,
+            "next_cursor": result["next_cursor"]
+        }
+        if "total" in result:  # 游标模式不统计总数
+            data["total"] = result["total"]
+        
         return {
             "code": 200,
             "msg": "success",
-            "data": {
-                "total": result["total"],
-                "logs": logs
-            }
+            "data": data
         }
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 400, "msg": str(e)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,36 +1,245 @@
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import hashlib
 import json
+import mmap
 import os
-from typing import List
-from fastapi import APIRouter, HTTPException, status, Request
-from ..models import Problem, ProblemSummary, data_store
+import shutil
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, status, Request, Query, Response
+from ..models import Problem, ProblemSummary, TestCase, ReferenceSolution, TESTDATA_FILE_PATTERN, data_store, write_json_atomic, encode_cursor, decode_cursor
 from ..auth import require_auth, require_admin, get_current_user
+from ..search import SearchIndex
+from ..docker_judge import docker_judge, expected_output_digests, output_digest
 
 router = APIRouter(prefix="/api/problems", tags=["problems"])
 
 PROBLEMS_DIR = "problems"  # 题目配置文件目录
 SPJ_DIR = "spj_scripts"  # SPJ脚本存储目录
+PROBLEM_MANIFEST_FILE = "problem_manifest.json"  # 题目摘要清单，列表接口只读摘要而不解析完整题目
+PROBLEM_CACHE_CHECK_INTERVAL = float(os.environ.get("OJ_PROBLEM_CACHE_CHECK_INTERVAL", "0"))  # 缓存命中后多少秒内不再检查文件是否变化，0 表示每次都检查
+PROBLEM_MANIFEST_SYNC_INTERVAL = float(os.environ.get("OJ_PROBLEM_MANIFEST_SYNC_INTERVAL", "5"))  # 清单与题目目录对账的最短间隔秒数；经API的修改会立即更新清单，只有API之外的修改要等下次对账
+PROBLEM_INDEX_FIELDS = ("tags", "difficulty", "author", "source")  # 题目列表可过滤的字段
+PROBLEM_SEARCH_INDEX_FILE = "problem_search_index.json"  # 题目全文检索索引，与清单一起增量维护
+PROBLEM_SEARCH_TITLE_WEIGHT = 3  # 标题中的词按该倍数计入词频
+PROBLEM_DETAIL_FIELDS = set(Problem.model_fields) | {"has_spj", "testcase_count"}  # 题目详情可通过fields选择的字段
+PROBLEM_DETAIL_DEFAULT_EXCLUDE = {"testcases"}  # 默认详情视图不返回测试数据
+OUTPUT_GENERATION_CONCURRENCY = int(os.environ.get("OJ_OUTPUT_GENERATION_CONCURRENCY", str(os.cpu_count() or 4)))  # 标程生成输出时同时运行的测试点数
+OUTPUT_GENERATION_SLOW_RATIO = float(os.environ.get("OJ_OUTPUT_GENERATION_SLOW_RATIO", "0.5"))  # 标程耗时超过时间限制的该比例时标记为慢测试点
+TESTDATA_INLINE_LIMIT = int(os.environ.get("OJ_TESTDATA_INLINE_LIMIT", str(64 * 1024)))  # 测试数据总字节数超过该值时保存为独立的.in/.out文件
 os.makedirs(PROBLEMS_DIR, exist_ok=True)  
 os.makedirs(SPJ_DIR, exist_ok=True)  
 
+_problem_cache = {}  # problem_id -> (文件mtime, 文件大小, 上次检查时间, Problem, 文件内容摘要)
+_problem_cache_lock = threading.Lock()
+_problem_cache_stats = {"hits": 0, "misses": 0}
+_manifest = None  # problem_id -> 题目摘要，首次使用时从清单文件加载
+_manifest_lock = threading.RLock()
+_manifest_checked_at = None  # 上次与题目目录对账的时间
+_problem_ids = []  # 全部题目id，升序
+_problem_index = {}  # 字段 -> 取值 -> 按id排序的题目id列表（倒排索引）
+_search_index = None  # 全文检索索引，与清单同时加载
+_manifest_dirty = False  # 内存中的清单和索引是否有尚未持久化的变更
+_manifest_batch = contextvars.ContextVar("problem_manifest_batch", default=False)  # 批量保存题目期间推迟持久化清单
+
 def has_spj_script(problem_id: str) -> bool:    # 检查题目是否有SPJ脚本
     py_path = os.path.join(SPJ_DIR, f"{problem_id}.py")
     cpp_path = os.path.join(SPJ_DIR, f"{problem_id}.cpp")
     return os.path.exists(py_path) or os.path.exists(cpp_path)
 
 
+def is_valid_problem_id(problem_id: str) -> bool:   # 题目ID同时用作文件名和数据目录名：只允许安全字符，且不能以.开头
+    return bool(TESTDATA_FILE_PATTERN.match(problem_id)) and not problem_id.startswith('.')
+
+
+def check_problem_id(problem_id: str) -> None:   # 写入题目前校验ID，无效时返回400
+    if not is_valid_problem_id(problem_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 400, "msg": f"无效的题目ID: {problem_id}"}
+        )
+
+
 def get_problem_file_path(problem_id: str) -> str:
     return os.path.join(PROBLEMS_DIR, f"{problem_id}.json")  # 获取题目文件路径
 
 
-def load_problem(problem_id: str) -> Problem:
+def get_testdata_dir(problem_id: str) -> str:
+    return os.path.join(PROBLEMS_DIR, problem_id)  # 题目外部测试数据目录，每个测试点一对.in/.out文件
+
+
+def get_testcase_path(problem_id: str, file_name: str) -> str:
+    return os.path.join(get_testdata_dir(problem_id), file_name)  # 外部测试数据文件路径
+
+
+@contextlib.contextmanager
+def open_testcase_data(problem_id: str, case: TestCase, kind: str):   # 以只读字节视图打开测试点的输入（input）或期望输出（output）；外部文件使用mmap，不读入进程内存
+    file_name = getattr(case, f"{kind}_file")
+    if file_name is None:
+        yield getattr(case, kind).encode('utf-8')
+        return
+    with open(get_testcase_path(problem_id, file_name), 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""  # 空文件不能mmap
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def read_testcase_text(problem_id: str, case: TestCase, kind: str, limit: Optional[int] = None) -> str:   # 读取测试点数据为文本，limit限制读取的字节数
+    file_name = getattr(case, f"{kind}_file")
+    if file_name is None:
+        text = getattr(case, kind)
+        return text if limit is None else text.encode('utf-8')[:limit].decode('utf-8', errors='ignore')
+    with open(get_testcase_path(problem_id, file_name), 'rb') as f:
+        return f.read(-1 if limit is None else limit).decode('utf-8', errors='ignore')
+
+
+def compute_testcase_hashes(problem_id: str, case: TestCase) -> Tuple[str, str]:   # 计算测试点输入和期望输出的sha256，外部文件经mmap读取
+    hashes = []
+    for kind in ("input", "output"):
+        with open_testcase_data(problem_id, case, kind) as data:
+            hashes.append(hashlib.sha256(data).hexdigest())
+    return hashes[0], hashes[1]
+
+
+def get_testcase_hashes(problem_id: str, case: TestCase) -> Tuple[str, str]:   # 测试点摘要，优先使用保存题目时记录的值
+    if case.input_hash and case.output_hash:
+        return case.input_hash, case.output_hash
+    return compute_testcase_hashes(problem_id, case)
+
+
+def compute_test_data_digest(testcase_hashes: List[Tuple[str, str]]) -> str:   # 全部测试点摘要的摘要，测试点顺序变化也会改变结果
+    return hashlib.sha256("".join(input_hash + output_hash for input_hash, output_hash in testcase_hashes).encode('utf-8')).hexdigest()
+
+
+def stamp_test_data(problem: Problem) -> Problem:   # 计算测试数据摘要和期望输出的比较摘要；与当前已保存版本不同时版本号加一
+    testcases = []
+    for case in problem.testcases:
+        input_hash, output_hash = compute_testcase_hashes(problem.id, case)
+        with open_testcase_data(problem.id, case, "output") as expected_output:
+            strict_hash, normalized_hash = expected_output_digests(expected_output)
+        testcases.append(case.model_copy(update={
+            "input_hash": input_hash,
+            "output_hash": output_hash,
+            "output_strict_hash": strict_hash,
+            "output_normalized_hash": normalized_hash
+        }))
+    digest = compute_test_data_digest([(case.input_hash, case.output_hash) for case in testcases])
+    
+    try:
+        previous = load_problem(problem.id)
+    except HTTPException:
+        previous = None  # 新题目
+    version = data_store.next_test_data_version(   # 计数器保存在共享存储中，多个worker不会分到相同版本，重新创建的题目也不会复用旧版本号
+        problem.id,
+        (previous.test_data_version or 0) if previous else 0,
+        previous is None or previous.test_data_digest != digest
+    )
+    return problem.model_copy(update={"testcases": testcases, "test_data_digest": digest, "test_data_version": version})
+
+
+def get_testcase_size(problem_id: str, case: TestCase) -> int:   # 测试点输入和期望输出的总字节数
+    if case.input_file is None:
+        return len(case.input.encode('utf-8')) + len(case.output.encode('utf-8'))
+    try:
+        return sum(os.path.getsize(get_testcase_path(problem_id, name)) for name in (case.input_file, case.output_file))
+    except OSError:
+        return 0
+
+
+def _write_testdata_file(path: str, text: str) -> None:   # 原子写入一个测试数据文件
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def externalize_testcases(problem: Problem) -> Problem:   # 把内联测试数据写入题目数据目录，返回只含文件引用的题目
+    data_dir = get_testdata_dir(problem.id)
+    os.makedirs(data_dir, exist_ok=True)
+    used = {name for case in problem.testcases if case.input_file is not None for name in (case.input_file, case.output_file)}
+    testcases = []
+    for i, case in enumerate(problem.testcases, start=1):
+        if case.input_file is not None:
+            testcases.append(case)  # 已经是外部文件
+            continue
+        index = i
+        while f"{index}.in" in used or f"{index}.out" in used:   # 不覆盖其他测试点引用的文件
+            index += 1
+        input_file, output_file = f"{index}.in", f"{index}.out"
+        used.update((input_file, output_file))
+        _write_testdata_file(os.path.join(data_dir, input_file), case.input)
+        _write_testdata_file(os.path.join(data_dir, output_file), case.output)
+        testcases.append(case.model_copy(update={"input": None, "output": None, "input_file": input_file, "output_file": output_file}))
+    
+    referenced = {name for case in testcases for name in (case.input_file, case.output_file)}
+    for name in os.listdir(data_dir):
+        if name not in referenced:
+            os.remove(os.path.join(data_dir, name))  # 清理旧版本遗留的测试点
+    return problem.model_copy(update={"testcases": testcases})
+
+
+def remove_testdata(problem_id: str) -> None:   # 删除题目的外部测试数据目录，只删除题目目录下的直接子目录
+    data_dir = os.path.realpath(get_testdata_dir(problem_id))
+    if os.path.dirname(data_dir) != os.path.realpath(PROBLEMS_DIR):
+        raise ValueError(f"测试数据目录不在题目目录内: {problem_id}")
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def invalidate_problem_cache(problem_id: Optional[str] = None) -> None:   # 题目文件被修改后使缓存失效，不传id时清空全部
+    with _problem_cache_lock:
+        if problem_id is None:
+            _problem_cache.clear()
+        else:
+            _problem_cache.pop(problem_id, None)
+
+
+def get_problem_cache_stats() -> dict:   # 获取题目缓存命中统计
+    with _problem_cache_lock:
+        return {**_problem_cache_stats, "size": len(_problem_cache)}
+
+
+def load_problem(problem_id: str) -> Problem:   # 加载题目，文件未变化时直接返回缓存的解析结果（调用方不应修改返回的对象）
+    return load_problem_with_hash(problem_id)[0]
+
+
+def load_problem_with_hash(problem_id: str) -> Tuple[Problem, str]:   # 加载题目及其配置文件内容的sha256摘要（用于ETag）
     file_path = get_problem_file_path(problem_id)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if "test_cases" in data:  # 兼容旧格式
-                data["testcases"] = data.pop("test_cases")
-            return Problem(**data)  # 从JSON加载题目配置
+        now = time.monotonic()
+        with _problem_cache_lock:
+            cached = _problem_cache.get(problem_id)
+            if cached and now - cached[2] < PROBLEM_CACHE_CHECK_INTERVAL:
+                _problem_cache_stats["hits"] += 1
+                return cached[3], cached[4]
+        
+        stat = os.stat(file_path)
+        with _problem_cache_lock:
+            cached = _problem_cache.get(problem_id)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                _problem_cache[problem_id] = (stat.st_mtime_ns, stat.st_size, now, cached[3], cached[4])
+                _problem_cache_stats["hits"] += 1
+                return cached[3], cached[4]
+            _problem_cache_stats["misses"] += 1
+        
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        data = json.loads(raw)
+        if "test_cases" in data:  # 兼容旧格式
+            data["testcases"] = data.pop("test_cases")
+        problem = Problem(**data)  # 从JSON加载题目配置
+        with _problem_cache_lock:
+            _problem_cache[problem_id] = (stat.st_mtime_ns, stat.st_size, now, problem, digest)
+        return problem, digest
     except FileNotFoundError:
+        invalidate_problem_cache(problem_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": 404, "msg": f"题目 {problem_id} 不存在"}
@@ -42,12 +251,230 @@ def load_problem(problem_id: str) -> Problem:
         )
 
 
-def save_problem(problem: Problem) -> None:
+def _problem_summary(problem: Problem, stat: os.stat_result) -> dict:   # 构造题目摘要，附带文件mtime/size用于发现外部修改
+    return {
+        "id": problem.id,
+        "title": problem.title,
+        "tags": problem.tags or [],
+        "difficulty": problem.difficulty or "",
+        "author": problem.author or "",
+        "source": problem.source or "",
+        "testcase_count": len(problem.testcases),
+        "test_data_size": sum(get_testcase_size(problem.id, case) for case in problem.testcases),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size
+    }
+
+
+def _get_manifest() -> dict:   # 题目摘要清单，首次使用时从文件加载并建立倒排索引（需持有_manifest_lock）
+    global _manifest, _search_index
+    if _manifest is None:
+        manifest = {}
+        if os.path.exists(PROBLEM_MANIFEST_FILE):
+            try:
+                with open(PROBLEM_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except:
+                manifest = {}  # 清单损坏时重新从题目文件生成
+        _manifest = {}
+        _problem_index.clear()
+        _problem_ids.clear()
+        for problem_id, summary in manifest.items():
+            _set_summary(problem_id, summary)
+        
+        _search_index = SearchIndex()
+        if os.path.exists(PROBLEM_SEARCH_INDEX_FILE):
+            try:
+                with open(PROBLEM_SEARCH_INDEX_FILE, 'r', encoding='utf-8') as f:
+                    _search_index = SearchIndex.from_dict(json.load(f))
+            except:
+                _search_index = SearchIndex()  # 索引损坏时由_sync_manifest重新索引
+    return _manifest
+
+
+def _index_values(summary: dict, field: str) -> List[str]:   # 摘要中某个可过滤字段的取值（标签为多值）
+    if field == "tags":
+        return list(dict.fromkeys(summary.get("tags") or []))
+    return [summary[field]] if summary.get(field) else []
+
+
+def _set_summary(problem_id: str, summary: Optional[dict]) -> bool:   # 更新一条摘要并同步倒排索引，summary为None表示删除；返回是否有变化
+    old = _manifest.get(problem_id)
+    if old == summary:
+        return False
+    if old is not None:
+        for field in PROBLEM_INDEX_FIELDS:
+            for value in _index_values(old, field):
+                postings = _problem_index[field][value]
+                del postings[bisect.bisect_left(postings, problem_id)]
+                if not postings:
+                    del _problem_index[field][value]
+        del _problem_ids[bisect.bisect_left(_problem_ids, problem_id)]
+        del _manifest[problem_id]
+    if summary is not None:
+        for field in PROBLEM_INDEX_FIELDS:
+            for value in _index_values(summary, field):
+                bisect.insort(_problem_index.setdefault(field, {}).setdefault(value, []), problem_id)
+        bisect.insort(_problem_ids, problem_id)
+        _manifest[problem_id] = summary
+    return True
+
+
+def _index_problem(problem_id: str, problem: Optional[Problem], stat: Optional[os.stat_result]) -> None:   # 更新题目的全文检索条目，problem为None表示删除（需持有_manifest_lock）
+    if problem is None:
+        _search_index.remove(problem_id)
+        return
+    fields = [
+        (problem.title, PROBLEM_SEARCH_TITLE_WEIGHT),
+        (problem.description, 1),
+        (problem.hint or "", 1),
+        (problem.source or "", 1)
+    ]
+    _search_index.add(problem_id, fields, stamp=[stat.st_mtime_ns, stat.st_size])
+
+
+def _save_manifest() -> None:   # 持久化清单和全文检索索引，批量保存期间只标记为待写入（需持有_manifest_lock）
+    global _manifest_dirty
+    _manifest_dirty = True
+    if _manifest_batch.get():
+        return
+    write_json_atomic(PROBLEM_MANIFEST_FILE, _manifest)
+    write_json_atomic(PROBLEM_SEARCH_INDEX_FILE, _search_index.to_dict())
+    _manifest_dirty = False
+
+
+@contextlib.contextmanager
+def problem_manifest_batch():   # 块内保存的题目只更新内存中的清单和索引，结束时统一持久化一次；嵌套时并入外层
+    if _manifest_batch.get():
+        yield
+        return
+    token = _manifest_batch.set(True)
+    try:
+        yield
+    finally:
+        _manifest_batch.reset(token)
+        with _manifest_lock:
+            if _manifest_dirty:
+                _save_manifest()
+
+
+def refresh_problem_summary(problem_id: str) -> None:   # 题目文件写入后更新其摘要
+    with _manifest_lock:
+        _get_manifest()
+        try:
+            stat = os.stat(get_problem_file_path(problem_id))
+            problem = load_problem(problem_id)
+            summary = _problem_summary(problem, stat)
+        except Exception:
+            stat, problem, summary = None, None, None  # 文件不存在或格式错误的题目不列出
+        _index_problem(problem_id, problem, stat)
+        _set_summary(problem_id, summary)
+        _save_manifest()
+
+
+def remove_problem_summary(problem_id: Optional[str] = None) -> None:   # 删除题目摘要，不传id时清空清单
+    with _manifest_lock:
+        manifest = _get_manifest()
+        for existing_id in ([problem_id] if problem_id is not None else list(manifest)):
+            _set_summary(existing_id, None)
+            _index_problem(existing_id, None, None)
+        _save_manifest()
+
+
+def _sync_manifest() -> None:   # 与题目目录对账：只stat文件，变化过的题目才重新解析；按PROBLEM_MANIFEST_SYNC_INTERVAL节流（需持有_manifest_lock）
+    global _manifest_checked_at
+    manifest = _get_manifest()
+    now = time.monotonic()
+    if _manifest_checked_at is not None and now - _manifest_checked_at < PROBLEM_MANIFEST_SYNC_INTERVAL:
+        return
+    _manifest_checked_at = now
+    
+    problem_ids = get_all_problem_ids()
+    changed = False
+    for problem_id in (set(manifest) | set(_search_index.docs)) - set(problem_ids):
+        _set_summary(problem_id, None)  # 文件已在API之外被删除
+        _index_problem(problem_id, None, None)
+        changed = True
+    for problem_id in problem_ids:
+        try:
+            stat = os.stat(get_problem_file_path(problem_id))
+        except FileNotFoundError:
+            continue
+        entry = manifest.get(problem_id)
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        if entry and [entry["mtime_ns"], entry["size"]] == stamp and _search_index.stamp(problem_id) == stamp:
+            continue
+        try:
+            problem = load_problem(problem_id)
+            summary = _problem_summary(problem, stat)
+        except Exception:
+            problem, summary = None, None  # 跳过有问题的配置文件
+        indexed = _search_index.stamp(problem_id)
+        _index_problem(problem_id, problem, stat)
+        changed |= _set_summary(problem_id, summary) or _search_index.stamp(problem_id) != indexed
+    
+    if changed:
+        _save_manifest()
+
+
+def get_problem_summaries() -> List[dict]:   # 按id排序的全部题目摘要
+    with _manifest_lock:
+        _sync_manifest()
+        return [_manifest[problem_id] for problem_id in _problem_ids]
+
+
+def query_problem_summaries(filters: dict, limit: Optional[int] = None, cursor: Optional[str] = None) -> tuple:   # 按字段过滤题目摘要，返回(摘要列表, 下一页游标)
+    with _manifest_lock:
+        _sync_manifest()
+        filters = {field: value for field, value in filters.items() if value}
+        candidates = _problem_ids
+        if filters:
+            # 从最短的倒排列表出发，其余条件逐条检查
+            field, value = min(filters.items(), key=lambda item: len(_problem_index.get(item[0], {}).get(item[1], [])))
+            candidates = _problem_index.get(field, {}).get(value, [])
+        
+        start = bisect.bisect_right(candidates, decode_cursor(cursor)[1]) if cursor else 0
+        summaries = []
+        for i in range(start, len(candidates)):
+            summary = _manifest[candidates[i]]
+            if all(value in _index_values(summary, field) for field, value in filters.items()):
+                summaries.append(summary)
+                if limit is not None and len(summaries) >= limit:
+                    break
+    
+    next_cursor = None
+    if limit is not None and len(summaries) >= limit:
+        next_cursor = encode_cursor((summaries[-1]["id"], summaries[-1]["id"]))
+    return summaries, next_cursor
+
+
+def search_problem_summaries(query: str, limit: int) -> List[dict]:   # 全文检索题目，按BM25得分从高到低返回摘要
+    with _manifest_lock:
+        _sync_manifest()
+        return [
+            {**_manifest[problem_id], "score": round(score, 4)}
+            for problem_id, score in _search_index.search(query, limit)
+            if problem_id in _manifest
+        ]
+
+
+def save_problem(problem: Problem) -> Problem:   # 保存题目，返回实际写入的题目（含测试数据摘要和版本号）
+    check_problem_id(problem.id)
     file_path = get_problem_file_path(problem.id)
     try:
+        inline_size = sum(get_testcase_size(problem.id, case) for case in problem.testcases if case.input_file is None)
+        if inline_size > TESTDATA_INLINE_LIMIT or any(case.input_file is not None for case in problem.testcases):
+            problem = externalize_testcases(problem)  # 大题目的JSON只保存测试点元数据
+        else:
+            remove_testdata(problem.id)
+        problem = stamp_test_data(problem)  # 测试数据文件写好之后再计算摘要
         problem_dict = problem.model_dump()
+        problem_dict["testcases"] = [case.model_dump(exclude_none=True) for case in problem.testcases]  # 内联数据或外部文件引用
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(problem_dict, f, ensure_ascii=False, indent=2)  # 保存题目到JSON文件
+        invalidate_problem_cache(problem.id)
+        refresh_problem_summary(problem.id)
+        return problem
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -68,24 +495,38 @@ def get_all_problem_ids() -> List[str]:
 
 
 @router.get("/", summary="获取题目列表")
-async def get_problems(request: Request):   # 获取题目列表（需要登录）
+async def get_problems(
+    request: Request,
+    tag: Optional[str] = Query(None),
+    difficulty: Optional[str] = Query(None),
+    author: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    page_size: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None)
+):
+    # 获取题目列表（需要登录）；传入page_size或cursor时按游标分页
     require_auth(request)  # 需要登录
     
     try:
-        problem_ids = get_all_problem_ids()
-        problems = []
-        
-        for problem_id in problem_ids:
-            try:
-                problem = load_problem(problem_id)
-                problems.append(ProblemSummary(
-                    id=problem.id,
-                    title=problem.title
-                ))  # 构建题目摘要信息
-            except HTTPException:
-                continue  # 跳过有问题的配置文件
+        paginated = page_size is not None or cursor is not None
+        summaries, next_cursor = query_problem_summaries(
+            {"tags": tag, "difficulty": difficulty, "author": author, "source": source},
+            limit=(page_size or 10) if paginated else None,
+            cursor=cursor
+        )
+        problems = [
+            ProblemSummary(id=summary["id"], title=summary["title"])
+            for summary in summaries
+        ]  # 只读取摘要清单，不加载测试数据
         
+        if paginated:
+            return {"code": 200, "msg": "success", "data": {"problems": problems, "next_cursor": next_cursor}}
         return {"code": 200, "msg": "success", "data": problems}  # 标准响应格式
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 400, "msg": str(e)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -93,20 +534,75 @@ async def get_problems(request: Request):   # 获取题目列表（需要登录
         )
 
 
+@router.get("/search", summary="全文检索题目")
+async def search_problems(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100)
+):
+    # 按标题、描述、提示和来源检索题目（需要登录），结果按相关度排序
+    require_auth(request)  # 需要登录
+    
+    try:
+        results = [
+            {"id": summary["id"], "title": summary["title"], "score": summary["score"]}
+            for summary in search_problem_summaries(q, limit)
+        ]
+        return {"code": 200, "msg": "success", "data": results}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"code": 500, "msg": f"检索题目失败: {str(e)}"}
+        )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:   # If-None-Match是否命中（弱比较，支持*和多个值）
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+
 @router.get("/{problem_id}", summary="获取题目详情")
-async def get_problem(problem_id: str, request: Request):
-    # 获取题目详情（需要登录）
+async def get_problem(problem_id: str, request: Request, response: Response, fields: Optional[str] = Query(None)):
+    # 获取题目详情（需要登录）；默认不含测试数据，fields为逗号分隔的字段列表（如 fields=id,title,testcases）
     require_auth(request)  
     
     try:
-        problem = load_problem(problem_id)  # 返回完整题目信息
+        selected = None
+        if fields is not None:
+            selected = {field.strip() for field in fields.split(",") if field.strip()}
+            unknown = selected - PROBLEM_DETAIL_FIELDS
+            if not selected or unknown:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail={"code": 400, "msg": f"未知字段: {', '.join(sorted(unknown)) or fields}"}
+                )
+        
+        problem, digest = load_problem_with_hash(problem_id)
         
         # 检查是否有SPJ脚本
         has_spj = has_spj_script(problem_id)
         
+        # ETag由题目文件内容、所选字段和SPJ状态决定，内容不变时返回304
+        view = ",".join(sorted(selected)) if selected is not None else ""
+        etag = '"' + hashlib.sha256(f"{digest}|{view}|{has_spj}".encode('utf-8')).hexdigest()[:32] + '"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        
         # 构建响应数据，包含SPJ信息
-        problem_data = problem.model_dump()
-        problem_data["has_spj"] = has_spj
+        if selected is None:
+            problem_data = problem.model_dump(exclude=PROBLEM_DETAIL_DEFAULT_EXCLUDE)
+        else:
+            problem_data = problem.model_dump(include=selected & set(Problem.model_fields))
+            if "testcases" in selected:
+                problem_data["testcases"] = [case.model_dump(exclude_none=True) for case in problem.testcases]  # 内联数据或外部文件引用
+        if selected is None or "testcase_count" in selected:
+            problem_data["testcase_count"] = len(problem.testcases)
+        if selected is None or "has_spj" in selected:
+            problem_data["has_spj"] = has_spj
         
         return {"code": 200, "msg": "success", "data": problem_data}
     except HTTPException:
@@ -123,6 +619,7 @@ async def create_problem(problem: Problem, request: Request):   # 添加题目
     require_auth(request)  
     
     try:
+        check_problem_id(problem.id)
         file_path = get_problem_file_path(problem.id)
         if os.path.exists(file_path):
             raise HTTPException(
@@ -130,10 +627,12 @@ async def create_problem(problem: Problem, request: Request):   # 添加题目
                 detail={"code": 409, "msg": f"题目 {problem.id} 已存在"}
             )  # 检查题目是否已存在
         
-        save_problem(problem)  # 保存新题目
+        saved = save_problem(problem)  # 保存新题目
         
         # 返回完整的题目数据
         problem_data = problem.model_dump()
+        problem_data["test_data_digest"] = saved.test_data_digest
+        problem_data["test_data_version"] = saved.test_data_version
         problem_data["has_spj"] = has_spj_script(problem.id)
         
         return {"code": 200, "msg": "add success", "data": problem_data}  # 返回完整题目数据
@@ -146,6 +645,102 @@ async def create_problem(problem: Problem, request: Request):   # 添加题目
         )
 
 
+@router.post("/{problem_id}/outputs", summary="用标程生成或校验测试点输出")
+async def generate_outputs(problem_id: str, solution: ReferenceSolution, request: Request):   # 在评测沙箱中并行运行标程（仅管理员）
+    require_admin(request)
+    
+    try:
+        if solution.mode not in ("fill", "verify"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"code": 400, "msg": f"不支持的模式: {solution.mode}"}
+            )
+        if not data_store.get_language(solution.language):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"code": 400, "msg": f"不支持的语言: {solution.language}"}
+            )
+        problem = load_problem(problem_id)
+        time_limit = problem.time_limit or 3.0
+        memory_limit = problem.memory_limit or 128
+        judge_mode = "strict" if problem.judge_mode == "strict" else "standard"  # SPJ题目按标准模式校验
+        semaphore = asyncio.Semaphore(max(1, OUTPUT_GENERATION_CONCURRENCY))
+        
+        async def run_case(index: int, case: TestCase) -> tuple:   # 运行一个测试点，返回(报告, 输出)，并发数受semaphore限制
+            input_file = get_testcase_path(problem_id, case.input_file) if case.input_file else None
+            async with semaphore:
+                result = await docker_judge.run_program(program, case.input or "", time_limit, memory_limit, input_file)
+            output = result.get("output", "") if result["status"] == "AC" else None
+            report = {
+                "test_case_id": index,
+                "status": "OK" if output is not None else result["status"],
+                "time_used": result.get("time_used", 0),
+                "memory_used": result.get("memory_used", 0),
+                "slow": result.get("time_used", 0) > time_limit * OUTPUT_GENERATION_SLOW_RATIO
+            }
+            if output is not None and solution.mode == "verify":
+                expected_digest = case.output_strict_hash if judge_mode == "strict" else case.output_normalized_hash
+                if expected_digest is None:
+                    with open_testcase_data(problem_id, case, "output") as expected_output:
+                        expected_digest = expected_output_digests(expected_output)[0 if judge_mode == "strict" else 1]
+                report["matched"] = output_digest(output, judge_mode) == expected_digest
+            return report, output
+        
+        program = await docker_judge.compile_program(solution.code, solution.language)   # 标程只编译一次
+        try:
+            results = await asyncio.gather(*(run_case(i, case) for i, case in enumerate(problem.testcases)))
+        finally:
+            program.cleanup()
+        reports = [report for report, _ in results]
+        failed = [report["test_case_id"] for report in reports if report["status"] != "OK"]
+        
+        updated = False
+        if solution.mode == "fill" and not failed:   # 全部测试点运行成功才写入，避免留下部分更新的数据
+            testcases = []
+            written, replaced = [], []   # 外部输出写入新文件，题目保存成功后才删除旧文件，失败时删除新文件，已保存的摘要始终与引用的文件一致
+            try:
+                for case, (report, output) in zip(problem.testcases, results):
+                    if case.output_file:
+                        output_file = f"{os.path.splitext(case.input_file)[0]}-{uuid.uuid4().hex[:8]}.out"
+                        _write_testdata_file(get_testcase_path(problem_id, output_file), output)
+                        written.append(output_file)
+                        replaced.append(case.output_file)
+                        testcases.append(case.model_copy(update={"output_file": output_file}))
+                    else:
+                        testcases.append(case.model_copy(update={"output": output}))
+                    report["output_size"] = len(output.encode('utf-8'))
+                problem = save_problem(problem.model_copy(update={"testcases": testcases}))
+            except Exception:
+                for output_file in written:
+                    with contextlib.suppress(OSError):
+                        os.remove(get_testcase_path(problem_id, output_file))
+                raise
+            for output_file in replaced:
+                with contextlib.suppress(OSError):
+                    os.remove(get_testcase_path(problem_id, output_file))
+            updated = True
+        
+        data = {
+            "mode": solution.mode,
+            "updated": updated,
+            "test_data_version": problem.test_data_version,
+            "failed_cases": failed,
+            "slow_cases": [report["test_case_id"] for report in reports if report["slow"]],
+            "mismatched_cases": [report["test_case_id"] for report in reports if report.get("matched") is False],
+            "test_cases": reports
+        }
+        if program.status == "CE":
+            data["compile_error"] = program.error  # 标程编译失败时各测试点均为CE，返回编译器输出
+        return {"code": 200, "msg": "success", "data": data}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"code": 500, "msg": f"生成测试点输出失败: {str(e)}"}
+        )
+
+
 @router.delete("/{problem_id}", summary="删除题目")
 async def delete_problem(problem_id: str, request: Request):   # 删除题目（仅管理员）
     require_admin(request)  # 仅管理员可删除
@@ -160,6 +755,9 @@ async def delete_problem(problem_id: str, request: Request):   # 删除题目（
             )  # 检查题目是否存在
         
         os.remove(file_path)  # 删除题目文件
+        remove_testdata(problem_id)
+        invalidate_problem_cache(problem_id)
+        remove_problem_summary(problem_id)
         
         return {"code": 200, "msg": "delete success", "data": {"id": problem_id}}  # 标准响应格式
     except HTTPException:
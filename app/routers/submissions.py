@@ -5,6 +5,7 @@ from typing import Optional
 from ..models import SubmissionCreate, data_store
 from ..auth import require_auth, require_admin, get_current_user
 from ..judge import judge
+from .problems import load_problem
 
 def is_testing():
     import sys, os
@@ -119,7 +120,8 @@ async def get_submissions_list(
     problem_id: Optional[str] = Query(None),
     judge_status: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1)
+    page_size: int = Query(10, ge=1),
+    cursor: Optional[str] = Query(None)
 ):
     current_user = require_auth(request)  
     
@@ -138,7 +140,7 @@ async def get_submissions_list(
         )
     
     try:
-        result = data_store.get_submissions(user_id, problem_id, judge_status, page, page_size)
+        result = data_store.get_submissions(user_id, problem_id, judge_status, page, page_size, cursor=cursor)
         
         # 转换提交信息格式
         submissions = []
@@ -154,14 +156,23 @@ async def get_submissions_list(
                 "submit_time": submission["submit_time"]
             })
         
+        data = {
+            "submissions": submissions,
+            "next_cursor": result["next_cursor"]
+        }
+        if "total" in result:  # 游标模式不统计总数
+            data["total"] = result["total"]
+        
         return {
             "code": 200,
             "msg": "success",
-            "data": {
-                "total": result["total"],
-                "submissions": submissions
-            }
+            "data": data
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 400, "msg": str(e)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -170,7 +181,7 @@ async def get_submissions_list(
 
 
 @router.put("/{submission_id}/rejudge", summary="重新评测")
-async def rejudge_submission(submission_id: str, request: Request):   # 重新评测（仅管理员）
+async def rejudge_submission(submission_id: str, request: Request, only_if_changed: bool = Query(False)):   # 重新评测（仅管理员），only_if_changed时测试数据未变化则跳过
     require_admin(request)  
     
     try:
@@ -181,6 +192,20 @@ async def rejudge_submission(submission_id: str, request: Request):   # 重新
                 detail={"code": 404, "msg": "提交不存在"}
             )
         
+        if only_if_changed:
+            log_data = data_store.get_submission_log(submission_id) or {}
+            judged_digest = (log_data.get("test_data") or {}).get("digest")
+            problem = load_problem(submission["problem_id"])
+            if judged_digest and judged_digest == problem.test_data_digest:
+                return {
+                    "code": 200,
+                    "msg": "test data unchanged",
+                    "data": {
+                        "submission_id": submission_id,
+                        "status": submission["status"]
+                    }
+                }
+        
         # 重置状态
         data_store.update_submission(
             submission_id,
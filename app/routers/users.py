@@ -23,12 +23,13 @@ async def register_user(user_data: UserCreate):
 async def get_users_list(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1),
+    cursor: Optional[str] = Query(None),
     request: Request = None
 ):   # 获取用户列表（仅管理员）
     require_admin(request)  
     
     try:
-        result = data_store.get_all_users(page, page_size)
+        result = data_store.get_all_users(page, page_size, cursor=cursor)
         
         # 转换用户信息格式
         users = []
@@ -42,14 +43,23 @@ async def get_users_list(
                 "resolve_count": user["resolve_count"]
             })
         
+        data = {
+            "users": users,
+            "next_cursor": result["next_cursor"]
+        }
+        if "total" in result:  # 游标模式不统计总数
+            data["total"] = result["total"]
+        
         return {
             "code": 200,
             "msg": "success",
-            "data": {
-                "total": result["total"],
-                "users": users
-            }
+            "data": data
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 400, "msg": str(e)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
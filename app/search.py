@@ -0,0 +1,90 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import List
+
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+|[0-9a-z_]+")  # 连续的CJK字符，或连续的字母数字
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def tokenize(text: str) -> List[str]:   # 分词：英文按单词，CJK按相邻二字切分（单字词保留单字）
+    tokens = []
+    for run in _TOKEN_PATTERN.findall((text or "").lower()):
+        if not _CJK_PATTERN.match(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class SearchIndex:    # 增量维护的倒排索引，BM25排序
+    def __init__(self):
+        self.docs = {}  # doc_id -> {"stamp": 文档版本, "length": 词数, "terms": {词: 词频}}
+        self.postings = {}  # 词 -> {doc_id: 词频}，由docs推导，不持久化
+        self.total_length = 0
+
+    def add(self, doc_id: str, fields: List[tuple], stamp=None):   # 索引文档，fields为(文本, 权重)列表；已存在时先删除旧版本
+        self.remove(doc_id)
+        terms = Counter()
+        for text, weight in fields:
+            for token in tokenize(text):
+                terms[token] += weight
+        doc = {"stamp": stamp, "length": sum(terms.values()), "terms": dict(terms)}
+        self._insert(doc_id, doc)
+
+    def _insert(self, doc_id: str, doc: dict):
+        self.docs[doc_id] = doc
+        self.total_length += doc["length"]
+        for term, frequency in doc["terms"].items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, doc_id: str):   # 从索引中删除文档
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc["length"]
+        for term in doc["terms"]:
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+
+    def stamp(self, doc_id: str):   # 文档被索引时的版本，用于判断是否需要重新索引
+        doc = self.docs.get(doc_id)
+        return doc["stamp"] if doc else None
+
+    def search(self, query: str, limit: int = 10) -> List[tuple]:   # 返回得分最高的limit个(doc_id, 得分)
+        if not self.docs:
+            return []
+
+        doc_count = len(self.docs)
+        average_length = self.total_length / doc_count or 1
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                length = self.docs[doc_id]["length"]
+                score = idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))  # 堆选取前limit个，同分时按id升序
+
+    def to_dict(self) -> dict:   # 持久化格式（倒排表可由文档词频重建，不重复保存）
+        return {"docs": self.docs}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SearchIndex":
+        index = cls()
+        for doc_id, doc in data.get("docs", {}).items():
+            index._insert(doc_id, doc)
+        return index
@@ -0,0 +1,594 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+import bcrypt
+from .storage_utils import encode_cursor, decode_cursor, SUBMISSION_LOG_DIR, ACCESS_LOG_DIR
+
+
+SQLITE_PATH = os.environ.get("OJ_SQLITE_PATH", "oj.db")  # SQLite数据库文件
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("OJ_SQLITE_BUSY_TIMEOUT_MS", "5000"))  # 其他进程持有写锁时的等待时间
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'user',
+    join_time TEXT NOT NULL,
+    submit_count INTEGER NOT NULL DEFAULT 0,
+    resolve_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_join_time ON users(join_time, user_id);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS languages (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    problem_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    code TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    score INTEGER NOT NULL DEFAULT 0,
+    counts INTEGER NOT NULL DEFAULT 0,
+    submit_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_user ON submissions(user_id, submit_time);
+CREATE INDEX IF NOT EXISTS idx_submissions_problem ON submissions(problem_id, submit_time);
+CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions(status, submit_time);
+CREATE INDEX IF NOT EXISTS idx_submissions_time ON submissions(submit_time);
+
+CREATE TABLE IF NOT EXISTS submission_logs (
+    submission_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS problem_visibility (
+    problem_id TEXT PRIMARY KEY,
+    public_cases INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS test_data_versions (
+    problem_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS access_logs (
+    log_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    action TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    access_time TEXT NOT NULL,
+    ip_address TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_access_logs_user ON access_logs(user_id, access_time);
+CREATE INDEX IF NOT EXISTS idx_access_logs_resource ON access_logs(resource_type, resource_id, access_time);
+CREATE INDEX IF NOT EXISTS idx_access_logs_time ON access_logs(access_time);
+"""
+
+SUBMISSION_COLUMNS = ("user_id", "problem_id", "language", "code", "status", "score", "counts", "submit_time")
+
+
+class SQLiteDataStore:    # SQLite存储后端，方法与DataStore一致；多个worker进程可共享同一数据库
+    def __init__(self, db_path: str = SQLITE_PATH):
+        self.db_path = db_path
+        self._lock = threading.RLock()  # 评测线程与请求处理共享同一连接
+        self._transaction_depth = 0  # 大于0时写操作并入当前事务，由最外层统一提交
+        self.last_flush_error = None  # 与DataStore接口一致，提交失败直接抛出异常
+        # 写事务一开始就获取写锁，避免多进程并发时读锁升级为写锁失败
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level="IMMEDIATE")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        self.conn.execute("PRAGMA journal_mode = WAL")  # 读写互不阻塞，各进程总能读到已提交的数据
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.load_data()
+        self.ensure_admin_exists()
+        self.ensure_default_languages()
+    
+    def load_data(self):    # 建表（数据按需从数据库读取）
+        started = time.perf_counter()
+        with self._lock:
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+        self.startup_seconds = time.perf_counter() - started
+    
+    def preload_cold_collections(self, background: bool = True):   # 数据本就按需读取，无需预加载
+        pass
+    
+    def get_load_stats(self) -> dict:   # 获取启动耗时（不存在整集合加载）
+        return {"startup_seconds": self.startup_seconds, "collections": {}}
+    
+    def save_data(self):    # 每次变更均已提交，无需额外保存
+        with self._lock:
+            self.conn.commit()
+    
+    def flush(self):
+        self.save_data()
+    
+    def wait_for_flush(self, timeout: Optional[float] = None) -> bool:   # 提交即持久化
+        return True
+    
+    async def flush_barrier(self, timeout: Optional[float] = None) -> bool:
+        return True
+    
+    def get_flush_stats(self) -> dict:   # 由SQLite负责落盘，不单独统计
+        return {"flush_count": 0, "last_flush_bytes": 0, "total_flush_bytes": 0, "last_flush_error": None, "dirty_collections": []}
+    
+    def _query_one(self, sql: str, params: tuple = ()) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute(sql, params).fetchone()
+        return dict(row) if row else None
+    
+    def _query_all(self, sql: str, params: tuple = ()) -> List[dict]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+    
+    @contextlib.contextmanager
+    def _write(self):   # 写操作：单独提交，或在事务内交给外层提交
+        with self._lock:
+            if self._transaction_depth:
+                yield
+                return
+            with self.conn:
+                yield
+    
+    @contextlib.contextmanager
+    def transaction(self):   # 工作单元：块内的全部写操作一次提交，抛出异常时回滚；嵌套时并入外层事务
+        with self._lock:
+            self._transaction_depth += 1
+            try:
+                if self._transaction_depth > 1:
+                    yield None
+                else:
+                    with self.conn:
+                        yield None
+            finally:
+                self._transaction_depth -= 1
+    
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._write():
+            self.conn.execute(sql, params)
+    
+    def ensure_admin_exists(self):   # 确保管理员账户存在（多个worker同时启动时只有一个插入生效）
+        if not self.get_user_by_username("admin"):
+            admin_id = str(uuid.uuid4())
+            password_hash = bcrypt.hashpw("admintestpassword".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            now = datetime.now().strftime("%Y-%m-%d")
+            self._execute(
+                "INSERT OR IGNORE INTO users (user_id, username, password_hash, role, join_time, submit_count, resolve_count) "
+                "VALUES (?, 'admin', ?, 'admin', ?, 0, 0)",
+                (admin_id, password_hash, now)
+            )
+    
+    def ensure_default_languages(self):    # 确保默认语言存在
+        if not self.get_language("python"):
+            self._execute("INSERT OR IGNORE INTO languages (name, data) VALUES (?, ?)", ("python", json.dumps({
+                "name": "python",
+                "file_ext": ".py",
+                "compile_cmd": "",
+                "run_cmd": "python main.py",
+                "time_limit": 3.0,
+                "memory_limit": 128
+            }, ensure_ascii=False)))
+    
+    def _insert_user(self, user_id: str, username: str, password_hash: str, role: str, join_time: str,
+                     submit_count: int = 0, resolve_count: int = 0):
+        self._execute(
+            "INSERT INTO users (user_id, username, password_hash, role, join_time, submit_count, resolve_count) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (user_id, username, password_hash, role, join_time, submit_count, resolve_count)
+        )
+    
+    def create_user(self, username: str, password: str, role: str = "user") -> str:    # 创建新用户
+        if self.get_user_by_username(username):
+            raise ValueError("用户名已存在")
+        
+        if len(username) < 3 or len(username) > 40:
+            raise ValueError("用户名长度必须在3-40字符之间")
+        
+        if len(password) < 6:
+            raise ValueError("密码长度至少6位")
+        
+        user_id = str(uuid.uuid4())
+        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        now = datetime.now().strftime("%Y-%m-%d")
+        try:
+            self._insert_user(user_id, username, password_hash, role, now)
+        except sqlite3.IntegrityError:
+            raise ValueError("用户名已存在")  # 其他进程在检查之后抢先创建了同名用户
+        return user_id
+    
+    def authenticate_user(self, username: str, password: str) -> Optional[dict]:    # 验证用户登录
+        user = self.get_user_by_username(username)
+        if user and bcrypt.checkpw(password.encode('utf-8'), user["password_hash"].encode('utf-8')):
+            if user["role"] == "banned":
+                return None  # 被禁用的用户无法登录
+            return user
+        return None
+    
+    def get_user_by_id(self, user_id: str) -> Optional[dict]:    # 根据ID获取用户
+        return self._query_one("SELECT * FROM users WHERE user_id = ?", (user_id,))
+    
+    def get_user_by_username(self, username: str) -> Optional[dict]:    # 根据用户名获取用户（走唯一索引）
+        return self._query_one("SELECT * FROM users WHERE username = ?", (username,))
+    
+    def update_user_role(self, user_id: str, new_role: str):    # 更新用户角色
+        if not self.get_user_by_id(user_id):
+            raise ValueError("用户不存在")
+        
+        valid_roles = ["user", "admin", "banned"]
+        if new_role not in valid_roles:
+            raise ValueError("role无效")
+        
+        self._execute("UPDATE users SET role = ? WHERE user_id = ?", (new_role, user_id))
+    
+    def _paginate(self, table: str, sort_column: str, id_column: str, conditions: list, params: list,
+                  page: int, page_size: int, cursor: Optional[str] = None) -> dict:   # 按页码或游标分页，排序键为(sort_column, id_column)
+        conditions = list(conditions)
+        params = list(params)
+        if cursor is not None:
+            # 游标模式：键集分页，利用索引直接定位，不统计总数
+            sort_key, record_id = decode_cursor(cursor)
+            conditions.append(f"({sort_column}, {id_column}) > (?, ?)")
+            params.extend([sort_key, record_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = f"ORDER BY {sort_column}, {id_column}"
+        
+        if cursor is not None:
+            rows = self._query_all(f"SELECT * FROM {table} {where} {order} LIMIT ?", tuple(params) + (page_size,))
+            has_more = len(rows) >= page_size
+            result = {"rows": rows}
+        else:
+            total = self._query_one(f"SELECT COUNT(*) AS total FROM {table} {where}", tuple(params))["total"]
+            rows = self._query_all(
+                f"SELECT * FROM {table} {where} {order} LIMIT ? OFFSET ?",
+                tuple(params) + (page_size, (page - 1) * page_size)
+            )
+            has_more = page * page_size < total
+            result = {"total": total, "rows": rows}
+        
+        result["next_cursor"] = encode_cursor((rows[-1][sort_column], rows[-1][id_column])) if rows and has_more else None
+        return result
+    
+    def get_all_users(self, page: int = 1, page_size: int = 10, cursor: Optional[str] = None) -> dict:    # 获取用户列表
+        result = self._paginate("users", "join_time", "user_id", [], [], page, page_size, cursor)
+        result["users"] = result.pop("rows")
+        return result
+    
+    def list_users(self) -> List[dict]:    # 获取全部用户（导出用）
+        return self._query_all("SELECT * FROM users ORDER BY join_time, user_id")
+    
+    def import_users(self, users: List[dict]):    # 批量导入用户，同名用户合并角色和计数
+        with self._write():
+            for user_data in users:
+                values = (
+                    user_data.get("role", "user"),
+                    user_data.get("submit_count", 0),
+                    user_data.get("resolve_count", 0)
+                )
+                cursor = self.conn.execute(
+                    "UPDATE users SET role = ?, submit_count = ?, resolve_count = ? WHERE username = ?",
+                    values + (user_data["username"],)
+                )
+                if cursor.rowcount == 0:
+                    self.conn.execute(
+                        "INSERT INTO users (user_id, username, password_hash, role, join_time, submit_count, resolve_count) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (str(uuid.uuid4()), user_data["username"], user_data["password"], values[0],
+                         user_data.get("join_time", datetime.now().isoformat()), values[1], values[2])
+                    )
+    
+    def create_session(self, user_id: str) -> str:  # 创建会话
+        session_id = str(uuid.uuid4())
+        self._execute(
+            "INSERT INTO sessions (session_id, user_id, created_at) VALUES (?, ?, ?)",
+            (session_id, user_id, datetime.now().isoformat())
+        )
+        return session_id
+    
+    def get_session(self, session_id: str) -> Optional[dict]:   # 获取会话信息
+        return self._query_one("SELECT user_id, created_at FROM sessions WHERE session_id = ?", (session_id,))
+    
+    def delete_session(self, session_id: str):  # 删除会话
+        self._execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+    
+    def register_language(self, language_data: dict):   # 注册新语言
+        name = language_data["name"]
+        if self.get_language(name):
+            raise ValueError("语言已存在")
+        
+        try:
+            self._execute(
+                "INSERT INTO languages (name, data) VALUES (?, ?)",
+                (name, json.dumps(language_data, ensure_ascii=False))
+            )
+        except sqlite3.IntegrityError:
+            raise ValueError("语言已存在")
+    
+    def get_languages(self) -> dict:   # 获取所有语言
+        return {"name": [row["name"] for row in self._query_all("SELECT name FROM languages ORDER BY rowid")]}
+    
+    def get_language(self, name: str) -> Optional[dict]:   # 获取指定语言
+        row = self._query_one("SELECT data FROM languages WHERE name = ?", (name,))
+        return json.loads(row["data"]) if row else None
+    
+    def create_submission(self, user_id: str, problem_id: str, language: str, code: str) -> str:   # 创建提交
+        submission_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self._write():
+            self.conn.execute(
+                "INSERT INTO submissions (submission_id, user_id, problem_id, language, code, status, score, counts, submit_time) "
+                "VALUES (?, ?, ?, ?, ?, 'pending', 0, 0, ?)",
+                (submission_id, user_id, problem_id, language, code, now)
+            )
+            self.conn.execute("UPDATE users SET submit_count = submit_count + 1 WHERE user_id = ?", (user_id,))
+        return submission_id
+    
+    def get_submission(self, submission_id: str) -> Optional[dict]:   # 获取提交信息
+        return self._query_one("SELECT * FROM submissions WHERE submission_id = ?", (submission_id,))
+    
+    def update_submission(self, submission_id: str, **kwargs):   # 更新提交信息
+        fields = [key for key in kwargs if key in SUBMISSION_COLUMNS]
+        if not fields:
+            return
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        self._execute(
+            f"UPDATE submissions SET {assignments} WHERE submission_id = ?",
+            tuple(kwargs[key] for key in fields) + (submission_id,)
+        )
+    
+    def _submission_filters(self, user_id: Optional[str], problem_id: Optional[str], judge_status: Optional[str]) -> tuple:   # 构造提交过滤条件
+        conditions = []
+        params = []
+        if user_id:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if problem_id:
+            conditions.append("problem_id = ?")
+            params.append(problem_id)
+        if judge_status:
+            conditions.append("status = ?")
+            params.append(judge_status)
+        return conditions, params
+    
+    def get_submissions(self, user_id: Optional[str] = None, problem_id: Optional[str] = None, judge_status: Optional[str] = None, page: int = 1, page_size: int = 10, cursor: Optional[str] = None) -> dict:   # 获取提交列表
+        conditions, params = self._submission_filters(user_id, problem_id, judge_status)
+        result = self._paginate("submissions", "submit_time", "submission_id", conditions, params, page, page_size, cursor)
+        result["submissions"] = result.pop("rows")
+        return result
+    
+    def get_latest_submissions(self, user_id: Optional[str] = None, problem_id: Optional[str] = None, judge_status: Optional[str] = None, limit: int = 10) -> List[dict]:   # 获取最近的提交
+        conditions, params = self._submission_filters(user_id, problem_id, judge_status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._query_all(
+            f"SELECT * FROM submissions {where} ORDER BY submit_time DESC, submission_id DESC LIMIT ?",
+            tuple(params) + (limit,)
+        )
+    
+    def list_submissions(self) -> List[dict]:   # 获取全部提交（导出用）
+        return self._query_all("SELECT * FROM submissions ORDER BY submit_time, submission_id")
+    
+    def import_submissions(self, submissions: List[dict]):   # 批量导入提交及评测详情
+        with self._write():
+            for submission_data in submissions:
+                submission_id = submission_data["submission_id"]
+                submit_time = submission_data.get("submit_time", "2024-01-01T00:00:00")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO submissions (submission_id, user_id, problem_id, language, code, status, score, counts, submit_time) "
+                    "VALUES (?, ?, ?, ?, ?, 'completed', ?, ?, ?)",
+                    (submission_id, submission_data["user_id"], submission_data["problem_id"],
+                     submission_data["language"], submission_data["code"],
+                     submission_data.get("score", 0), submission_data.get("counts", 0), submit_time)
+                )
+                if "details" in submission_data and isinstance(submission_data["details"], list):
+                    test_cases = []
+                    for detail in submission_data["details"]:
+                        test_cases.append({
+                            "test_case_id": detail.get("id", 1),
+                            "status": detail.get("result", "UNKNOWN"),
+                            "time_used": detail.get("time", 0),
+                            "memory_used": detail.get("memory", 0),
+                            "input_data": "",
+                            "expected_output": "",
+                            "actual_output": ""
+                        })
+                    log_data = {
+                        "submission_id": submission_id,
+                        "user_id": submission_data["user_id"],
+                        "problem_id": submission_data["problem_id"],
+                        "language": submission_data["language"],
+                        "code": submission_data["code"],
+                        "score": submission_data.get("score", 0),
+                        "counts": submission_data.get("counts", 0),
+                        "test_cases": test_cases,
+                        "submit_time": submit_time
+                    }
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO submission_logs (submission_id, data) VALUES (?, ?)",
+                        (submission_id, json.dumps(log_data, ensure_ascii=False))
+                    )
+    
+    def save_submission_log(self, submission_id: str, log_data: dict):   # 保存提交日志
+        self._execute(
+            "INSERT OR REPLACE INTO submission_logs (submission_id, data) VALUES (?, ?)",
+            (submission_id, json.dumps(log_data, ensure_ascii=False))
+        )
+    
+    def get_submission_log(self, submission_id: str) -> Optional[dict]:   # 获取提交日志
+        row = self._query_one("SELECT data FROM submission_logs WHERE submission_id = ?", (submission_id,))
+        return json.loads(row["data"]) if row else None
+    
+    def set_problem_visibility(self, problem_id: str, public_cases: bool):   # 设置题目日志可见性
+        self._execute(
+            "INSERT OR REPLACE INTO problem_visibility (problem_id, public_cases) VALUES (?, ?)",
+            (problem_id, int(public_cases))
+        )
+    
+    def get_problem_visibility(self, problem_id: str) -> dict:   # 获取题目日志可见性
+        row = self._query_one("SELECT public_cases FROM problem_visibility WHERE problem_id = ?", (problem_id,))
+        return {"public_cases": bool(row["public_cases"]) if row else False}
+    
+    def next_test_data_version(self, problem_id: str, current_version: int, changed: bool) -> int:   # 分配测试数据版本号；先写后读，写锁保证多个worker不会分到相同版本
+        with self._write():
+            self.conn.execute(
+                "INSERT INTO test_data_versions (problem_id, version) VALUES (?, ?) "
+                "ON CONFLICT(problem_id) DO UPDATE SET version = MAX(version, excluded.version - ?) + ?",
+                (problem_id, current_version + 1 if changed else current_version, int(changed), int(changed))
+            )
+            if not changed:
+                return current_version
+            return self.conn.execute("SELECT version FROM test_data_versions WHERE problem_id = ?", (problem_id,)).fetchone()["version"]
+    
+    def log_access(self, user_id: str, username: str, action: str, resource_id: str, resource_type: str, ip_address: str = ""):   # 记录访问日志
+        self._execute(
+            "INSERT INTO access_logs (log_id, user_id, username, action, resource_id, resource_type, access_time, ip_address) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (str(uuid.uuid4()), user_id, username, action, resource_id, resource_type, datetime.now().isoformat(), ip_address)
+        )
+    
+    def flush_access_logs(self):   # 访问日志直接写入数据库
+        pass
+    
+    def get_access_logs(self, user_id: Optional[str] = None, problem_id: Optional[str] = None, page: int = 1, page_size: int = 10, cursor: Optional[str] = None,
+                        start_time: Optional[str] = None, end_time: Optional[str] = None) -> dict:   # 获取访问日志
+        conditions = []
+        params = []
+        if start_time:
+            conditions.append("access_time >= ?")
+            params.append(start_time)
+        if end_time:
+            conditions.append("access_time <= ?")
+            params.append(end_time)
+        if user_id:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if problem_id:
+            conditions.append("resource_type = 'problem' AND resource_id = ?")
+            params.append(problem_id)
+        result = self._paginate("access_logs", "access_time", "log_id", conditions, params, page, page_size, cursor)
+        result["logs"] = result.pop("rows")
+        return result
+    
+    def reset_system(self):   # 重置系统
+        with self._write():
+            for table in ("users", "sessions", "languages", "submissions", "submission_logs", "problem_visibility", "access_logs"):
+                self.conn.execute(f"DELETE FROM {table}")
+        self.ensure_admin_exists()
+        self.ensure_default_languages()
+
+
+def migrate_json_to_sqlite(db_path: str = SQLITE_PATH, data_dir: str = ".") -> dict:   # 一次性将JSON数据文件迁移到SQLite
+    collections = {}
+    for name in ("users", "sessions", "languages", "submissions", "submission_logs", "problem_visibility", "test_data_versions", "access_logs"):
+        file_path = os.path.join(data_dir, f"{name}.json")
+        collections[name] = {}
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                collections[name] = json.load(f)
+    
+    # 合并journal模式下尚未压缩的变更
+    journal_path = os.path.join(data_dir, "datastore.journal")
+    if os.path.exists(journal_path):
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                for item in record["records"] if record["op"] == "batch" else [record]:   # batch为一次提交的全部变更
+                    if item["op"] == "set":
+                        collections[item["c"]][item["k"]] = item["v"]
+                    else:
+                        collections[item["c"]].pop(item["k"], None)
+    
+    # 分文件存储的提交日志覆盖旧版 submission_logs.json 中的同名记录
+    for root, _, names in os.walk(os.path.join(data_dir, SUBMISSION_LOG_DIR)):
+        for name in names:
+            if not name.endswith(".json") or name.startswith(".tmp_"):
+                continue
+            with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                log = json.load(f)
+            collections["submission_logs"][log.get("submission_id", name[:-len(".json")])] = log
+    
+    # 按天分段的访问日志
+    access_log_dir = os.path.join(data_dir, ACCESS_LOG_DIR)
+    if os.path.isdir(access_log_dir):
+        for name in sorted(os.listdir(access_log_dir)):
+            if not name.endswith(".ndjson"):
+                continue
+            with open(os.path.join(access_log_dir, name), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        log = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    collections["access_logs"][log["log_id"]] = log
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (user_id, username, password_hash, role, join_time, submit_count, resolve_count) "
+                "VALUES (:user_id, :username, :password_hash, :role, :join_time, :submit_count, :resolve_count)",
+                list(collections["users"].values())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO sessions (session_id, user_id, created_at) VALUES (?, ?, ?)",
+                [(session_id, session["user_id"], session["created_at"]) for session_id, session in collections["sessions"].items()]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO languages (name, data) VALUES (?, ?)",
+                [(name, json.dumps(language, ensure_ascii=False)) for name, language in collections["languages"].items()]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO submissions (submission_id, user_id, problem_id, language, code, status, score, counts, submit_time) "
+                "VALUES (:submission_id, :user_id, :problem_id, :language, :code, :status, :score, :counts, :submit_time)",
+                list(collections["submissions"].values())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO submission_logs (submission_id, data) VALUES (?, ?)",
+                [(submission_id, json.dumps(log, ensure_ascii=False)) for submission_id, log in collections["submission_logs"].items()]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO problem_visibility (problem_id, public_cases) VALUES (?, ?)",
+                [(problem_id, int(config.get("public_cases", False))) for problem_id, config in collections["problem_visibility"].items()]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO test_data_versions (problem_id, version) VALUES (?, ?)",
+                [(problem_id, record.get("version", 0)) for problem_id, record in collections["test_data_versions"].items()]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO access_logs (log_id, user_id, username, action, resource_id, resource_type, access_time, ip_address) "
+                "VALUES (:log_id, :user_id, :username, :action, :resource_id, :resource_type, :access_time, :ip_address)",
+                list(collections["access_logs"].values())
+            )
+    finally:
+        conn.close()
+    
+    return {name: len(records) for name, records in collections.items()}
+
+
+if __name__ == "__main__":
+    counts = migrate_json_to_sqlite()  # python -m app.sqlite_store
+    for name, count in counts.items():
+        print(f"{name}: {count}")
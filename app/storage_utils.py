@@ -0,0 +1,19 @@
+import base64
+import json
+
+# 存储后端共用的常量和工具函数；本模块不能有导入副作用，迁移脚本等独立入口不会因此创建JSON数据存储
+
+SUBMISSION_LOG_DIR = "submission_logs"  # 每条提交日志单独存为 submission_logs/<前两位>/<id>.json
+ACCESS_LOG_DIR = "access_logs"  # 访问日志按天分段存为 access_logs/YYYY-MM-DD.ndjson
+
+
+def encode_cursor(entry: tuple) -> str:   # 将(排序键, id)编码为不透明的分页游标
+    return base64.urlsafe_b64encode(json.dumps(list(entry)).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple:   # 解析分页游标
+    try:
+        sort_key, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return (str(sort_key), str(record_id))
+    except Exception:
+        raise ValueError("无效的分页游标")
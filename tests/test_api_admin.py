@@ -120,4 +120,22 @@ def test_initial_admin_exists(client):
     # Verify admin user exists in the user list
     users = data["data"]["users"]
     admin_found = any(user["username"] == "admin" for user in users)
-    assert admin_found, "Initial admin user not found in user list"
\ No newline at end of file
+    assert admin_found, "Initial admin user not found in user list"
+
+
+def test_get_storage_stats(client):
+    """Test GET /api/admin/storage/stats"""
+    setup_admin_session(client)
+
+    response = client.get("/api/admin/storage/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["code"] == 200
+    assert "startup_seconds" in data["data"]["load"]
+    assert "flush_count" in data["data"]["flush"]
+
+    # Regular users cannot read storage stats
+    username, password, user_id = create_test_user(client)
+    setup_user_session(client, username, password)
+    response = client.get("/api/admin/storage/stats")
+    assert response.status_code == 403
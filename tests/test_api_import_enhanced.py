@@ -243,6 +243,48 @@ def test_data_import_missing_required_fields(client):
     assert data["code"] == 400
 
 
+def test_data_import_rolls_back_on_invalid_data(client):
+    """Test POST /api/import/ - users and earlier problems are not imported when a later entry is invalid"""
+    import os
+    from app.routers.problems import get_problem_file_path
+
+    setup_admin_session(client)
+
+    username = "rollback_user_" + uuid.uuid4().hex[:8]
+    valid_problem_id = "rollback_valid_" + uuid.uuid4().hex[:8]
+    import_data = {
+        "users": [{"username": username, "password": "placeholder_hash"}],
+        "problems": [
+            {
+                "id": valid_problem_id,
+                "title": "Valid Problem",
+                "description": "Imported before the invalid entry",
+                "input_description": "Input",
+                "output_description": "Output",
+                "samples": [{"input": "1", "output": "1"}],
+                "constraints": "none",
+                "testcases": [{"input": "1", "output": "1"}],
+                "time_limit": 1.0,
+                "memory_limit": 128
+            },
+            {"id": "rollback_prob"}  # Missing required fields
+        ],
+        "submissions": []
+    }
+
+    files = {"file": ("rollback.json", io.BytesIO(json.dumps(import_data).encode('utf-8')), "application/json")}
+    response = client.post("/api/import/", files=files)
+    assert response.status_code == 400
+
+    response = client.get("/api/users/?page_size=1000")
+    usernames = [user["username"] for user in response.json()["data"]["users"]]
+    assert username not in usernames
+
+    assert not os.path.exists(get_problem_file_path(valid_problem_id))
+    listed = [p["id"] for p in client.get("/api/problems/").json()["data"]]
+    assert valid_problem_id not in listed
+
+
 def test_data_import_large_dataset(client):
     """Test POST /api/import/ - large dataset import"""
     setup_admin_session(client)
@@ -294,6 +336,46 @@ def test_data_import_large_dataset(client):
     assert response.status_code == 200  # Should handle large datasets successfully
 
 
+def test_data_import_writes_manifest_once(client, monkeypatch):
+    """Test POST /api/import/ - the problem manifest and search index are persisted once per import"""
+    import app.routers.problems as problems
+
+    write_json_atomic = problems.write_json_atomic
+    writes = []
+
+    def counting_write(file_path, data):
+        writes.append(file_path)
+        return write_json_atomic(file_path, data)
+
+    monkeypatch.setattr(problems, "write_json_atomic", counting_write)
+    setup_admin_session(client)
+
+    problem_ids = [f"batch_prob_{i}_{uuid.uuid4().hex[:4]}" for i in range(5)]
+    import_data = {"problems": [{
+        "id": problem_id,
+        "title": f"Batch Problem {i}",
+        "description": "Batch import",
+        "input_description": "Input",
+        "output_description": "Output",
+        "samples": [{"input": "1", "output": "1"}],
+        "constraints": "|x| <= 10^9",
+        "testcases": [{"input": "1", "output": "1"}],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    } for i, problem_id in enumerate(problem_ids)]}
+
+    files = {"file": ("batch.json", io.BytesIO(json.dumps(import_data).encode('utf-8')), "application/json")}
+    assert client.post("/api/import/", files=files).status_code == 200
+    assert writes.count(problems.PROBLEM_MANIFEST_FILE) == 1
+    assert writes.count(problems.PROBLEM_SEARCH_INDEX_FILE) == 1
+
+    listed = [p["id"] for p in client.get("/api/problems/").json()["data"]]
+    assert all(problem_id in listed for problem_id in problem_ids)
+    with open(problems.PROBLEM_MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert all(problem_id in manifest for problem_id in problem_ids)
+
+
 def test_data_import_no_file(client):
     """Test POST /api/import/ - no file provided"""
     setup_admin_session(client)
@@ -591,3 +673,75 @@ def test_export_reset_import_login_workflow(client):
     problems_data = problems_response.json()["data"]
     problem_ids = [prob["id"] for prob in problems_data]
     assert problem_id in problem_ids
+
+
+def test_import_problem_package(client):
+    """Test POST /api/import/package/ - zipped statement plus numbered .in/.out files"""
+    import os
+    import zipfile
+
+    setup_admin_session(client)
+
+    problem_id = "test_package_" + uuid.uuid4().hex[:6]
+    statement = {
+        "id": problem_id,
+        "title": "数据包题目",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }
+
+    def build_package(entries):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as package:
+            for name, content in entries.items():
+                package.writestr(name, content)
+        return {"file": ("package.zip", buffer.getvalue(), "application/zip")}
+
+    entries = {
+        f"{problem_id}/problem.json": json.dumps(statement, ensure_ascii=False),
+        f"{problem_id}/1.in": "1 2\n", f"{problem_id}/1.out": "3\n",
+        f"{problem_id}/2.in": "10 20\n", f"{problem_id}/2.out": "30\n"
+    }
+    response = client.post("/api/import/package/", files=build_package(entries))
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["id"], data["testcase_count"], data["test_data_version"]) == (problem_id, 2, 1)
+    assert sorted(os.listdir(os.path.join("problems", problem_id))) == ["1.in", "1.out", "2.in", "2.out"]
+
+    problem = client.get(f"/api/problems/{problem_id}?fields=testcases").json()["data"]
+    assert problem["testcases"][1]["input_file"] == "2.in"
+
+    submission_id = client.post("/api/submissions/", json={
+        "problem_id": problem_id,
+        "language": "python",
+        "code": "a, b = map(int, input().split())\nprint(a + b)"
+    }).json()["data"]["submission_id"]
+    assert client.get(f"/api/submissions/{submission_id}").json()["data"]["score"] == 20
+
+    # Existing problems are only replaced with overwrite=true
+    response = client.post("/api/import/package/", files=build_package(entries))
+    assert response.status_code == 409
+    del entries[f"{problem_id}/2.in"], entries[f"{problem_id}/2.out"]
+    response = client.post("/api/import/package/?overwrite=true", files=build_package(entries))
+    assert response.status_code == 200
+    assert sorted(os.listdir(os.path.join("problems", problem_id))) == ["1.in", "1.out"]
+
+    # Invalid packages are rejected without touching storage
+    for bad_entries in (
+        {"problem.json": json.dumps(statement), "1.in": "1 2\n"},
+        {"problem.json": json.dumps(statement), "1.in": "", "1.out": "", "3.in": "", "3.out": ""},
+        {"problem.json": json.dumps(statement), "../1.in": "", "1.out": ""},
+        {"1.in": "", "1.out": ""}
+    ):
+        response = client.post("/api/import/package/?overwrite=true", files=build_package(bad_entries))
+        assert response.status_code == 400
+    assert sorted(os.listdir(os.path.join("problems", problem_id))) == ["1.in", "1.out"]
+    assert not [name for name in os.listdir("problems") if name.startswith(".")]
+
+    response = client.post("/api/import/package/", files={"file": ("package.txt", b"x", "text/plain")})
+    assert response.status_code == 400
@@ -190,4 +190,105 @@ def test_access_audit_logs(client):
     response = client.get(f"/api/logs/access/?problem_id={problem_id}")
     assert response.status_code == 200
     data = response.json()
-    assert data["code"] == 200
\ No newline at end of file
+    assert data["code"] == 200
+
+def test_get_submission_log_detail(client):
+    """Test GET /api/submissions/{submission_id}/log?detail=true - test data resolved by reference"""
+    from app.models import data_store
+
+    setup_admin_session(client)
+
+    problem_id = "test_log_detail_" + uuid.uuid4().hex[:4]
+    problem_data = {
+        "id": problem_id,
+        "title": "日志引用测试",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2\n", "output": "3\n"}],
+        "testcases": [
+            {"input": "1 2\n", "output": "3\n"},
+            {"input": "10 20\n", "output": "30\n"}
+        ],
+        "constraints": "|a|,|b| <= 10^9",
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }
+    client.post("/api/problems/", json=problem_data)
+
+    submit_response = client.post("/api/submissions/", json={
+        "problem_id": problem_id,
+        "language": "python",
+        "code": "a, b = map(int, input().split())\nprint(a + b)"
+    })
+    submission_id = submit_response.json()["data"]["submission_id"]
+
+    # The stored log references the test data instead of copying it
+    stored = data_store.get_submission_log(submission_id)
+    assert "input_data" not in stored["test_cases"][0]
+    assert stored["test_data"]["problem_id"] == problem_id
+
+    response = client.get(f"/api/submissions/{submission_id}/log?detail=true")
+    assert response.status_code == 200
+    test_cases = response.json()["data"]["test_cases"]
+    assert test_cases[1]["input_data"] == "10 20\n"
+    assert test_cases[1]["expected_output"] == "30\n"
+    assert test_cases[1]["actual_output"].strip() == "30"
+
+    # Changed test data is reported as unavailable rather than shown wrongly
+    client.delete(f"/api/problems/{problem_id}")
+    problem_data["testcases"][1] = {"input": "5 5\n", "output": "10\n"}
+    client.post("/api/problems/", json=problem_data)
+    response = client.get(f"/api/submissions/{submission_id}/log?detail=true")
+    test_cases = response.json()["data"]["test_cases"]
+    assert test_cases[0]["input_data"] == "1 2\n"
+    assert test_cases[1]["input_data"] is None
+
+
+def test_get_submission_log_detail_hides_private_cases(client):
+    """Test GET /api/submissions/{submission_id}/log?detail=true - owners only see hidden test data when cases are public"""
+    setup_admin_session(client)
+
+    problem_id = "test_log_hidden_" + uuid.uuid4().hex[:4]
+    client.post("/api/problems/", json={
+        "id": problem_id,
+        "title": "隐藏测试点",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2\n", "output": "3\n"}],
+        "testcases": [{"input": "123 456\n", "output": "579\n"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "time_limit": 1.0,
+        "memory_limit": 128
+    })
+    client.put(f"/api/problems/{problem_id}/log_visibility", json={"public_cases": False})
+
+    username = "hidden_owner_" + uuid.uuid4().hex[:8]
+    password = "pw_" + uuid.uuid4().hex[:8]
+    client.post("/api/users/", json={"username": username, "password": password})
+    setup_user_session(client, username, password)
+    submission_id = client.post("/api/submissions/", json={
+        "problem_id": problem_id,
+        "language": "python",
+        "code": "a, b = map(int, input().split())\nprint(a + b)"
+    }).json()["data"]["submission_id"]
+
+    response = client.get(f"/api/submissions/{submission_id}/log?detail=true")
+    assert response.status_code == 200
+    case = response.json()["data"]["test_cases"][0]
+    assert case["status"] == "AC"
+    assert case["actual_output"].strip() == "579"
+    assert "input_data" not in case
+    assert "expected_output" not in case
+    assert "input_hash" not in case
+
+    # Admins and public problems still get the resolved test data
+    setup_admin_session(client)
+    case = client.get(f"/api/submissions/{submission_id}/log?detail=true").json()["data"]["test_cases"][0]
+    assert case["input_data"] == "123 456\n"
+
+    client.put(f"/api/problems/{problem_id}/log_visibility", json={"public_cases": True})
+    setup_user_session(client, username, password)
+    case = client.get(f"/api/submissions/{submission_id}/log?detail=true").json()["data"]["test_cases"][0]
+    assert case["expected_output"] == "579\n"
@@ -1,4 +1,6 @@
+import shutil
 import uuid
+import pytest
 
 from test_helpers import setup_user_session, reset_system, create_test_user, setup_admin_session
 
@@ -156,3 +158,533 @@ def test_delete_problem(client):
     # Test non-existent problem
     response = client.delete("/api/problems/nonexistent")
     assert response.status_code == 404
+
+
+def test_problem_cache(client):
+    """Test GET /api/problems/{problem_id} - parsed problems are cached and invalidated"""
+    import json
+    from app.routers.problems import get_problem_cache_stats, get_problem_file_path
+
+    setup_admin_session(client)
+
+    problem_id = "test_cache_" + uuid.uuid4().hex[:4]
+    problem_data = {
+        "id": problem_id,
+        "title": "缓存题目",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": "1 2", "output": "3"}],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }
+    client.post("/api/problems/", json=problem_data)
+
+    client.get(f"/api/problems/{problem_id}")
+    stats = get_problem_cache_stats()
+    response = client.get(f"/api/problems/{problem_id}")
+    assert response.json()["data"]["title"] == "缓存题目"
+    assert get_problem_cache_stats()["hits"] == stats["hits"] + 1
+    assert get_problem_cache_stats()["misses"] == stats["misses"]
+
+    # Editing the file outside the API is picked up through mtime/size
+    with open(get_problem_file_path(problem_id), "w", encoding="utf-8") as f:
+        json.dump({**problem_data, "title": "修改后的缓存题目"}, f, ensure_ascii=False)
+    response = client.get(f"/api/problems/{problem_id}")
+    assert response.json()["data"]["title"] == "修改后的缓存题目"
+
+    client.delete(f"/api/problems/{problem_id}")
+    response = client.get(f"/api/problems/{problem_id}")
+    assert response.status_code == 404
+
+
+def test_problem_list_uses_manifest(client):
+    """Test GET /api/problems/ - listing reads the summary manifest instead of full problems"""
+    from app.routers.problems import get_problem_cache_stats, get_problem_summaries
+
+    setup_admin_session(client)
+
+    problem_id = "test_manifest_" + uuid.uuid4().hex[:4]
+    client.post("/api/problems/", json={
+        "id": problem_id,
+        "title": "清单题目",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": "1 2", "output": "3"}, {"input": "10 20", "output": "30"}],
+        "time_limit": 1.0,
+        "memory_limit": 128,
+        "tags": ["基础题"],
+        "difficulty": "入门"
+    })
+
+    summary = next(s for s in get_problem_summaries() if s["id"] == problem_id)
+    assert summary["testcase_count"] == 2
+    assert summary["test_data_size"] == len("1 2" "3" "10 20" "30")
+    assert summary["tags"] == ["基础题"]
+
+    stats = get_problem_cache_stats()
+    response = client.get("/api/problems/")
+    assert {"id": problem_id, "title": "清单题目"} in response.json()["data"]
+    after = get_problem_cache_stats()
+    assert (after["hits"], after["misses"]) == (stats["hits"], stats["misses"])
+
+    client.delete(f"/api/problems/{problem_id}")
+    response = client.get("/api/problems/")
+    assert problem_id not in [p["id"] for p in response.json()["data"]]
+
+
+def test_problem_list_throttles_directory_scan(client, monkeypatch):
+    """Test GET /api/problems/ - reconciling with the problems directory is throttled, API writes show up at once"""
+    import app.routers.problems as problems
+
+    setup_admin_session(client)
+    client.get("/api/problems/")
+
+    scans = []
+    get_all_problem_ids = problems.get_all_problem_ids
+    monkeypatch.setattr(problems, "get_all_problem_ids", lambda: scans.append(1) or get_all_problem_ids())
+    monkeypatch.setattr(problems, "PROBLEM_MANIFEST_SYNC_INTERVAL", 60)
+
+    problem_id = "test_throttle_" + uuid.uuid4().hex[:4]
+    client.post("/api/problems/", json={
+        "id": problem_id,
+        "title": "节流题目",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": "1 2", "output": "3"}],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    })
+    for _ in range(3):
+        assert problem_id in [p["id"] for p in client.get("/api/problems/").json()["data"]]
+        client.get("/api/problems/search?q=节流")
+    assert scans == []
+
+    client.delete(f"/api/problems/{problem_id}")
+    assert problem_id not in [p["id"] for p in client.get("/api/problems/").json()["data"]]
+
+
+def test_problem_list_filters_and_cursor(client):
+    """Test GET /api/problems/ - tag/difficulty/author filters with cursor pagination"""
+    setup_admin_session(client)
+
+    tag = "tag_" + uuid.uuid4().hex[:6]
+    problem_ids = []
+    for i in range(5):
+        problem_id = f"test_filter_{tag}_{i}"
+        problem_ids.append(problem_id)
+        client.post("/api/problems/", json={
+            "id": problem_id,
+            "title": f"过滤题目{i}",
+            "description": "计算a+b",
+            "input_description": "两个整数",
+            "output_description": "它们的和",
+            "samples": [{"input": "1 2", "output": "3"}],
+            "constraints": "|a|,|b| <= 10^9",
+            "testcases": [{"input": "1 2", "output": "3"}],
+            "time_limit": 1.0,
+            "memory_limit": 128,
+            "tags": [tag, "基础题"],
+            "difficulty": "入门" if i % 2 == 0 else "提高",
+            "author": "作者" + tag
+        })
+
+    # Filters without paging keep the plain list response
+    response = client.get(f"/api/problems/?tag={tag}")
+    assert [p["id"] for p in response.json()["data"]] == problem_ids
+    response = client.get(f"/api/problems/?tag={tag}&difficulty=入门&author=作者{tag}")
+    assert [p["id"] for p in response.json()["data"]] == problem_ids[0::2]
+
+    # Cursor pagination walks the filtered result
+    seen = []
+    cursor = None
+    while True:
+        url = f"/api/problems/?tag={tag}&page_size=2" + (f"&cursor={cursor}" if cursor else "")
+        data = client.get(url).json()["data"]
+        seen.extend(p["id"] for p in data["problems"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert seen == problem_ids
+
+    # Deleting a problem removes it from the indexes
+    client.delete(f"/api/problems/{problem_ids[0]}")
+    response = client.get(f"/api/problems/?tag={tag}&difficulty=入门")
+    assert [p["id"] for p in response.json()["data"]] == problem_ids[2::2]
+
+    response = client.get("/api/problems/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_search_problems(client):
+    """Test GET /api/problems/search - BM25 full-text search over title, description, hint and source"""
+    setup_admin_session(client)
+
+    word = "kw" + uuid.uuid4().hex[:8]
+    base = {
+        "input_description": "一个图",
+        "output_description": "最短距离",
+        "samples": [{"input": "1", "output": "1"}],
+        "constraints": "n <= 10^5",
+        "testcases": [{"input": "1", "output": "1"}]
+    }
+    client.post("/api/problems/", json={**base, "id": f"test_search_{word}_1", "title": f"单源最短路径 {word}", "description": "给定带权有向图"})
+    client.post("/api/problems/", json={**base, "id": f"test_search_{word}_2", "title": "图的遍历", "description": f"遍历整张图 {word}", "hint": "可以先求最短路径"})
+    client.post("/api/problems/", json={**base, "id": f"test_search_{word}_3", "title": "无关题目", "description": "字符串处理", "source": f"{word} 校赛"})
+
+    response = client.get(f"/api/problems/search?q=最短路径 {word}")
+    assert response.status_code == 200
+    results = response.json()["data"]
+    ids = [r["id"] for r in results]
+    assert ids[:2] == [f"test_search_{word}_1", f"test_search_{word}_2"]
+    assert f"test_search_{word}_3" in ids
+    assert results[0]["score"] >= results[1]["score"]
+
+    response = client.get(f"/api/problems/search?q={word}&limit=2")
+    assert len(response.json()["data"]) == 2
+
+    # Deleted problems drop out of the index
+    client.delete(f"/api/problems/test_search_{word}_1")
+    response = client.get(f"/api/problems/search?q={word}")
+    assert f"test_search_{word}_1" not in [r["id"] for r in response.json()["data"]]
+
+    response = client.get("/api/problems/search?q=")
+    assert response.status_code == 400
+
+
+def test_problem_external_testdata(client, monkeypatch):
+    """Test POST /api/problems/ - large test sets are stored as .in/.out files and judged from them"""
+    import json
+    import os
+    from app.routers import problems
+
+    monkeypatch.setattr(problems, "TESTDATA_INLINE_LIMIT", 0)
+    setup_admin_session(client)
+
+    problem_id = "test_external_" + uuid.uuid4().hex[:6]
+    client.post("/api/problems/", json={
+        "id": problem_id,
+        "title": "外部测试数据",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": "1 2\n", "output": "3\n"}, {"input": "10 20\n", "output": "30  \n\n"}],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    })
+
+    # The problem JSON keeps only file references
+    with open(os.path.join("problems", f"{problem_id}.json"), encoding="utf-8") as f:
+        stored = json.load(f)
+    assert [(case["input_file"], case["output_file"]) for case in stored["testcases"]] == [("1.in", "1.out"), ("2.in", "2.out")]
+    assert "input" not in stored["testcases"][0]
+    with open(os.path.join("problems", problem_id, "2.in"), encoding="utf-8") as f:
+        assert f.read() == "10 20\n"
+
+    # Referencing files outside the problem directory is rejected
+    response = client.post("/api/problems/", json={
+        **stored, "id": problem_id + "_bad", "testcases": [{"input_file": "../secret", "output_file": "1.out"}]
+    })
+    assert response.status_code != 200
+
+    submission_id = client.post("/api/submissions/", json={
+        "problem_id": problem_id,
+        "language": "python",
+        "code": "a, b = map(int, input().split())\nprint(a + b)"
+    }).json()["data"]["submission_id"]
+    response = client.get(f"/api/submissions/{submission_id}/log?detail=true")
+    test_cases = response.json()["data"]["test_cases"]
+    assert [case["status"] for case in test_cases] == ["AC", "AC"]
+    assert test_cases[1]["input_data"] == "10 20\n"
+    assert test_cases[1]["test_data_truncated"] is False
+
+    # Export inlines the external files again
+    exported = client.get("/api/export/").json()["data"]["problems"]
+    exported = next(problem for problem in exported if problem["id"] == problem_id)
+    assert exported["testcases"][1] == {"input": "10 20\n", "output": "30  \n\n"}
+
+    # Inline cases never overwrite files that other cases still reference
+    import io
+    from app.routers.problems import compute_testcase_hashes, load_problem, read_testcase_text
+
+    reordered = {**stored, "testcases": [{"input": "5 5\n", "output": "10\n"}, {"input_file": "1.in", "output_file": "1.out"}]}
+    files = {"file": ("problem.json", io.BytesIO(json.dumps({"problems": [reordered]}).encode("utf-8")), "application/json")}
+    assert client.post("/api/import/", files=files).status_code == 200
+    problem = load_problem(problem_id)
+    assert problem.testcases[1].input_file == "1.in"
+    assert read_testcase_text(problem_id, problem.testcases[1], "input") == "1 2\n"
+    assert problem.testcases[0].input_file not in ("1.in", "1.out")
+    assert read_testcase_text(problem_id, problem.testcases[0], "output") == "10\n"
+    for case in problem.testcases:
+        assert compute_testcase_hashes(problem_id, case) == (case.input_hash, case.output_hash)
+
+    client.delete(f"/api/problems/{problem_id}")
+    assert not os.path.exists(os.path.join("problems", problem_id))
+
+
+def test_problem_detail_projection_and_etag(client):
+    """Test GET /api/problems/{problem_id} - default view without test data, fields projection and ETag"""
+    setup_admin_session(client)
+
+    problem_id = "test_etag_" + uuid.uuid4().hex[:6]
+    problem_data = {
+        "id": problem_id,
+        "title": "ETag测试",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": "1 2", "output": "3"}, {"input": "3 4", "output": "7"}],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }
+    client.post("/api/problems/", json=problem_data)
+
+    # Default view excludes test data but reports how many cases exist
+    response = client.get(f"/api/problems/{problem_id}")
+    data = response.json()["data"]
+    assert "testcases" not in data
+    assert data["testcase_count"] == 2
+    assert data["has_spj"] is False
+    etag = response.headers["ETag"]
+
+    # Projection returns only the requested fields
+    response = client.get(f"/api/problems/{problem_id}?fields=id,testcases")
+    data = response.json()["data"]
+    assert set(data) == {"id", "testcases"}
+    assert [{"input": case["input"], "output": case["output"]} for case in data["testcases"]] == problem_data["testcases"]
+    assert response.headers["ETag"] != etag
+    assert client.get(f"/api/problems/{problem_id}?fields=id,unknown").status_code == 400
+
+    # Unchanged problems revalidate with 304
+    response = client.get(f"/api/problems/{problem_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # Changing the problem changes the ETag
+    client.delete(f"/api/problems/{problem_id}")
+    client.post("/api/problems/", json={**problem_data, "title": "ETag测试（修改）"})
+    response = client.get(f"/api/problems/{problem_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_problem_test_data_version(client):
+    """Test POST /api/import/ - test data digest and version change only when test data changes"""
+    import io
+    import json
+
+    setup_admin_session(client)
+
+    problem_id = "test_version_" + uuid.uuid4().hex[:6]
+    problem_data = {
+        "id": problem_id,
+        "title": "版本号测试",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": "1 2", "output": "3"}],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }
+    created = client.post("/api/problems/", json=problem_data).json()["data"]
+    assert created["test_data_version"] == 1
+    assert len(created["test_data_digest"]) == 64
+
+    def import_problem(data):
+        files = {"file": ("problem.json", io.BytesIO(json.dumps({"problems": [data]}).encode("utf-8")), "application/json")}
+        assert client.post("/api/import/", files=files).status_code == 200
+        return client.get(f"/api/problems/{problem_id}?fields=test_data_digest,test_data_version").json()["data"]
+
+    # Statement-only changes keep the version
+    data = import_problem({**problem_data, "title": "版本号测试（改标题）"})
+    assert data == {"test_data_digest": created["test_data_digest"], "test_data_version": 1}
+
+    # Changed test data bumps the version and digest
+    data = import_problem({**problem_data, "testcases": [{"input": "1 2", "output": "3"}, {"input": "2 2", "output": "4"}]})
+    assert data["test_data_version"] == 2
+    assert data["test_data_digest"] != created["test_data_digest"]
+
+    # Deleting and re-creating the problem never reuses a version
+    client.delete(f"/api/problems/{problem_id}")
+    recreated = client.post("/api/problems/", json=problem_data).json()["data"]
+    assert recreated["test_data_version"] == 3
+
+
+def test_generate_outputs_from_reference_solution(client):
+    """Test POST /api/problems/{problem_id}/outputs - fill and verify outputs with a reference solution"""
+    setup_admin_session(client)
+
+    problem_id = "test_outputs_" + uuid.uuid4().hex[:6]
+    created = client.post("/api/problems/", json={
+        "id": problem_id,
+        "title": "标程生成输出",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": f"{i} {i}\n", "output": ""} for i in range(6)],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }).json()["data"]
+    solution = {"language": "python", "code": "a, b = map(int, input().split())\nprint(a + b)"}
+
+    response = client.post(f"/api/problems/{problem_id}/outputs", json=solution)
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["updated"] is True
+    assert data["failed_cases"] == []
+    assert data["test_data_version"] == created["test_data_version"] + 1
+    assert all("time_used" in case and "slow" in case for case in data["test_cases"])
+    testcases = client.get(f"/api/problems/{problem_id}?fields=testcases").json()["data"]["testcases"]
+    assert [case["output"] for case in testcases] == [f"{2 * i}\n" for i in range(6)]
+
+    # Verify mode reports mismatches without changing the problem
+    response = client.post(f"/api/problems/{problem_id}/outputs", json={**solution, "mode": "verify"})
+    assert response.json()["data"]["mismatched_cases"] == []
+    wrong = {"language": "python", "code": "a, b = map(int, input().split())\nprint(a + b if a else 1)", "mode": "verify"}
+    data = client.post(f"/api/problems/{problem_id}/outputs", json=wrong).json()["data"]
+    assert data["mismatched_cases"] == [0]
+    assert data["updated"] is False
+
+    # A failing solution leaves the outputs untouched
+    data = client.post(f"/api/problems/{problem_id}/outputs", json={"language": "python", "code": "raise SystemExit(1)"}).json()["data"]
+    assert data["updated"] is False
+    assert data["failed_cases"] == list(range(6))
+
+    response = client.post(f"/api/problems/{problem_id}/outputs", json={**solution, "mode": "unknown"})
+    assert response.status_code == 400
+
+
+def test_generate_outputs_keeps_external_files_when_save_fails(client, monkeypatch):
+    """Test POST /api/problems/{problem_id}/outputs - a failed save leaves the stored outputs and their hashes intact"""
+    import json
+    import os
+    from app.routers import problems
+
+    monkeypatch.setattr(problems, "TESTDATA_INLINE_LIMIT", 0)
+    setup_admin_session(client)
+
+    problem_id = "test_outputs_ext_" + uuid.uuid4().hex[:6]
+    client.post("/api/problems/", json={
+        "id": problem_id,
+        "title": "外部输出",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": f"{i} {i}\n", "output": "0\n"} for i in range(3)],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    })
+    data_dir = os.path.join("problems", problem_id)
+    before = sorted(os.listdir(data_dir))
+    solution = {"language": "python", "code": "a, b = map(int, input().split())\nprint(a + b)"}
+
+    def failing_save(problem):
+        raise RuntimeError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(problems, "save_problem", failing_save)
+        response = client.post(f"/api/problems/{problem_id}/outputs", json=solution)
+    assert response.status_code == 500
+    assert response.json()["code"] == 500
+    assert sorted(os.listdir(data_dir)) == before
+    assert client.post(f"/api/problems/{problem_id}/outputs", json={**solution, "mode": "verify"}).json()["data"]["mismatched_cases"] == [1, 2]  # 0 + 0 already matches
+
+    # A successful fill replaces the output files and the stored hashes together
+    assert client.post(f"/api/problems/{problem_id}/outputs", json=solution).json()["data"]["updated"] is True
+    with open(os.path.join("problems", f"{problem_id}.json"), encoding="utf-8") as f:
+        stored = json.load(f)
+    assert sorted(os.listdir(data_dir)) == sorted(name for case in stored["testcases"] for name in (case["input_file"], case["output_file"]))
+    for i, case in enumerate(stored["testcases"]):
+        with open(os.path.join(data_dir, case["output_file"]), encoding="utf-8") as f:
+            assert f.read() == f"{2 * i}\n"
+    assert client.post(f"/api/problems/{problem_id}/outputs", json={**solution, "mode": "verify"}).json()["data"]["mismatched_cases"] == []
+
+
+@pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not available")
+def test_generate_outputs_reports_compile_error(client):
+    """Test POST /api/problems/{problem_id}/outputs - a reference solution that fails to compile returns the compiler output"""
+    setup_admin_session(client)
+    client.post("/api/languages/", json={
+        "name": "cpp",
+        "file_ext": ".cpp",
+        "compile_cmd": "g++ -o main main.cpp",
+        "run_cmd": "./main"
+    })
+
+    problem_id = "test_outputs_ce_" + uuid.uuid4().hex[:6]
+    client.post("/api/problems/", json={
+        "id": problem_id,
+        "title": "标程编译失败",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": f"{i} {i}\n", "output": "0\n"} for i in range(3)],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    })
+
+    response = client.post(f"/api/problems/{problem_id}/outputs", json={
+        "language": "cpp", "code": "int main() { return missing_symbol; }\n"
+    })
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["updated"] is False
+    assert data["failed_cases"] == [0, 1, 2]
+    assert all(case["status"] == "CE" for case in data["test_cases"])
+    assert "missing_symbol" in data["compile_error"]
+    testcases = client.get(f"/api/problems/{problem_id}?fields=testcases").json()["data"]["testcases"]
+    assert [case["output"] for case in testcases] == ["0\n"] * 3
+
+
+def test_create_problem_rejects_unsafe_ids(client):
+    """Test POST /api/problems/ - ids that are not safe file names are rejected before anything is written"""
+    import io
+    import json
+    import os
+
+    setup_admin_session(client)
+    problem_id = "test_safe_id_" + uuid.uuid4().hex[:4]
+    problem_data = {
+        "id": problem_id,
+        "title": "安全ID",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2", "output": "3"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "testcases": [{"input": "1 2", "output": "3"}],
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }
+    assert client.post("/api/problems/", json=problem_data).status_code == 200
+
+    for bad_id in (".", "..", ".hidden", "a/b", "../users"):
+        response = client.post("/api/problems/", json={**problem_data, "id": bad_id})
+        assert response.status_code == 400
+        files = {"file": ("bad.json", io.BytesIO(json.dumps({"problems": [{**problem_data, "id": bad_id}]}).encode("utf-8")), "application/json")}
+        assert client.post("/api/import/", files=files).status_code == 400
+
+    assert os.path.exists(os.path.join("problems", f"{problem_id}.json"))
+    assert os.path.exists("users.json")
+    assert client.get(f"/api/problems/{problem_id}").status_code == 200
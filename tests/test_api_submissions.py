@@ -1,3 +1,5 @@
+import asyncio
+import shutil
 import uuid
 import time
 import pytest
@@ -210,4 +212,265 @@ def test_rejudge_submission(client):
 
     # Test non-existent submission
     response = client.put("/api/submissions/999999/rejudge")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+
+def test_rejudge_only_if_test_data_changed(client):
+    """Test PUT /api/submissions/{submission_id}/rejudge?only_if_changed=true"""
+    from app.models import data_store
+
+    setup_admin_session(client)
+
+    problem_id = "test_rejudge_changed_" + uuid.uuid4().hex[:4]
+    problem_data = {
+        "id": problem_id,
+        "title": "按需重新评测",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2\n", "output": "3\n"}],
+        "testcases": [{"input": "1 2\n", "output": "3\n"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }
+    problem = client.post("/api/problems/", json=problem_data).json()["data"]
+
+    submission_id = client.post("/api/submissions/", json={
+        "problem_id": problem_id,
+        "language": "python",
+        "code": "a, b = map(int, input().split())\nprint(a + b)"
+    }).json()["data"]["submission_id"]
+
+    # The log records which test data version was judged
+    test_data = data_store.get_submission_log(submission_id)["test_data"]
+    assert test_data["version"] == problem["test_data_version"]
+    assert test_data["digest"] == problem["test_data_digest"]
+
+    response = client.put(f"/api/submissions/{submission_id}/rejudge?only_if_changed=true")
+    assert response.json()["msg"] == "test data unchanged"
+
+    client.delete(f"/api/problems/{problem_id}")
+    client.post("/api/problems/", json={**problem_data, "testcases": [{"input": "2 2\n", "output": "4\n"}]})
+    response = client.put(f"/api/submissions/{submission_id}/rejudge?only_if_changed=true")
+    assert response.json()["msg"] == "rejudge started"
+
+def test_get_submissions_list_cursor(client):
+    """Test GET /api/submissions/ - cursor pagination is stable under new submissions"""
+    setup_admin_session(client)
+
+    problem_id = "test_cursor_" + uuid.uuid4().hex[:4]
+    problem_data = {
+        "id": problem_id,
+        "title": "游标分页",
+        "description": "计算a+b",
+        "input_description": "两个整数",
+        "output_description": "它们的和",
+        "samples": [{"input": "1 2\n", "output": "3\n"}],
+        "testcases": [{"input": "1 2\n", "output": "3\n"}],
+        "constraints": "|a|,|b| <= 10^9",
+        "time_limit": 1.0,
+        "memory_limit": 128
+    }
+    client.post("/api/problems/", json=problem_data)
+
+    submission_data = {
+        "problem_id": problem_id,
+        "language": "python",
+        "code": "a, b = map(int, input().split())\nprint(a + b)"
+    }
+    submitted = [client.post("/api/submissions/", json=submission_data).json()["data"]["submission_id"] for _ in range(3)]
+
+    # First page via page/page_size also hands out a cursor
+    response = client.get(f"/api/submissions/?problem_id={problem_id}&page_size=2")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["total"] == 3
+    assert [s["submission_id"] for s in data["submissions"]] == submitted[:2]
+    assert data["next_cursor"]
+
+    # A new submission arriving between pages does not shift the next page
+    submitted.append(client.post("/api/submissions/", json=submission_data).json()["data"]["submission_id"])
+    response = client.get(f"/api/submissions/?problem_id={problem_id}&page_size=2&cursor={data['next_cursor']}")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [s["submission_id"] for s in data["submissions"]] == submitted[2:4]
+    assert "total" not in data
+
+    # Invalid cursor
+    response = client.get(f"/api/submissions/?problem_id={problem_id}&cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_judge_compares_precomputed_output_digests(client, monkeypatch):
+    """Test POST /api/submissions/ - expected outputs are compared through digests stored with the problem"""
+    from app.docker_judge import DockerJudge
+
+    def fail(*args, **kwargs):
+        raise AssertionError("expected output should not be re-normalized")
+
+    monkeypatch.setattr(DockerJudge, "_output_matches", fail)
+    setup_admin_session(client)
+
+    code = "print(1)\nprint(2)"
+    for judge_mode, expected_score in (("standard", 10), ("strict", 0)):
+        problem_id = f"test_digest_{judge_mode}_" + uuid.uuid4().hex[:4]
+        client.post("/api/problems/", json={
+            "id": problem_id,
+            "title": "摘要比较",
+            "description": "输出1和2",
+            "input_description": "无",
+            "output_description": "两行",
+            "samples": [{"input": "", "output": "1\n2\n"}],
+            "testcases": [{"input": "", "output": " 1 \n2\n\n"}],
+            "constraints": "无",
+            "time_limit": 1.0,
+            "memory_limit": 128,
+            "judge_mode": judge_mode
+        })
+        problem = client.get(f"/api/problems/{problem_id}?fields=testcases").json()["data"]
+        assert problem["testcases"][0]["output_normalized_hash"]
+
+        submission_id = client.post("/api/submissions/", json={
+            "problem_id": problem_id, "language": "python", "code": code
+        }).json()["data"]["submission_id"]
+        response = client.get(f"/api/submissions/{submission_id}")
+        assert response.json()["data"]["score"] == expected_score
+
+
+def _create_cpp_problem(client, problem_id):
+    client.post("/api/languages/", json={
+        "name": "cpp",
+        "file_ext": ".cpp",
+        "compile_cmd": "g++ -o main main.cpp",
+        "run_cmd": "./main"
+    })
+    client.post("/api/problems/", json={
+        "id": problem_id,
+        "title": "编译一次",
+        "description": "输出输入的数",
+        "input_description": "一个整数",
+        "output_description": "同一个整数",
+        "samples": [{"input": "1\n", "output": "1\n"}],
+        "testcases": [{"input": f"{i}\n", "output": f"{i}\n"} for i in range(3)],
+        "constraints": "无",
+        "time_limit": 1.0,
+        "memory_limit": 128
+    })
+
+
+@pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not available")
+def test_judge_compiles_once_per_submission(client, monkeypatch):
+    """Test POST /api/submissions/ - a C++ program is compiled once and reused for every test case"""
+    import app.docker_judge
+
+    create_subprocess_exec = asyncio.create_subprocess_exec
+    compiles = []
+
+    async def counting_exec(*args, **kwargs):
+        if "g++" in args:
+            compiles.append(args)
+        return await create_subprocess_exec(*args, **kwargs)
+
+    monkeypatch.setattr(app.docker_judge.asyncio, "create_subprocess_exec", counting_exec)
+    setup_admin_session(client)
+    problem_id = "test_compile_once_" + uuid.uuid4().hex[:4]
+    _create_cpp_problem(client, problem_id)
+
+    submission_id = client.post("/api/submissions/", json={
+        "problem_id": problem_id,
+        "language": "cpp",
+        "code": "#include <iostream>\nint main() { int x; std::cin >> x; std::cout << x << std::endl; }\n"
+    }).json()["data"]["submission_id"]
+    response = client.get(f"/api/submissions/{submission_id}")
+    assert response.json()["data"]["score"] == 30
+    assert len(compiles) == 1
+
+
+def test_compile_timeout_waits_for_container(monkeypatch):
+    """Test compile_program - on timeout the compile container is killed and both processes have exited before returning"""
+    import app.docker_judge
+
+    create_subprocess_exec = asyncio.create_subprocess_exec
+    processes = {}
+
+    async def fake_docker(*args, **kwargs):   # docker run 换成长时间运行的进程，docker kill 换成立即退出的进程
+        if args[:2] == ("docker", "run"):
+            processes["run"] = await create_subprocess_exec("sleep", "30", **kwargs)
+            return processes["run"]
+        if args[:2] == ("docker", "kill"):
+            processes["kill"] = await create_subprocess_exec("true", **kwargs)
+            return processes["kill"]
+        return await create_subprocess_exec(*args, **kwargs)
+
+    judge = app.docker_judge.docker_judge
+    monkeypatch.setattr(app.docker_judge.asyncio, "create_subprocess_exec", fake_docker)
+    monkeypatch.setattr(app.docker_judge, "COMPILE_TIME_LIMIT", 0.2)
+    monkeypatch.setattr(judge, "docker_available", True, raising=False)
+
+    program = asyncio.run(judge.compile_program("int main() {}\n", "cpp"))
+    program.cleanup()
+    assert (program.status, program.error) == ("CE", "编译超时")
+    assert processes["kill"].returncode == 0
+    assert processes["run"].returncode is not None
+
+
+@pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not available")
+def test_judge_reports_compile_error_on_every_case(client):
+    """Test POST /api/submissions/ - a compile error is reported on every case and the compiler output is logged"""
+    from app.models import data_store
+
+    setup_admin_session(client)
+    problem_id = "test_compile_error_" + uuid.uuid4().hex[:4]
+    _create_cpp_problem(client, problem_id)
+
+    submission_id = client.post("/api/submissions/", json={
+        "problem_id": problem_id, "language": "cpp", "code": "int main() { return undefined_name; }\n"
+    }).json()["data"]["submission_id"]
+    response = client.get(f"/api/submissions/{submission_id}")
+    assert response.json()["data"]["score"] == 0
+
+    log = data_store.get_submission_log(submission_id)
+    assert [case["status"] for case in log["test_cases"]] == ["CE", "CE", "CE"]
+    assert "undefined_name" in log["compile_error"]
+
+
+def test_strict_digest_strips_unicode_trailing_whitespace(client):
+    """Test POST /api/submissions/ - strict mode treats trailing Unicode whitespace like the contestant's rstrip()"""
+    setup_admin_session(client)
+
+    for expected, code, expected_score in (
+        ("答案　\n", "print('答案\\u3000')", 10),
+        ("a\xa0\n", "print('a')", 10),
+        ("a\n", "print('b')", 0)
+    ):
+        problem_id = "test_strict_ws_" + uuid.uuid4().hex[:4]
+        client.post("/api/problems/", json={
+            "id": problem_id,
+            "title": "严格模式空白",
+            "description": "原样输出",
+            "input_description": "无",
+            "output_description": "一行",
+            "samples": [{"input": "", "output": expected}],
+            "testcases": [{"input": "", "output": expected}],
+            "constraints": "无",
+            "time_limit": 1.0,
+            "memory_limit": 128,
+            "judge_mode": "strict"
+        })
+        submission_id = client.post("/api/submissions/", json={
+            "problem_id": problem_id, "language": "python", "code": code
+        }).json()["data"]["submission_id"]
+        response = client.get(f"/api/submissions/{submission_id}")
+        assert response.json()["data"]["score"] == expected_score
+
+
+def test_strict_file_compare_strips_unicode_trailing_whitespace(tmp_path):
+    """Test strict comparison against an external expected-output file without a stored digest"""
+    from app.docker_judge import docker_judge
+
+    for expected, actual, matched in (("答案　\n", "答案　", True), ("a\xa0\n", "a", True), ("a \n", "b", False)):
+        expected_file = tmp_path / "1.out"
+        expected_file.write_bytes(expected.encode('utf-8'))
+        assert docker_judge._output_matches(actual.rstrip(), "", str(expected_file), "strict") is matched
+        assert docker_judge._output_matches(actual.rstrip(), expected.rstrip(), None, "strict") is matched
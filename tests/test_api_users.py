@@ -98,4 +98,23 @@ def test_get_users_list(client):
     assert "total" in data["data"]
     assert "users" in data["data"]
     assert isinstance(data["data"]["users"], list)
-    assert data["data"]["total"] >= 3
\ No newline at end of file
+    assert data["data"]["total"] >= 3
+
+def test_get_users_list_cursor(client):
+    """Test GET /api/users/ - walking all users with a cursor"""
+    reset_system(client)
+    setup_admin_session(client)
+    created = {create_test_user(client)[0] for _ in range(3)}
+
+    seen = []
+    response = client.get("/api/users/?page_size=2")
+    data = response.json()["data"]
+    seen.extend(user["username"] for user in data["users"])
+    while data["next_cursor"]:
+        response = client.get(f"/api/users/?page_size=2&cursor={data['next_cursor']}")
+        assert response.status_code == 200
+        data = response.json()["data"]
+        seen.extend(user["username"] for user in data["users"])
+
+    assert len(seen) == len(set(seen)) == 4
+    assert created | {"admin"} == set(seen)
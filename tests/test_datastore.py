@@ -0,0 +1,624 @@
+import json
+import os
+import pytest
+from app.models import DataStore, ReadWriteLock
+from app.sqlite_store import SQLiteDataStore, migrate_json_to_sqlite
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    """Run each DataStore test in an isolated data directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_journal_mode_appends_instead_of_rewriting(store_dir):
+    """Test journal mode - mutations append records, snapshot files stay untouched"""
+    store = DataStore(persistence_mode="journal")
+    store.save_data()
+    snapshot_mtime = os.path.getmtime("submissions.json")
+
+    user_id = store.create_user("journal_user", "password")
+    submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+    store.update_submission(submission_id, status="success", score=10, counts=10)
+
+    assert os.path.getmtime("submissions.json") == snapshot_mtime
+    with open("datastore.journal", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["c"] for r in records] == ["users", "submissions", "users", "submissions"]
+
+
+def test_journal_replay_on_startup(store_dir):
+    """Test journal mode - load_data replays snapshot plus journal tail"""
+    store = DataStore(persistence_mode="journal")
+    user_id = store.create_user("replay_user", "password")
+    session_id = store.create_session(user_id)
+    store.delete_session(session_id)
+    submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+    store.update_submission(submission_id, status="success", score=10, counts=10)
+
+    reloaded = DataStore(persistence_mode="journal")
+    assert reloaded.get_user_by_username("replay_user")["submit_count"] == 1
+    assert reloaded.get_session(session_id) is None
+    assert reloaded.get_submission(submission_id)["score"] == 10
+
+
+def test_journal_ignores_truncated_tail(store_dir):
+    """Test journal mode - a partially written last record is discarded"""
+    store = DataStore(persistence_mode="journal")
+    store.create_user("tail_user", "password")
+    with open("datastore.journal", "a", encoding="utf-8") as f:
+        f.write('{"op": "set", "c": "users", "k": "broken", "v": {')
+
+    reloaded = DataStore(persistence_mode="journal")
+    assert reloaded.get_user_by_username("tail_user") is not None
+    assert "broken" not in reloaded.users
+
+
+def test_journal_compaction(store_dir):
+    """Test journal mode - reaching the threshold writes a snapshot and drops the journal"""
+    store = DataStore(persistence_mode="journal")
+    store.compact_journal()
+    store.journal_compact_threshold = 4
+    user_id = store.create_user("compact_user", "password")
+    for _ in range(3):
+        store.create_session(user_id)
+
+    assert not os.path.exists("datastore.journal")
+    with open("sessions.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 3
+
+
+def test_flush_writes_only_dirty_collections(store_dir):
+    """Test snapshot mode - a session change rewrites sessions.json only"""
+    store = DataStore()
+    store.save_data()
+    user_id = store.create_user("dirty_user", "password")
+    languages_mtime = os.path.getmtime("languages.json")
+    users_mtime = os.path.getmtime("users.json")
+
+    session_id = store.create_session(user_id)
+
+    assert os.path.getmtime("languages.json") == languages_mtime
+    assert os.path.getmtime("users.json") == users_mtime
+    with open("sessions.json", encoding="utf-8") as f:
+        assert session_id in json.load(f)
+    assert store.get_flush_stats()["last_flush_bytes"] == os.path.getsize("sessions.json")
+    assert store.get_flush_stats()["dirty_collections"] == []
+
+
+def test_flush_is_atomic(store_dir, monkeypatch):
+    """Test snapshot mode - a failed write leaves the previous file intact"""
+    store = DataStore()
+    user_id = store.create_user("atomic_user", "password")
+    store.create_session(user_id)
+    with open("sessions.json", encoding="utf-8") as f:
+        before = f.read()
+
+    def broken_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", broken_replace)
+    with pytest.raises(OSError):
+        store.create_session(user_id)
+
+    with open("sessions.json", encoding="utf-8") as f:
+        assert f.read() == before
+    assert not [name for name in os.listdir(".") if name.startswith(".tmp_")]
+
+
+def test_sqlite_store_filters_and_pagination(store_dir):
+    """Test SQLite backend - submission filters, counters and paging"""
+    store = SQLiteDataStore("oj.db")
+    user_id = store.create_user("sqlite_user", "password")
+    ids = [store.create_submission(user_id, "p1", "python", f"print({i})") for i in range(3)]
+    store.create_submission(user_id, "p2", "python", "print(0)")
+    store.update_submission(ids[0], status="success", score=10, counts=10)
+
+    assert store.get_user_by_username("sqlite_user")["submit_count"] == 4
+    result = store.get_submissions(user_id=user_id, problem_id="p1", page=1, page_size=2)
+    assert result["total"] == 3
+    assert [s["submission_id"] for s in result["submissions"]] == ids[:2]
+    assert store.get_submissions(problem_id="p1", judge_status="success")["total"] == 1
+    with pytest.raises(ValueError):
+        store.create_user("sqlite_user", "password")
+
+
+def test_migrate_json_to_sqlite(store_dir):
+    """Test SQLite migrator - JSON files plus journal tail are copied over"""
+    store = DataStore(persistence_mode="journal")
+    user_id = store.create_user("migrated_user", "password")
+    submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+    store.save_submission_log(submission_id, {"score": 10, "counts": 10, "test_cases": []})
+    store.log_access(user_id, "migrated_user", "view_submission_log", submission_id, "submission")
+    store.flush_access_logs()
+
+    counts = migrate_json_to_sqlite("oj.db")
+    assert counts["users"] == 2
+
+    migrated = SQLiteDataStore("oj.db")
+    assert migrated.get_user_by_username("migrated_user")["submit_count"] == 1
+    assert migrated.get_submission(submission_id)["problem_id"] == "p1"
+    assert migrated.get_submission_log(submission_id)["score"] == 10
+    assert migrated.get_access_logs(user_id=user_id)["total"] == 1
+
+
+def test_write_behind_coalesces_commits(store_dir):
+    """Test write-behind mode - commits inside the window become one flush"""
+    store = DataStore(flush_interval=200)
+    assert store.wait_for_flush(timeout=5)
+    flushes_before = store.get_flush_stats()["flush_count"]
+
+    user_id = store.create_user("behind_user", "password")
+    for _ in range(5):
+        store.create_session(user_id)
+    assert store.get_flush_stats()["flush_count"] == flushes_before
+
+    assert store.wait_for_flush(timeout=5)
+    assert store.get_flush_stats()["flush_count"] == flushes_before + 1
+    with open("sessions.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 5
+
+
+def test_flush_barrier(store_dir):
+    """Test write-behind mode - awaiting the barrier guarantees durability"""
+    import asyncio
+
+    store = DataStore(flush_interval=20)
+    user_id = store.create_user("barrier_user", "password")
+
+    assert asyncio.run(store.flush_barrier(timeout=5))
+    with open("users.json", encoding="utf-8") as f:
+        assert user_id in json.load(f)
+
+
+def test_flush_failure_wakes_waiters(store_dir):
+    """Test write-behind mode - a failed flush is reported to waiters and retried on the next commit"""
+    import time
+
+    store = DataStore(flush_interval=20)
+    assert store.wait_for_flush(timeout=5)
+    write_json_atomic = store._write_json_atomic
+
+    def fail(file_path, data):
+        raise OSError("disk full")
+
+    store._write_json_atomic = fail
+    user_id = store.create_user("failed_flush_user", "password")
+    started = time.perf_counter()
+    assert store.wait_for_flush(timeout=5) is False
+    assert time.perf_counter() - started < 5
+    assert store.get_flush_stats()["last_flush_error"] == "disk full"
+
+    store._write_json_atomic = write_json_atomic
+    store.create_session(user_id)
+    assert store.wait_for_flush(timeout=5)
+    assert store.get_flush_stats()["last_flush_error"] is None
+    with open("users.json", encoding="utf-8") as f:
+        assert user_id in json.load(f)
+
+
+def test_username_index_consistency(store_dir):
+    """Test username index - kept in sync across create, import, reload and reset"""
+    store = DataStore(persistence_mode="journal")
+    user_id = store.create_user("indexed_user", "password")
+    store.import_users([
+        {"username": "indexed_user", "password": "hash", "role": "admin"},
+        {"username": "imported_user", "password": "hash"},
+    ])
+
+    assert store.get_user_by_username("indexed_user")["user_id"] == user_id
+    assert store.get_user_by_username("indexed_user")["role"] == "admin"
+    assert store.authenticate_user("indexed_user", "password")["user_id"] == user_id
+    assert store.get_user_by_username("imported_user") is not None
+
+    reloaded = DataStore(persistence_mode="journal")
+    assert reloaded.get_user_by_username("imported_user") is not None
+    with pytest.raises(ValueError):
+        reloaded.create_user("imported_user", "password")
+
+    reloaded.reset_system()
+    assert reloaded.get_user_by_username("indexed_user") is None
+    assert reloaded.get_user_by_username("admin") is not None
+
+
+def test_submission_indexes(store_dir):
+    """Test submission indexes - filters, intersections and latest lookups stay consistent"""
+    store = DataStore()
+    ids = []
+    for i in range(6):
+        user_id = "u1" if i % 2 == 0 else "u2"
+        problem_id = "p1" if i < 3 else "p2"
+        ids.append(store.create_submission(user_id, problem_id, "python", f"print({i})"))
+    store.update_submission(ids[0], status="success", score=10, counts=10)
+    store.update_submission(ids[4], status="success", score=10, counts=10)
+    store.import_submissions([{
+        "submission_id": "imported", "user_id": "u1", "problem_id": "p1",
+        "language": "python", "code": "print()", "submit_time": "2000-01-01T00:00:00"
+    }])
+
+    result = store.get_submissions(user_id="u1", problem_id="p1")
+    assert [s["submission_id"] for s in result["submissions"]] == ["imported", ids[0], ids[2]]
+    assert store.get_submissions(judge_status="success")["total"] == 2
+    assert store.get_submissions(judge_status="pending")["total"] == 4
+    assert store.get_submissions(user_id="u1", judge_status="completed")["total"] == 1
+    assert store.get_submissions(user_id="nobody")["total"] == 0
+
+    latest = store.get_latest_submissions(user_id="u1", problem_id="p1", limit=2)
+    assert [s["submission_id"] for s in latest] == [ids[2], ids[0]]
+
+    reloaded = DataStore()
+    assert reloaded.get_submissions(user_id="u1", problem_id="p1") == result
+    assert reloaded.get_submissions(problem_id="p2", page=2, page_size=2)["submissions"][0]["submission_id"] == ids[5]
+
+
+def test_cold_collections_load_lazily(store_dir):
+    """Test lazy loading - logs are read on first access, journal records included"""
+    store = DataStore(persistence_mode="journal")
+    user_id = store.create_user("lazy_user", "password")
+    submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+    store.save_submission_log(submission_id, {"score": 10, "counts": 10, "test_cases": []})
+    legacy_log = {"log_id": "legacy", "user_id": user_id, "username": "lazy_user", "action": "view_submission_log",
+                  "resource_id": submission_id, "resource_type": "submission", "access_time": "2024-01-01T00:00:00", "ip_address": ""}
+    with open("datastore.journal", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "set", "c": "access_logs", "k": "legacy", "v": legacy_log}) + "\n")
+
+    reloaded = DataStore(persistence_mode="journal")
+    stats = reloaded.get_load_stats()["collections"]
+    assert not stats["submission_logs"]["loaded"]
+    assert not stats["access_logs"]["loaded"]
+    assert stats["users"]["loaded"] and not stats["users"]["lazy"]
+
+    assert reloaded.get_submission_log(submission_id)["score"] == 10
+    assert reloaded.get_access_logs(user_id=user_id)["total"] == 1
+    stats = reloaded.get_load_stats()["collections"]
+    assert stats["access_logs"]["loaded"] and stats["access_logs"]["lazy"]
+
+    # 快照前必须补上尚未加载的冷集合里的日志记录
+    untouched = DataStore(persistence_mode="journal")
+    untouched.compact_journal()
+    with open("access_logs.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 1
+
+
+def test_preload_cold_collections(store_dir):
+    """Test lazy loading - background preload fills in the cold collections"""
+    with open("access_logs.json", "w", encoding="utf-8") as f:
+        json.dump({"legacy": {"log_id": "legacy", "access_time": "2024-01-01T00:00:00"}}, f)
+
+    reloaded = DataStore()
+    reloaded.preload_cold_collections(background=False)
+    stats = reloaded.get_load_stats()["collections"]
+    assert stats["access_logs"]["loaded"] and stats["access_logs"]["records"] == 1
+
+
+def test_submission_logs_are_sharded(store_dir):
+    """Test submission logs - one file per log, bounded LRU cache, legacy file fallback"""
+    with open("submission_logs.json", "w", encoding="utf-8") as f:
+        json.dump({"legacy": {"score": 5}}, f)
+    store = DataStore()
+    store.log_cache_size = 2
+    ids = ["aa01", "aa02", "bb01"]
+    for i, submission_id in enumerate(ids):
+        store.save_submission_log(submission_id, {"submission_id": submission_id, "score": i})
+
+    assert os.path.exists(os.path.join("submission_logs", "aa", "aa01.json"))
+    assert os.path.exists(os.path.join("submission_logs", "bb", "bb01.json"))
+    assert list(store._log_cache) == ["aa02", "bb01"]
+    with open("submission_logs.json", encoding="utf-8") as f:
+        assert json.load(f) == {"legacy": {"score": 5}}
+
+    assert store.get_submission_log("aa01")["score"] == 0
+    assert list(store._log_cache) == ["bb01", "aa01"]
+    assert store.get_submission_log("legacy")["score"] == 5
+    assert store.get_submission_log("missing") is None
+
+    store.save_submission_log("../escape", {"score": 1})
+    assert not os.path.exists(os.path.join(str(store_dir.parent), "escape.json"))
+    assert DataStore().get_submission_log("../escape")["score"] == 1
+
+    store.reset_system()
+    assert store.get_submission_log("aa01") is None
+    assert store.get_submission_log("legacy") is None
+
+
+def test_access_logs_are_segmented_by_day(store_dir):
+    """Test access logs - daily NDJSON segments, time-range reads and retention"""
+    os.makedirs("access_logs")
+    old_log = {"log_id": "old", "user_id": "u1", "username": "old_user", "action": "view_problem",
+               "resource_id": "p1", "resource_type": "problem", "access_time": "2020-01-01T08:00:00", "ip_address": ""}
+    with open(os.path.join("access_logs", "2020-01-01.ndjson"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(old_log) + "\n")
+
+    store = DataStore()
+    store.log_access("u1", "new_user", "view_problem", "p1", "problem")
+    store.log_access("u2", "new_user", "view_submission_log", "s1", "submission")
+
+    assert store.get_access_logs()["total"] == 3
+    assert store.get_access_logs(problem_id="p1")["total"] == 2
+    recent = store.get_access_logs(start_time="2021-01-01")
+    assert recent["total"] == 2
+    assert store.get_access_logs(end_time="2020-12-31")["logs"] == [old_log]
+
+    first = store.get_access_logs(page_size=1)
+    cursor_page = store.get_access_logs(page_size=2, cursor=first["next_cursor"])
+    assert [log["user_id"] for log in cursor_page["logs"]] == ["u1", "u2"]
+
+    store.access_log_retention_days = 30
+    store.apply_access_log_retention()
+    assert not os.path.exists(os.path.join("access_logs", "2020-01-01.ndjson"))
+    assert DataStore().get_access_logs()["total"] == 2
+
+
+def test_access_log_cursor_reads_only_needed_segments(store_dir):
+    """Test access logs - a cursor page stops reading segments once it has page_size entries"""
+    os.makedirs("access_logs")
+    for day in range(1, 6):
+        with open(os.path.join("access_logs", f"2020-01-0{day}.ndjson"), "w", encoding="utf-8") as f:
+            for hour in range(3):
+                f.write(json.dumps({"log_id": f"{day}-{hour}", "user_id": "u1", "username": "user", "action": "view_problem",
+                                    "resource_id": "p1", "resource_type": "problem",
+                                    "access_time": f"2020-01-0{day}T0{hour}:00:00", "ip_address": ""}) + "\n")
+
+    store = DataStore()
+    first = store.get_access_logs(page_size=2)
+    assert first["total"] == 15
+
+    read_days = []
+    read_segment = store._read_access_log_segment
+
+    def recording_read(day):
+        read_days.append(day)
+        return read_segment(day)
+
+    store._read_access_log_segment = recording_read
+    page = store.get_access_logs(page_size=2, cursor=first["next_cursor"])
+    assert [log["log_id"] for log in page["logs"]] == ["1-2", "2-0"]
+    assert read_days == ["2020-01-01", "2020-01-02"]
+
+
+def test_json_store_rejects_second_process(store_dir):
+    """Test JSON backend - a second process on the same data directory fails fast"""
+    import subprocess
+    import sys
+
+    DataStore()
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", "from app.models import DataStore; DataStore()"],
+        cwd=store_dir, env={**os.environ, "PYTHONPATH": repo_root, "OJ_STORAGE_BACKEND": "json"},
+        capture_output=True, text=True
+    )
+    assert result.returncode != 0
+    assert "OJ_STORAGE_BACKEND=sqlite" in result.stderr
+
+
+def test_sqlite_store_shared_between_processes(store_dir):
+    """Test SQLite backend - writes from another process are visible and counters stay exact"""
+    import subprocess
+    import sys
+
+    store = SQLiteDataStore("oj.db")
+    user_id = store.create_user("shared_user", "password")
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        "from app.models import data_store as store\n"
+        f"for i in range(20): store.create_submission('{user_id}', 'p1', 'python', 'print(1)')\n"
+    )
+    workers = [
+        subprocess.Popen([sys.executable, "-c", script], cwd=store_dir, env={**os.environ, "PYTHONPATH": repo_root, "OJ_STORAGE_BACKEND": "sqlite", "OJ_SQLITE_PATH": "oj.db"})
+        for _ in range(3)
+    ]
+    for _ in range(20):
+        store.create_submission(user_id, "p1", "python", "print(1)")
+    assert all(worker.wait(timeout=60) == 0 for worker in workers)
+
+    assert store.get_user_by_username("shared_user")["submit_count"] == 80
+    assert store.get_submissions(user_id=user_id)["total"] == 80
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_next_test_data_version(store_dir, backend):
+    """Test next_test_data_version - versions come from the shared store and are never handed out twice"""
+    def open_store():
+        return DataStore() if backend == "json" else SQLiteDataStore("oj.db")
+
+    store = open_store()
+    assert store.next_test_data_version("p1", 0, True) == 1
+    assert store.next_test_data_version("p1", 1, False) == 1  # 数据未变化时沿用当前版本
+    assert store.next_test_data_version("p1", 1, True) == 2
+
+    store = open_store()  # 重新加载后计数器仍在
+    assert store.next_test_data_version("p1", 1, True) == 3  # 基于过期的当前版本也不会重复分配
+    assert store.next_test_data_version("p1", 0, True) == 4  # 题目删除后重新创建
+    if backend == "sqlite":
+        other = SQLiteDataStore("oj.db")  # 另一个worker的连接
+        assert other.next_test_data_version("p1", 4, True) == 5
+        assert store.next_test_data_version("p1", 4, True) == 6
+    assert store.next_test_data_version("p2", 7, False) == 7  # 已有版本号的题目登记为下限
+    assert store.next_test_data_version("p2", 7, True) == 8
+
+
+def test_sqlite_migration_does_not_create_json_store(store_dir):
+    """Test python -m app.sqlite_store - the migrator never opens the JSON backend or its lock"""
+    import subprocess
+    import sys
+
+    with open("users.json", "w", encoding="utf-8") as f:
+        json.dump({"u1": {"user_id": "u1", "username": "migrated", "password_hash": "x", "role": "user", "join_time": "2024-01-01T00:00:00", "submit_count": 0, "resolve_count": 0}}, f)
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-m", "app.sqlite_store"], cwd=store_dir, env={**os.environ, "PYTHONPATH": repo_root}, capture_output=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+    assert not os.path.exists("datastore.lock")
+    assert not os.path.exists("languages.json")
+    assert SQLiteDataStore("oj.db").get_user_by_username("migrated") is not None
+
+
+def test_read_write_lock():
+    """Test ReadWriteLock - readers share, writers exclude, writers may re-enter and read"""
+    import threading
+
+    lock = ReadWriteLock()
+    acquired = []
+
+    def take(kind):
+        getattr(lock, f"acquire_{kind}")()
+        acquired.append(kind)
+        getattr(lock, f"release_{kind}")()
+
+    with lock.read():
+        reader = threading.Thread(target=take, args=("read",))
+        reader.start()
+        reader.join(timeout=5)
+        assert acquired == ["read"]  # 读锁之间不互斥
+
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+        writer = threading.Thread(target=take, args=("write",))
+        writer.start()
+        writer.join(timeout=0.2)
+        assert acquired == ["read"]  # 写锁独占
+    writer.join(timeout=5)
+    assert acquired == ["read", "write"]
+
+
+def test_concurrent_writes_during_flush(store_dir):
+    """Test concurrency - judge-style writers on other threads while snapshots are flushed"""
+    import threading
+
+    store = DataStore()
+    user_id = store.create_user("concurrent_user", "password")
+    errors = []
+
+    def submit():
+        try:
+            for _ in range(25):
+                submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+                store.update_submission(submission_id, status="success", score=10, counts=10)
+                store.get_submissions(user_id=user_id, page_size=5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(10):
+        store.save_data()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert store.get_user_by_username("concurrent_user")["submit_count"] == 100
+    assert DataStore().get_submissions(user_id=user_id, judge_status="success")["total"] == 100
+
+
+def test_transaction_commits_once(store_dir):
+    """Test transaction - mutations inside the block are journaled in one write"""
+    store = DataStore(persistence_mode="journal")
+    flushes_before = store.get_flush_stats()["flush_count"]
+
+    with store.transaction():
+        user_id = store.create_user("txn_user", "password")
+        submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+        with store.transaction():
+            store.update_submission(submission_id, status="success", score=10, counts=10)
+        store.save_submission_log(submission_id, {"score": 10})
+        assert not os.path.exists(store._submission_log_path(submission_id))
+
+    assert store.get_flush_stats()["flush_count"] == flushes_before + 1
+    assert store.get_submission_log(submission_id)["score"] == 10
+    reloaded = DataStore(persistence_mode="journal")
+    assert reloaded.get_user_by_username("txn_user")["submit_count"] == 1
+    assert reloaded.get_submission(submission_id)["status"] == "success"
+
+
+def test_transaction_rolls_back(store_dir):
+    """Test transaction - an exception restores records, indexes and counters"""
+    store = DataStore()
+    user_id = store.create_user("rollback_user", "password")
+    flushes_before = store.get_flush_stats()["flush_count"]
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+            store.create_user("phantom_user", "password")
+            store.save_submission_log(submission_id, {"score": 10})
+            raise RuntimeError("judge crashed")
+
+    assert store.get_flush_stats()["flush_count"] == flushes_before
+    assert store.get_user_by_username("phantom_user") is None
+    assert store.get_user_by_username("rollback_user")["submit_count"] == 0
+    assert store.get_submission(submission_id) is None
+    assert store.get_submissions(user_id=user_id)["total"] == 0
+    assert store.get_submission_log(submission_id) is None
+    store.create_user("phantom_user", "password")  # 用户名索引也已回滚
+
+
+def test_transaction_journaled_as_one_record(store_dir):
+    """Test transaction - a commit is one journal line, a torn line drops the whole commit"""
+    store = DataStore(persistence_mode="journal")
+    user_id = store.create_user("batch_user", "password")
+    with open("datastore.journal", encoding="utf-8") as f:
+        lines_before = len(f.readlines())
+
+    with store.transaction():
+        submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+    with open("datastore.journal", encoding="utf-8") as f:
+        lines = f.readlines()
+    assert len(lines) == lines_before + 1
+    assert json.loads(lines[-1])["op"] == "batch"
+
+    with open("datastore.journal", "w", encoding="utf-8") as f:
+        f.writelines(lines[:-1])
+        f.write(lines[-1][:len(lines[-1]) // 2])
+
+    reloaded = DataStore(persistence_mode="journal")
+    assert reloaded.get_submission(submission_id) is None
+    assert reloaded.get_user_by_username("batch_user")["submit_count"] == 0
+
+
+def test_transaction_writes_not_flushed_before_commit(store_dir):
+    """Test transaction - another thread's commit never persists uncommitted or rolled-back writes"""
+    import threading
+
+    store = DataStore()
+    user_id = store.create_user("session_user", "password")
+
+    def commit_elsewhere():
+        thread = threading.Thread(target=store.create_session, args=(user_id,))
+        thread.start()
+        thread.join()
+
+    with pytest.raises(ValueError):
+        with store.transaction():
+            store.create_user("rolled_back_user", "password")
+            commit_elsewhere()
+            with open("users.json", encoding="utf-8") as f:
+                assert "rolled_back_user" not in f.read()
+            raise ValueError("import failed")
+    assert DataStore().get_user_by_username("rolled_back_user") is None
+
+    with store.transaction():
+        store.create_user("committed_user", "password")
+        commit_elsewhere()
+    assert DataStore().get_user_by_username("committed_user") is not None
+
+
+def test_sqlite_transaction(store_dir):
+    """Test SQLite backend - transaction commits together or not at all"""
+    store = SQLiteDataStore("oj.db")
+    user_id = store.create_user("sqlite_txn_user", "password")
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.create_submission(user_id, "p1", "python", "print(1)")
+            raise RuntimeError("judge crashed")
+    assert store.get_user_by_username("sqlite_txn_user")["submit_count"] == 0
+
+    with store.transaction():
+        submission_id = store.create_submission(user_id, "p1", "python", "print(1)")
+        store.update_submission(submission_id, status="success", score=10, counts=10)
+    assert SQLiteDataStore("oj.db").get_submission(submission_id)["status"] == "success"